@@ -0,0 +1,51 @@
+"""
+Validation of large alarms list straight from raw response bytes against validation of body decoded to str.
+Both use the same adapter as alarms storage handler, so only input type differs.
+Run from project root with application environment (.env): python -m benchmarks.alarms_decode
+"""
+import timeit
+import tracemalloc
+from typing import Callable
+
+from src.models.alarm_model import AlarmModel
+from src.services.storage.alarms_storage_handler import alarms_list_adapter
+from src.utils.json_backend import json_dumps
+
+
+def make_content(alarms: int) -> bytes:
+    return json_dumps([
+        {
+            "_id": f"{i:024x}", "name": f"alarm {i}", "description": "описание " * 5, "is_repeatable": i % 2 == 0,
+            "status": "READY", "links": {"user_id": "331230161", "parent_id": f"{i:024x}"},
+            "times": {"creation_time": "2024-01-01T10:00:00", "next_notion_time": "2024-01-02T10:00:00",
+                      "end_time": None, "repeat_interval": 60}
+        }
+        for i in range(alarms)
+    ])
+
+
+def measure(validate: Callable[[], list[AlarmModel]], repeat: int) -> tuple[float, int]:
+    """Return best time of one validation and its peak allocation"""
+    elapsed = min(timeit.repeat(validate, number=1, repeat=repeat))
+    tracemalloc.start()
+    validate()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(alarms: int = 10_000, repeat: int = 5) -> None:
+    content = make_content(alarms)
+    cases: dict[str, Callable[[], list[AlarmModel]]] = {
+        "str": lambda: alarms_list_adapter.validate_json(content.decode("utf-8")),
+        "bytes": lambda: alarms_list_adapter.validate_json(content),
+    }
+
+    print(f"payload: {alarms} alarms, {len(content) / 1e6:.1f} MB")
+    for name, validate in cases.items():
+        elapsed, peak = measure(validate, repeat)
+        print(f"{name}: {elapsed * 1000:.1f} ms, peak alloc {peak / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
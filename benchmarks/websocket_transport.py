@@ -0,0 +1,71 @@
+"""
+Pooled HTTP against multiplexed WebSocket transport. The same stand-in backend answers after backend_latency
+over HTTP to pooled TCP transport and over gateway to WebSocket transport, both have one network hop.
+Run from project root with application environment (.env): python -m benchmarks.websocket_transport
+"""
+import asyncio
+import time
+
+import aiohttp
+from aiohttp import web
+
+from src.services.requests.transports import ASGITransport, ITransport, TCPTransport, WebSocketTransport
+from src.services.requests.websocket_gateway import create_gateway_app
+from src.utils.json_backend import json_dumps
+
+
+async def measure(transport: ITransport, requests: int, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def call(i: int) -> None:
+        async with semaphore:
+            started_at = time.perf_counter()
+            await transport.request("GET", f"items/{i}", {})
+            latencies.append(time.perf_counter() - started_at)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started_at
+    latencies.sort()
+    p50, p99 = latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+    print(f"{transport!r}: {requests / elapsed:.0f} req/s, p50 {p50 * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms")
+
+
+async def main(requests: int = 2000, concurrency: int = 64, pool_size: int = 4, backend_latency: float = 0.005) -> None:
+    body = json_dumps({"_id": "1", "name": "item"})
+
+    async def asgi_backend(scope: dict, receive, send) -> None:
+        await receive()
+        await asyncio.sleep(backend_latency)
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def http_backend(_: web.Request) -> web.Response:
+        await asyncio.sleep(backend_latency)
+        return web.Response(body=body, content_type="application/json")
+
+    backend = web.Application()
+    backend.router.add_get("/items/{id}", http_backend)
+    runners = [web.AppRunner(backend), web.AppRunner(create_gateway_app(ASGITransport(asgi_backend)))]
+    for port, runner in enumerate(runners, start=8781):
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+
+    class Pool(TCPTransport):
+        def create_connector(self) -> aiohttp.BaseConnector:
+            return aiohttp.TCPConnector(limit=pool_size)
+
+    transport: ITransport
+    for transport in (Pool("http://127.0.0.1:8781"), WebSocketTransport("ws://127.0.0.1:8782/ws")):
+        await transport.open()
+        await transport.warm_up(pool_size)
+        await measure(transport, requests, concurrency)
+        await transport.close()
+
+    for runner in reversed(runners):
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
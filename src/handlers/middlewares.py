@@ -0,0 +1,93 @@
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from src.services.requests.balancer import consistency_key
+from src.services.requests.deadline import deadline
+from src.services.storage.alarms_storage_handler import get_alarms_storage_handler
+from src.services.storage.notes_storage_handler import get_notes_storage_handler
+from src.services.storage.themes_storage_handler import get_themes_storage_handler
+from src.services.storage.tree_snapshot import get_tree_snapshots
+from src.services.ui.prefetch import get_navigation_prefetcher
+from src.utils import config
+
+
+class DeadlineMiddleware(BaseMiddleware):
+    """
+    Set deadline for backend calls of every update when it is received.
+    Calls still running when the user has already given up are cancelled with DeadlineExceeded
+    """
+
+    def __init__(
+            self,
+            callback_timeout: float = config.BACKEND_CALLBACK_DEADLINE,
+            message_timeout: float = config.BACKEND_MESSAGE_DEADLINE
+    ) -> None:
+        """
+        :param callback_timeout: Seconds to handle callback query, telegram client stops waiting answer soon
+        :param message_timeout: Seconds to handle other updates
+        """
+        self.callback_timeout = callback_timeout
+        self.message_timeout = message_timeout
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: dict[str, Any]
+    ) -> Any:
+        is_callback = isinstance(event, Update) and event.callback_query is not None
+        with deadline(self.callback_timeout if is_callback else self.message_timeout):
+            return await handler(event, data)
+
+
+class ConsistencyKeyMiddleware(BaseMiddleware):
+    """Backend requests of update are keyed by its user, so user reads what they just wrote, see BalancedTransport"""
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: dict[str, Any]
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is None:
+            return await handler(event, data)
+        with consistency_key(f"user:{user.id}"):
+            return await handler(event, data)
+
+
+class CancelPrefetchMiddleware(BaseMiddleware):
+    """Any new update of user means user went elsewhere, prefetch started by previous screen is cancelled"""
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: dict[str, Any]
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is not None:
+            get_navigation_prefetcher().cancel(user.id)
+        return await handler(event, data)
+
+
+class LoadTreeSnapshotMiddleware(BaseMiddleware):
+    """
+    Start loading tree snapshot of user on first interaction, so menus of the rest of session are served from memory.
+    Update isn't held by load, its menus are served from storage
+    """
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: dict[str, Any]
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is not None:
+            get_tree_snapshots().load_in_background(
+                str(user.id), get_themes_storage_handler(), get_notes_storage_handler(), get_alarms_storage_handler()
+            )
+        return await handler(event, data)
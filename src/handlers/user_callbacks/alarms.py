@@ -4,7 +4,8 @@ from aiogram import types, Router
 from aiogram.fsm.context import FSMContext
 
 from src.models.alarm_model import AlarmStatus
-from src.services.storage.alarms_storage_handler import AlarmsStoragehandler
+from src.services.requests.RequestHandler import get_request_handler
+from src.services.storage.alarms_storage_handler import get_alarms_storage_handler
 from src.services.storage.interfaces import IAlarmsStoragehandler
 from src.services.ui.callbacks import Callbacks
 from src.services.ui.inline_keyboards import create_alarm_menu_kb
@@ -23,7 +24,7 @@ router = Router(name=__name__)
 @async_method_arguments_logger(logger)
 async def open_alarm(
         callback: types.CallbackQuery,
-        alarms_storage: IAlarmsStoragehandler = AlarmsStoragehandler(),
+        alarms_storage: IAlarmsStoragehandler = get_alarms_storage_handler(),
         state: FSMContext = None
 ) -> None:
     """"""
@@ -54,13 +55,21 @@ async def open_alarm(
 @async_method_arguments_logger(logger)
 async def finish_alarm(
         callback: types.CallbackQuery,
-        alarms_storage: IAlarmsStoragehandler = AlarmsStoragehandler()
+        alarms_storage: IAlarmsStoragehandler = get_alarms_storage_handler()
 ) -> None:
     """"""
     alarm_id = Callbacks.get_id_from_callback(callback.data)
 
+    # Update and get are sent to backend in one batch, backend executes them in this order
+    updated, alarm = await get_request_handler().batch().run(
+        alarms_storage.update_status(alarm_id, AlarmStatus.FINISH.value),
+        alarms_storage.get(alarm_id),
+        return_exceptions=True
+    )
+
     try:
-        await alarms_storage.update_status(alarm_id, AlarmStatus.FINISH.value)
+        if isinstance(updated, BaseException):
+            raise updated
     except StorageValidationError:
         await send_error_message(callback)
     except StorageNotFound as err:
@@ -68,7 +77,8 @@ async def finish_alarm(
         await send_error_message(callback)
     else:
         try:
-            alarm = await alarms_storage.get(alarm_id)
+            if isinstance(alarm, BaseException):
+                raise alarm
         except StorageValidationError:
             await send_error_message(callback)
         except StorageNotFound as err:
@@ -6,7 +6,7 @@ from aiogram.fsm.context import FSMContext
 
 from src.models.alarm_model import AlarmModel
 from src.services.storage.interfaces import IAlarmsStoragehandler
-from src.services.storage.alarms_storage_handler import AlarmsStoragehandler
+from src.services.storage.alarms_storage_handler import get_alarms_storage_handler
 from src.services.ui.callbacks import Callbacks
 from src.services.ui.inline_keyboards import create_save_kb, create_change_name_or_description_kb, create_alarm_menu_kb
 from src.services.ui.scripts import get_change_alarm_accept_script, get_alarm_menu_script
@@ -27,7 +27,7 @@ router = Router(name=__name__)
 async def change_alarm(
         callback: types.CallbackQuery,
         state: FSMContext,
-        alarm_storage: IAlarmsStoragehandler = AlarmsStoragehandler()
+        alarm_storage: IAlarmsStoragehandler = get_alarms_storage_handler()
 ) -> None:
     """"""
     alarm_id = Callbacks.get_id_from_callback(callback.data)
@@ -138,7 +138,7 @@ async def change_alarm_cancel(
 async def change_alarm_accept(
         callback: types.CallbackQuery,
         state: FSMContext,
-        alarm_storage: IAlarmsStoragehandler = AlarmsStoragehandler()
+        alarm_storage: IAlarmsStoragehandler = get_alarms_storage_handler()
 ) -> None:
     """"""
     user_data = await state.get_data()
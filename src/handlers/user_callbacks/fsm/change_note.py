@@ -4,13 +4,16 @@ from aiogram import types, Router
 
 from aiogram.fsm.context import FSMContext
 
+from src.models.alarm_model import ACTIVE_ALARM_STATUSES
 from src.models.notes_models import NoteModel
 from src.services.storage.interfaces import INotesStorageHandler, IAlarmsStoragehandler
-from src.services.storage.notes_storage_handler import NotesStorageHandler
-from src.services.storage.alarms_storage_handler import AlarmsStoragehandler
+from src.services.storage.notes_storage_handler import get_notes_storage_handler
+from src.services.storage.alarms_storage_handler import get_alarms_storage_handler
 from src.services.ui.callbacks import Callbacks
 from src.services.ui.inline_keyboards import create_save_kb, create_change_name_or_description_kb, create_note_menu_kb
+from src.services.ui.prefetch import get_navigation_prefetcher
 from src.services.ui.scripts import get_change_note_accept_script
+from src.services.ui.view_loader import ViewLoader
 from src.utils.exceptions.decorators import handel_storage_unexpected_response
 from src.utils.exceptions.storage import StorageValidationError, StorageNotFound
 from src.utils.fsm.fsm import ChangeNote
@@ -28,7 +31,7 @@ router = Router(name=__name__)
 async def change_theme(
         callback: types.CallbackQuery,
         state: FSMContext,
-        note_storage: INotesStorageHandler = NotesStorageHandler()
+        note_storage: INotesStorageHandler = get_notes_storage_handler()
 ) -> None:
     """"""
     note_id = Callbacks.get_id_from_callback(callback.data)
@@ -112,7 +115,7 @@ async def change_theme_accept(
 async def change_theme_cancel(
         callback: types.CallbackQuery,
         state: FSMContext,
-        alarms_storage: IAlarmsStoragehandler = AlarmsStoragehandler()
+        alarms_storage: IAlarmsStoragehandler = get_alarms_storage_handler()
 ) -> None:
     """"""
     note_alarms = None
@@ -128,7 +131,7 @@ async def change_theme_cancel(
         text = f"{note.name}\n\n{note.data.text}"
 
     try:
-        note_alarms = await alarms_storage.get_all_by_parent(note.id)
+        note_alarms = await alarms_storage.get_summaries_by_parent(note.id, ACTIVE_ALARM_STATUSES)
     except StorageValidationError:
         await send_error_message(callback, state)
         await callback.message.delete()
@@ -145,6 +148,7 @@ async def change_theme_cancel(
     )
     await state.clear()
     await callback.message.delete()
+    get_navigation_prefetcher().prefetch_alarm_menus(callback.from_user.id, note_alarms)
 
 
 @router.callback_query(
@@ -155,13 +159,12 @@ async def change_theme_cancel(
 async def change_theme_accept(
         callback: types.CallbackQuery,
         state: FSMContext,
-        note_storage: INotesStorageHandler = NotesStorageHandler(),
-        alarm_storage: IAlarmsStoragehandler = AlarmsStoragehandler()
+        note_storage: INotesStorageHandler = get_notes_storage_handler(),
+        alarm_storage: IAlarmsStoragehandler = get_alarms_storage_handler()
 ) -> None:
     """"""
     user_data = await state.get_data()
     new_data = dict()
-    note_alarms = None
 
     # Try to get note from state
     try:
@@ -189,9 +192,14 @@ async def change_theme_accept(
         await send_error_message(callback, state)
         return
 
-    # Try to get updated theme and make start of script
+    # Try to get updated note and all its alarms
     try:
-        note = await note_storage.get(note.id)
+        view = await (
+            ViewLoader()
+            .require("note", note_storage.get(note.id))
+            .optional("note_alarms", alarm_storage.get_summaries_by_parent(note.id, ACTIVE_ALARM_STATUSES))
+            .load()
+        )
     except StorageNotFound as err:
         logger.error(f"not found note, but should. deteils: {err}")
         await send_error_message(callback, state, "Изменения сохранены, но дальше что-то пошло не так :(")
@@ -199,19 +207,13 @@ async def change_theme_accept(
     except StorageValidationError:
         await send_error_message(callback, state, "Изменения сохранены, но дальше что-то пошло не так :(")
         return
-    else:
-        text = f"{note.name}\n\n{note.data.text}"
 
-    # Try to get all theme notes and make end of script
-    try:
-        note_alarms = await alarm_storage.get_all_by_parent(note.id)
-    except StorageValidationError:
-        await send_error_message(callback, state, "Изменения сохранены, но дальше что-то пошло не так :(")
-        return
-    except StorageNotFound:
-        text += "\n\nНапоминаний под заметкой пока нет"
-    else:
+    note, note_alarms = view["note"], view["note_alarms"]
+    text = f"{note.name}\n\n{note.data.text}"
+    if view.is_found("note_alarms"):
         text += "\n\nСписок ваших напоминаний под заметкой:"
+    else:
+        text += "\n\nНапоминаний под заметкой пока нет"
 
     # Make theme menu and show it
     kb = create_note_menu_kb(note_id=note.id, note_alarms=note_alarms, parent_theme_id=note.links.theme_id)
@@ -221,3 +223,4 @@ async def change_theme_accept(
     )
     await state.clear()
     await callback.message.delete()
+    get_navigation_prefetcher().prefetch_alarm_menus(callback.from_user.id, note_alarms)
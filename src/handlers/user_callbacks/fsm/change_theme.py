@@ -7,11 +7,13 @@ from aiogram.fsm.context import FSMContext
 
 from src.models.themes_modles import ThemeModel
 from src.services.storage.interfaces import IThemesStorageHandler, INotesStorageHandler
-from src.services.storage.notes_storage_handler import NotesStorageHandler
-from src.services.storage.themes_storage_handler import ThemesStorageHandler
+from src.services.storage.notes_storage_handler import get_notes_storage_handler
+from src.services.storage.themes_storage_handler import get_themes_storage_handler
 from src.services.ui.callbacks import Callbacks
 from src.services.ui.inline_keyboards import create_save_kb, create_change_name_or_description_kb, create_theme_menu_kb
+from src.services.ui.prefetch import get_navigation_prefetcher
 from src.services.ui.scripts import get_change_theme_accept_script
+from src.services.ui.view_loader import ViewLoader
 from src.utils.exceptions.decorators import handel_storage_unexpected_response
 from src.utils.exceptions.storage import StorageValidationError, StorageNotFound
 from src.utils.fsm.fsm import ChangeTheme
@@ -28,7 +30,7 @@ router = Router(name=__name__)
 async def change_theme(
         callback: types.CallbackQuery,
         state: FSMContext,
-        theme_storage: IThemesStorageHandler = ThemesStorageHandler()
+        theme_storage: IThemesStorageHandler = get_themes_storage_handler()
 ) -> None:
     """"""
     theme_id = Callbacks.get_id_from_callback(callback.data)
@@ -112,7 +114,7 @@ async def change_theme_accept(
 async def change_theme_cancel(
         callback: types.CallbackQuery,
         state: FSMContext,
-        note_storage: INotesStorageHandler = NotesStorageHandler()
+        note_storage: INotesStorageHandler = get_notes_storage_handler()
 ) -> None:
     """"""
     theme_notes = None
@@ -128,7 +130,7 @@ async def change_theme_cancel(
         text = f"{theme.name}\n\n{theme.description}"
 
     try:
-        theme_notes = await note_storage.get_all_by_theme(theme.id)
+        theme_notes = await note_storage.get_summaries_by_theme(theme.id)
     except StorageValidationError:
         await send_error_message(callback, state)
         await callback.message.delete()
@@ -145,6 +147,7 @@ async def change_theme_cancel(
     )
     await state.clear()
     await callback.message.delete()
+    get_navigation_prefetcher().prefetch_note_menus(callback.from_user.id, theme_notes)
 
 
 @router.callback_query(lambda x: x.data == Callbacks.SAVE, ChangeTheme.change_theme)
@@ -153,13 +156,12 @@ async def change_theme_cancel(
 async def change_theme_accept(
         callback: types.CallbackQuery,
         state: FSMContext,
-        theme_storage: IThemesStorageHandler = ThemesStorageHandler(),
-        note_storage: INotesStorageHandler = NotesStorageHandler()
+        theme_storage: IThemesStorageHandler = get_themes_storage_handler(),
+        note_storage: INotesStorageHandler = get_notes_storage_handler()
 ) -> None:
     """"""
     user_data = await state.get_data()
     new_data = dict()
-    theme_notes = None
 
     # Try to get theme from state
     try:
@@ -187,9 +189,14 @@ async def change_theme_accept(
         await send_error_message(callback, state)
         return
 
-    # Try to get updated theme and make start of script
+    # Try to get updated theme and all its notes
     try:
-        theme = await theme_storage.get(theme.id)
+        view = await (
+            ViewLoader()
+            .require("theme", theme_storage.get(theme.id))
+            .optional("theme_notes", note_storage.get_summaries_by_theme(theme.id))
+            .load()
+        )
     except StorageNotFound as err:
         logger.error(f"not found theme, but should. deteils: {err}")
         await send_error_message(callback, state, "Изменения сохранены, но дальше что-то пошло не так :(")
@@ -197,19 +204,13 @@ async def change_theme_accept(
     except StorageValidationError:
         await send_error_message(callback, state, "Изменения сохранены, но дальше что-то пошло не так :(")
         return
-    else:
-        text = f"{theme.name}\n\n{theme.description}"
 
-    # Try to get all theme notes and make end of script
-    try:
-        theme_notes = await note_storage.get_all_by_theme(theme.id)
-    except StorageValidationError:
-        await send_error_message(callback, state, "Изменения сохранены, но дальше что-то пошло не так :(")
-        return
-    except StorageNotFound:
-        text += "\n\nЗаметок под темой пока нет"
-    else:
+    theme, theme_notes = view["theme"], view["theme_notes"]
+    text = f"{theme.name}\n\n{theme.description}"
+    if view.is_found("theme_notes"):
         text += "\n\nСписок ваших заметок под темой:"
+    else:
+        text += "\n\nЗаметок под темой пока нет"
 
     # Make theme menu and show it
     kb = create_theme_menu_kb(theme.id, theme_notes)
@@ -219,3 +220,4 @@ async def change_theme_accept(
     )
     await state.clear()
     await callback.message.delete()
+    get_navigation_prefetcher().prefetch_note_menus(callback.from_user.id, theme_notes)
@@ -10,13 +10,14 @@ from aiogram_calendar import SimpleCalendar, SimpleCalendarCallback
 from pydantic import ValidationError
 
 from src.models.alarm_model import AlarmModelToCreate
-from src.services.storage.alarms_storage_handler import AlarmsStoragehandler
+from src.services.storage.alarms_storage_handler import get_alarms_storage_handler
 from src.services.storage.interfaces import IAlarmsStoragehandler
 from src.services.ui.callbacks import Callbacks
 from src.services.ui.inline_keyboards import create_cancel_fsm_kb, create_yes_no_keyboard, \
     create_change_fsm_user_data_kb, create_save_kb, create_main_menu_kb
 from src.utils.fsm.fsm import CreateAlarm
-from src.utils.handlers_utils import del_prev_message_and_write_current_message_as_prev
+from src.utils.handlers_utils import del_prev_message_and_write_current_message_as_prev, start_idempotent_flow, \
+    get_idempotency_key
 
 logger = getLogger(f"fsm_{__name__}")
 router = Router(name=__name__)
@@ -27,6 +28,7 @@ async def create_alarm(callback: types.CallbackQuery, state: FSMContext) -> None
     """"""
     parent_id = Callbacks.get_id_from_callback(callback.data)
     await state.update_data(parent_id=parent_id)
+    await start_idempotent_flow(state)
     out_message = await callback.bot.send_message(
         text="Введите название напоминания",
         chat_id=callback.from_user.id,
@@ -232,7 +234,7 @@ async def create_alarm_accept(
 async def create_alarm_save(
         callback: types.CallbackQuery,
         state: FSMContext,
-        sh: IAlarmsStoragehandler = AlarmsStoragehandler()
+        sh: IAlarmsStoragehandler = get_alarms_storage_handler()
 ) -> None:
     """"""
     user_data = await state.get_data()
@@ -251,7 +253,8 @@ async def create_alarm_save(
         await sh.create(
             alarm=AlarmModelToCreate.model_validate(alarm),
             repeat_interval=repeat_interval,
-            next_notion_time=next_notion_time
+            next_notion_time=next_notion_time,
+            idempotency_key=await get_idempotency_key(callback.from_user.id, state)
         )
     except KeyError as err:
         logger.error(f"Can't find user fsm data | details: {err} | user_data: {user_data}")
@@ -7,14 +7,14 @@ from pydantic import ValidationError
 
 from src.models.notes_models import NoteModelToCreate, NoteLinksModel, NoteDataModel, CheckpointModel
 from src.services.storage.interfaces import INotesStorageHandler
-from src.services.storage.notes_storage_handler import NotesStorageHandler
+from src.services.storage.notes_storage_handler import get_notes_storage_handler
 from src.services.ui.callbacks import Callbacks
 from src.services.ui.inline_keyboards import create_cancel_fsm_kb, create_save_kb, create_change_fsm_user_data_kb, \
     create_set_attachments_or_checkpoints_kb, create_cancel_kb, create_done_kb, create_open_note_kb, \
     create_open_theme_kb
 from src.utils.exceptions.decorators import handel_storage_unexpected_response
 from src.utils.fsm.fsm import CreateNote
-from src.utils.handlers_utils import send_error_message
+from src.utils.handlers_utils import send_error_message, start_idempotent_flow, get_idempotency_key
 
 logger = getLogger(f"fsm_{__name__}")
 router = Router()
@@ -33,6 +33,7 @@ async def create_note(callback: types.CallbackQuery, state: FSMContext) -> None:
         reply_markup=kb.as_markup()
     )
     await state.update_data(last_message_id=message.message_id)
+    await start_idempotent_flow(state)
 
     await callback.message.delete()
     await state.set_state(CreateNote.write_name)
@@ -225,7 +226,7 @@ async def create_note_process_checkpoint(message: types.Message, state: FSMConte
 async def create_note_save(
         callback: types.CallbackQuery,
         state: FSMContext,
-        sh: INotesStorageHandler = NotesStorageHandler()
+        sh: INotesStorageHandler = get_notes_storage_handler()
 ) -> None:
     """"""
     user_data = await state.get_data()
@@ -253,7 +254,7 @@ async def create_note_save(
                 check_points=checkpoints
             )
         )
-        note_id = await sh.create(note)
+        note_id = await sh.create(note, idempotency_key=await get_idempotency_key(callback.from_user.id, state))
     except KeyError as err:
         logger.error(f"Can't find user fsm data. details: {err}. user_data: {user_data}")
         await send_error_message(callback)
@@ -8,14 +8,14 @@ from pydantic import ValidationError
 
 from src.models.themes_modles import ThemeModelToCreate, ThemeLinksModel
 from src.services.storage.interfaces import IThemesStorageHandler
-from src.services.storage.themes_storage_handler import ThemesStorageHandler
+from src.services.storage.themes_storage_handler import get_themes_storage_handler
 from src.services.ui.callbacks import Callbacks
 from src.services.ui.inline_keyboards import create_cancel_fsm_kb, create_change_fsm_user_data_kb, create_save_kb, \
     create_themes_list_kb, create_open_theme_kb
 from src.utils.exceptions.decorators import handel_storage_unexpected_response
 from src.utils.exceptions.storage import StorageValidationError
 from src.utils.fsm.fsm import CreateThemeFSM
-from src.utils.handlers_utils import send_error_message
+from src.utils.handlers_utils import send_error_message, start_idempotent_flow, get_idempotency_key
 
 logger = getLogger(f"fsm_{__name__}")
 router = Router(name=__name__)
@@ -34,6 +34,7 @@ async def create_theme(
         reply_markup=create_cancel_fsm_kb().as_markup()
     )
     await state.update_data(last_message_id=message.message_id)
+    await start_idempotent_flow(state)
 
     await callback.message.delete()
     await state.set_state(CreateThemeFSM.write_name)
@@ -100,7 +101,7 @@ async def create_theme_write_description(message: Message, state: FSMContext) ->
 async def create_theme_save(
         callback: types.CallbackQuery,
         state: FSMContext,
-        sh: IThemesStorageHandler = ThemesStorageHandler()
+        sh: IThemesStorageHandler = get_themes_storage_handler()
 ) -> None:
     """"""
     user_data = await state.get_data()
@@ -122,7 +123,9 @@ async def create_theme_save(
         await send_error_message(callback, state)
     else:
         try:
-            theme_id = await sh.create(theme)
+            theme_id = await sh.create(
+                theme, idempotency_key=await get_idempotency_key(callback.from_user.id, state)
+            )
         except StorageValidationError:
             await send_error_message(callback, state)
         else:
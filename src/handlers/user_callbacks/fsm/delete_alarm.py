@@ -3,16 +3,18 @@ from logging import getLogger
 from aiogram import Router, types
 from aiogram.fsm.context import FSMContext
 
-from src.models.alarm_model import AlarmModel
+from src.models.alarm_model import AlarmModel, ACTIVE_ALARM_STATUSES
 from src.models.notes_models import NoteModel
-from src.services.storage.alarms_storage_handler import AlarmsStoragehandler
+from src.services.storage.alarms_storage_handler import get_alarms_storage_handler
 from src.services.storage.interfaces import INotesStorageHandler, IThemesStorageHandler, IAlarmsStoragehandler
-from src.services.storage.notes_storage_handler import NotesStorageHandler
+from src.services.storage.notes_storage_handler import get_notes_storage_handler
 from src.services.storage.themes_storage_handler import ThemesStorageHandler
 from src.services.ui.callbacks import Callbacks
 from src.services.ui.inline_keyboards import create_yes_no_keyboard, create_theme_menu_kb, create_note_menu_kb, \
     create_cancel_fsm_kb, create_alarm_menu_kb
+from src.services.ui.prefetch import get_navigation_prefetcher
 from src.services.ui.scripts import get_alarm_menu_script
+from src.services.ui.view_loader import ViewLoader
 from src.utils.exceptions.decorators import handel_storage_unexpected_response
 from src.utils.exceptions.storage import StorageValidationError, StorageNotFound
 from src.utils.fsm.fsm import DeleteNote, DeleteAlarm
@@ -29,7 +31,7 @@ router = Router(name=__name__)
 async def delete_alarm(
         callback: types.CallbackQuery,
         state: FSMContext,
-        alarm_storage: IAlarmsStoragehandler = AlarmsStoragehandler()
+        alarm_storage: IAlarmsStoragehandler = get_alarms_storage_handler()
 ) -> None:
     """"""
     try:
@@ -56,17 +58,23 @@ async def delete_alarm(
 async def delete_alarm_accept(
         callback: types.CallbackQuery,
         state: FSMContext,
-        alarm_storage: IAlarmsStoragehandler = AlarmsStoragehandler(),
-        note_storage: INotesStorageHandler = NotesStorageHandler()
+        alarm_storage: IAlarmsStoragehandler = get_alarms_storage_handler(),
+        note_storage: INotesStorageHandler = get_notes_storage_handler()
 ) -> None:
     """"""
     user_data = await state.get_data()
     alarm: AlarmModel = user_data["alarm"]
-    note_alarms = None
 
     try:
         await alarm_storage.delete(alarm.id)
-        note = await note_storage.get(alarm.links.parent_id)
+        view = await (
+            ViewLoader()
+            .require("note", note_storage.get(alarm.links.parent_id))
+            .optional(
+                "note_alarms", alarm_storage.get_summaries_by_parent(alarm.links.parent_id, ACTIVE_ALARM_STATUSES)
+            )
+            .load()
+        )
     except StorageValidationError:
         await send_error_message(callback, state)
         await callback.message.delete()
@@ -76,19 +84,13 @@ async def delete_alarm_accept(
         await send_error_message(callback, state)
         await callback.message.delete()
         return
-    else:
-        text = f"Напоминание '{alarm.name}' успешно удалено\n\n{note.name}\n\n{note.data.text}"
 
-    try:
-        note_alarms = await alarm_storage.get_all_by_parent(note.id)
-    except StorageNotFound:
-        text += "\n\nНапоминаний под темой пока нет, создайте их"
-    except StorageValidationError:
-        await send_error_message(callback, state, f"Напоминание '{alarm.name}' успешно удалено\n"
-                                                  f"Но дальше что-то пошло не так")
-        await callback.message.delete()
-    else:
+    note, note_alarms = view["note"], view["note_alarms"]
+    text = f"Напоминание '{alarm.name}' успешно удалено\n\n{note.name}\n\n{note.data.text}"
+    if view.is_found("note_alarms"):
         text += f"\n\nСписок ваших напомниний:"
+    else:
+        text += "\n\nНапоминаний под темой пока нет, создайте их"
 
     kb = create_note_menu_kb(
         note_id=note.id, note_alarms=note_alarms, parent_theme_id=note.links.theme_id
@@ -100,6 +102,7 @@ async def delete_alarm_accept(
     )
     await callback.message.delete()
     await state.clear()
+    get_navigation_prefetcher().prefetch_alarm_menus(callback.from_user.id, note_alarms)
 
 
 @async_method_arguments_logger(logger)
@@ -3,14 +3,17 @@ from logging import getLogger
 from aiogram import Router, types
 from aiogram.fsm.context import FSMContext
 
+from src.models.alarm_model import ACTIVE_ALARM_STATUSES
 from src.models.notes_models import NoteModel
-from src.services.storage.alarms_storage_handler import AlarmsStoragehandler
+from src.services.storage.alarms_storage_handler import get_alarms_storage_handler
 from src.services.storage.interfaces import INotesStorageHandler, IThemesStorageHandler, IAlarmsStoragehandler
-from src.services.storage.notes_storage_handler import NotesStorageHandler
-from src.services.storage.themes_storage_handler import ThemesStorageHandler
+from src.services.storage.notes_storage_handler import get_notes_storage_handler
+from src.services.storage.themes_storage_handler import get_themes_storage_handler
 from src.services.ui.callbacks import Callbacks
 from src.services.ui.inline_keyboards import create_yes_no_keyboard, create_theme_menu_kb, create_note_menu_kb, \
     create_cancel_fsm_kb
+from src.services.ui.prefetch import get_navigation_prefetcher
+from src.services.ui.view_loader import ViewLoader
 from src.utils.exceptions.decorators import handel_storage_unexpected_response
 from src.utils.exceptions.storage import StorageValidationError, StorageNotFound
 from src.utils.fsm.fsm import DeleteNote
@@ -26,7 +29,7 @@ router = Router(name=__name__)
 async def delete_note(
         callback: types.CallbackQuery,
         state: FSMContext,
-        storage: INotesStorageHandler = NotesStorageHandler()
+        storage: INotesStorageHandler = get_notes_storage_handler()
 ) -> None:
     """
 
@@ -64,8 +67,8 @@ async def delete_note(
 async def delete_note_yes(
         callback: types.CallbackQuery,
         state: FSMContext,
-        notes_storage: INotesStorageHandler = NotesStorageHandler(),
-        themes_storage: IThemesStorageHandler = ThemesStorageHandler()
+        notes_storage: INotesStorageHandler = get_notes_storage_handler(),
+        themes_storage: IThemesStorageHandler = get_themes_storage_handler()
 ) -> None:
     """
     Delete note and all sub alarms
@@ -86,20 +89,24 @@ async def delete_note_yes(
         await send_error_message(callback, state)
 
     try:
-        all_themes_notes = await notes_storage.get_all_by_theme(note.links.theme_id)
-        text += f"Ваши заметки:"
-    except StorageNotFound:
-        text += f"Тут будет список ваших заметок, но пока их нет.\nCоздайте новую заметку"
-        all_themes_notes = None
-
-    try:
-        parent_theme = await themes_storage.get(note.links.theme_id)
-        text = f"{parent_theme.name}\n\n" + text
+        view = await (
+            ViewLoader()
+            .optional("all_themes_notes", notes_storage.get_summaries_by_theme(note.links.theme_id))
+            .require("parent_theme", themes_storage.get(note.links.theme_id))
+            .load()
+        )
     except StorageNotFound or StorageValidationError:
         text = "Но дальше что-то пошло не так :(" + text
         await send_error_message(message=callback, state=state, text=text)
         return
 
+    all_themes_notes, parent_theme = view["all_themes_notes"], view["parent_theme"]
+    if view.is_found("all_themes_notes"):
+        text += f"Ваши заметки:"
+    else:
+        text += f"Тут будет список ваших заметок, но пока их нет.\nCоздайте новую заметку"
+    text = f"{parent_theme.name}\n\n" + text
+
     kb = create_theme_menu_kb(parent_theme.id, all_themes_notes)
     await callback.bot.send_message(
         chat_id=callback.from_user.id,
@@ -108,6 +115,7 @@ async def delete_note_yes(
     )
     await callback.message.delete()
     await state.clear()
+    get_navigation_prefetcher().prefetch_note_menus(callback.from_user.id, all_themes_notes)
 
 
 @handel_storage_unexpected_response
@@ -116,7 +124,7 @@ async def delete_note_yes(
 async def delete_note_no(
         callback: types.CallbackQuery,
         state: FSMContext,
-        alarms_storage: IAlarmsStoragehandler = AlarmsStoragehandler()
+        alarms_storage: IAlarmsStoragehandler = get_alarms_storage_handler()
 ) -> None:
     """
 
@@ -131,7 +139,7 @@ async def delete_note_no(
     text = f"{note.name}\n{note.data.text}\n\n"
 
     try:
-        note_alarms = await alarms_storage.get_all_by_parent(note.id)
+        note_alarms = await alarms_storage.get_summaries_by_parent(note.id, ACTIVE_ALARM_STATUSES)
         text += f"Напоминания:"
     except StorageNotFound:
         text += f"Еще тут будет список ваших напоминаний, но пока их нет.\nCоздайте новое напоминание"
@@ -145,3 +153,4 @@ async def delete_note_no(
         )
         await callback.message.delete()
         await state.clear()
+        get_navigation_prefetcher().prefetch_alarm_menus(callback.from_user.id, note_alarms)
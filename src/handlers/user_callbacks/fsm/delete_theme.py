@@ -5,10 +5,11 @@ from aiogram.fsm.context import FSMContext
 
 from src.models.themes_modles import ThemeModel
 from src.services.storage.interfaces import IThemesStorageHandler, INotesStorageHandler
-from src.services.storage.notes_storage_handler import NotesStorageHandler
-from src.services.storage.themes_storage_handler import ThemesStorageHandler
+from src.services.storage.notes_storage_handler import get_notes_storage_handler
+from src.services.storage.themes_storage_handler import get_themes_storage_handler
 from src.services.ui.callbacks import Callbacks
 from src.services.ui.inline_keyboards import create_yes_no_keyboard, create_theme_menu_kb, create_theme_list_kb
+from src.services.ui.prefetch import get_navigation_prefetcher
 from src.utils.exceptions.decorators import handel_storage_unexpected_response
 from src.utils.exceptions.storage import StorageNotFound, StorageValidationError
 from src.utils.fsm.fsm import DeleteTheme
@@ -23,7 +24,7 @@ router = Router(name=__name__)
 async def delete_theme(
         callback: types.CallbackQuery,
         state: FSMContext,
-        sh: IThemesStorageHandler = ThemesStorageHandler()
+        sh: IThemesStorageHandler = get_themes_storage_handler()
 ) -> None:
     """"""
     theme_id = Callbacks.get_id_from_callback(callback.data)
@@ -54,7 +55,7 @@ async def delete_theme(
 async def delete_theme_yes(
         callback: types.CallbackQuery,
         state: FSMContext,
-        theme_sh: IThemesStorageHandler = ThemesStorageHandler(),
+        theme_sh: IThemesStorageHandler = get_themes_storage_handler(),
 ) -> None:
     user_data = await state.get_data()
     theme: ThemeModel = user_data["theme"]
@@ -67,7 +68,7 @@ async def delete_theme_yes(
         await send_error_message(callback, state)
 
     try:
-        themes = await theme_sh.get_all_by_user(str(callback.from_user.id))
+        themes = await theme_sh.get_summaries_by_user(str(callback.from_user.id))
         text += "\n\nВаши темы:"
     except StorageNotFound:
         themes = None
@@ -83,13 +84,14 @@ async def delete_theme_yes(
     await del_prev_message_and_write_current_message_as_prev(
         message=callback, state=state, current_message_id=message_out.message_id
     )
+    get_navigation_prefetcher().prefetch_theme_menus(callback.from_user.id, themes)
 
 
 @router.callback_query(lambda x: x.data == Callbacks.NO, DeleteTheme.accept)
 async def delete_theme_no(
         callback: types.CallbackQuery,
         state: FSMContext,
-        note_sh: INotesStorageHandler = NotesStorageHandler()
+        note_sh: INotesStorageHandler = get_notes_storage_handler()
 ) -> None:
     """"""
     theme_notes = None
@@ -98,7 +100,7 @@ async def delete_theme_no(
     text = "Список ваших заметок под темой:"
 
     try:
-        theme_notes = await note_sh.get_all_by_theme(theme.id)
+        theme_notes = await note_sh.get_summaries_by_theme(theme.id)
     except StorageNotFound:
         text = "Заметок под темой пока нет"
     finally:
@@ -111,4 +113,5 @@ async def delete_theme_no(
         )
         await callback.message.delete()
         await state.clear()
+        get_navigation_prefetcher().prefetch_note_menus(callback.from_user.id, theme_notes)
 
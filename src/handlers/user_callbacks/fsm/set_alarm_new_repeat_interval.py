@@ -4,7 +4,7 @@ from typing import Final
 from aiogram import Router, types
 from aiogram.fsm.context import FSMContext
 
-from src.services.storage.alarms_storage_handler import AlarmsStoragehandler
+from src.services.storage.alarms_storage_handler import get_alarms_storage_handler
 from src.services.storage.interfaces import IAlarmsStoragehandler
 from src.services.ui.callbacks import Callbacks
 from src.services.ui.inline_keyboards import create_yes_no_keyboard, create_alarm_menu_kb
@@ -107,7 +107,7 @@ async def write_new_repeat_interval(
 async def save_new_repeat_interval(
         callback: types.CallbackQuery,
         state: FSMContext,
-        alarm_storage: IAlarmsStoragehandler = AlarmsStoragehandler()
+        alarm_storage: IAlarmsStoragehandler = get_alarms_storage_handler()
 ) -> None:
     """"""
     user_data = await state.get_data()
@@ -139,7 +139,7 @@ async def save_new_repeat_interval(
 async def cancel_set_new_repeat_interval(
         callback: types.CallbackQuery,
         state: FSMContext,
-        alarm_storage: IAlarmsStoragehandler = AlarmsStoragehandler()
+        alarm_storage: IAlarmsStoragehandler = get_alarms_storage_handler()
 ) -> None:
     """"""
     user_data = await state.get_data()
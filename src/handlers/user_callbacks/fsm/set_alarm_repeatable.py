@@ -3,7 +3,7 @@ from logging import getLogger
 from aiogram import Router, types
 from aiogram.fsm.context import FSMContext
 
-from src.services.storage.alarms_storage_handler import AlarmsStoragehandler
+from src.services.storage.alarms_storage_handler import get_alarms_storage_handler
 from src.services.storage.interfaces import IAlarmsStoragehandler
 from src.services.ui.callbacks import Callbacks
 from src.services.ui.inline_keyboards import create_alarm_menu_kb
@@ -25,7 +25,7 @@ router = Router(name=__name__)
 async def set_alarm_repeatable(
         callback: types.CallbackQuery,
         state: FSMContext,
-        alarms_storage: IAlarmsStoragehandler = AlarmsStoragehandler()
+        alarms_storage: IAlarmsStoragehandler = get_alarms_storage_handler()
 ) -> None:
     """"""
     try:
@@ -7,7 +7,7 @@ from aiogram.fsm.context import FSMContext
 from aiogram_calendar import SimpleCalendar, SimpleCalendarCallback
 
 from src.models.alarm_model import AlarmStatus
-from src.services.storage.alarms_storage_handler import AlarmsStoragehandler
+from src.services.storage.alarms_storage_handler import get_alarms_storage_handler
 from src.services.storage.interfaces import IAlarmsStoragehandler
 from src.services.ui.callbacks import Callbacks
 from src.services.ui.inline_keyboards import create_yes_no_keyboard, create_alarm_menu_kb
@@ -111,7 +111,7 @@ async def set_new_alarm_time_write_time(
 async def save_new_alarm_time(
         callback: types.CallbackQuery,
         state: FSMContext,
-        alarm_storage: IAlarmsStoragehandler = AlarmsStoragehandler()
+        alarm_storage: IAlarmsStoragehandler = get_alarms_storage_handler()
 ) -> None:
     """"""
     user_data = await state.get_data()
@@ -153,7 +153,7 @@ async def save_new_alarm_time(
 async def set_new_alarm_time_cancel(
         callback: types.CallbackQuery,
         state: FSMContext,
-        alarm_storage: IAlarmsStoragehandler = AlarmsStoragehandler()
+        alarm_storage: IAlarmsStoragehandler = get_alarms_storage_handler()
 ) -> None:
     """"""
     user_data = await state.get_data()
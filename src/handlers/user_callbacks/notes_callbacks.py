@@ -3,11 +3,14 @@ from logging import getLogger
 from aiogram import types, Router
 from pydantic import ValidationError
 
-from src.services.storage.alarms_storage_handler import AlarmsStoragehandler
+from src.models.alarm_model import ACTIVE_ALARM_STATUSES
+from src.services.storage.alarms_storage_handler import get_alarms_storage_handler
 from src.services.storage.interfaces import IAlarmsStoragehandler, INotesStorageHandler
-from src.services.storage.notes_storage_handler import NotesStorageHandler
+from src.services.storage.notes_storage_handler import get_notes_storage_handler
 from src.services.ui.callbacks import Callbacks
 from src.services.ui.inline_keyboards import create_note_menu_kb, create_cancel_fsm_kb
+from src.services.ui.prefetch import get_navigation_prefetcher
+from src.services.ui.view_loader import ViewLoader
 from src.utils.exceptions.decorators import handel_storage_unexpected_response
 from src.utils.exceptions.storage import StorageNotFound
 from src.utils.handlers_utils import send_error_message
@@ -20,8 +23,8 @@ router = Router(name=__name__)
 @router.callback_query(lambda x: x.data.startswith(Callbacks.OPEN_NOTE_START_WITH))
 @handel_storage_unexpected_response
 async def open_note_menu(callback: types.CallbackQuery,
-                         notes_sh: INotesStorageHandler = NotesStorageHandler(),
-                         alarms_sh: IAlarmsStoragehandler = AlarmsStoragehandler()
+                         notes_sh: INotesStorageHandler = get_notes_storage_handler(),
+                         alarms_sh: IAlarmsStoragehandler = get_alarms_storage_handler()
                          ) -> None:
     """
     :param callback:
@@ -29,11 +32,15 @@ async def open_note_menu(callback: types.CallbackQuery,
     :param alarms_sh: Dependency
     """
 
-    note_alarms = None
     note_id = Callbacks.get_id_from_callback(callback.data)
 
     try:
-        note = await notes_sh.get(note_id)
+        view = await (
+            ViewLoader()
+            .require("note", notes_sh.get(note_id))
+            .optional("note_alarms", alarms_sh.get_summaries_by_parent(note_id, ACTIVE_ALARM_STATUSES))
+            .load()
+        )
     except StorageNotFound:
         logger.error(f"Should found note, but it note found. note_id: {note_id}")
         await send_error_message(callback)
@@ -43,20 +50,20 @@ async def open_note_menu(callback: types.CallbackQuery,
         await send_error_message(callback)
         await callback.message.delete()
         return
-    else:
-        text = f"{note.name}\n\n{note.data.text}"
 
-    try:
-        note_alarms = await alarms_sh.get_all_by_parent(note_id)
+    note, note_alarms = view["note"], view["note_alarms"]
+    text = f"{note.name}\n\n{note.data.text}"
+    if view.is_found("note_alarms"):
         text += f"\n\nСписок ваших напомниний:"
-    except StorageNotFound:
+    else:
         text += "\n\nНапоминаний под темой пока нет, создайте их"
-    finally:
-        kb = create_note_menu_kb(note_id=note_id, note_alarms=note_alarms, parent_theme_id=note.links.theme_id)
-        kb.attach(create_cancel_fsm_kb())
-        await callback.bot.send_message(
-            text=text,
-            reply_markup=kb.as_markup(),
-            chat_id=callback.from_user.id
-        )
-        await callback.message.delete()
+
+    kb = create_note_menu_kb(note_id=note_id, note_alarms=note_alarms, parent_theme_id=note.links.theme_id)
+    kb.attach(create_cancel_fsm_kb())
+    await callback.bot.send_message(
+        text=text,
+        reply_markup=kb.as_markup(),
+        chat_id=callback.from_user.id
+    )
+    await callback.message.delete()
+    get_navigation_prefetcher().prefetch_alarm_menus(callback.from_user.id, note_alarms)
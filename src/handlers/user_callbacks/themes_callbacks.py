@@ -4,10 +4,12 @@ from aiogram import Router, types
 from aiogram.fsm.context import FSMContext
 
 from src.services.storage.interfaces import IThemesStorageHandler, INotesStorageHandler
-from src.services.storage.notes_storage_handler import NotesStorageHandler
-from src.services.storage.themes_storage_handler import ThemesStorageHandler
+from src.services.storage.notes_storage_handler import get_notes_storage_handler
+from src.services.storage.themes_storage_handler import get_themes_storage_handler
 from src.services.ui.callbacks import Callbacks
 from src.services.ui.inline_keyboards import create_theme_list_kb, create_theme_menu_kb
+from src.services.ui.prefetch import get_navigation_prefetcher
+from src.services.ui.view_loader import ViewLoader
 from src.utils.exceptions.decorators import handel_storage_unexpected_response
 from src.utils.exceptions.storage import StorageNotFound
 from src.utils.handlers_utils import async_method_arguments_logger
@@ -23,7 +25,7 @@ router = Router(name=__name__)
 async def open_all_themes(
         callback: types.CallbackQuery,
         state: FSMContext | None,
-        sh: IThemesStorageHandler = ThemesStorageHandler()) -> None:
+        sh: IThemesStorageHandler = get_themes_storage_handler()) -> None:
     """
     Open inline menu with all users themes as a button
     :param state: Current fsm state, clear this state if not none
@@ -36,7 +38,7 @@ async def open_all_themes(
         await state.clear()
 
     try:
-        user_themes = await sh.get_all_by_user(str(callback.from_user.id))
+        user_themes = await sh.get_summaries_by_user(str(callback.from_user.id))
     except StorageNotFound:
         ...
     kb = create_theme_list_kb(user_themes)
@@ -46,6 +48,7 @@ async def open_all_themes(
         chat_id=callback.from_user.id
     )
     await callback.message.delete()
+    get_navigation_prefetcher().prefetch_theme_menus(callback.from_user.id, user_themes)
 
 
 @router.callback_query(lambda x: x.data.startswith(Callbacks.OPEN_THEME_START_WITH))
@@ -54,8 +57,8 @@ async def open_all_themes(
 async def open_theme_menu(
         callback: types.CallbackQuery,
         state: FSMContext | None,
-        theme_sh: IThemesStorageHandler = ThemesStorageHandler(),
-        note_sh: INotesStorageHandler = NotesStorageHandler(),
+        theme_sh: IThemesStorageHandler = get_themes_storage_handler(),
+        note_sh: INotesStorageHandler = get_notes_storage_handler(),
 ) -> None:
     """
     Open all theme notes as inline keyboard. Create keys to create or delete note + return to theme list
@@ -70,17 +73,19 @@ async def open_theme_menu(
     if state is not None:
         await state.clear()
 
+    theme_notes = None
     try:
-        theme_notes = await note_sh.get_all_by_theme(theme_id)
-    except StorageNotFound:
-        text = "Заметок под темой пока нет"
-        theme_notes = None
-
-    try:
-        theme = await theme_sh.get(theme_id)
-        text = f"{theme.name}\n\n{theme.description}\n\n" + text
-    except StorageNotFound:
-        ...
+        view = await (
+            ViewLoader()
+            .optional("theme_notes", note_sh.get_summaries_by_theme(theme_id))
+            .optional("theme", theme_sh.get(theme_id))
+            .load()
+        )
+        theme_notes = view["theme_notes"]
+        if not view.is_found("theme_notes"):
+            text = "Заметок под темой пока нет"
+        if view.is_found("theme"):
+            text = f"{view['theme'].name}\n\n{view['theme'].description}\n\n" + text
     finally:
         kb = create_theme_menu_kb(theme_id, theme_notes)
         await callback.bot.send_message(
@@ -89,3 +94,4 @@ async def open_theme_menu(
             chat_id=callback.from_user.id
         )
         await callback.message.delete()
+        get_navigation_prefetcher().prefetch_note_menus(callback.from_user.id, theme_notes)
@@ -1,3 +1,4 @@
+import uuid
 from datetime import datetime
 from logging import getLogger
 
@@ -7,7 +8,7 @@ from aiogram_calendar import SimpleCalendar, get_user_locale, SimpleCalendarCall
 
 from src.models.user_model import UserModel
 from src.services.storage.interfaces import IUserStorageHandler
-from src.services.storage.user_storage_handler import UserStorageHandler
+from src.services.storage.user_storage_handler import get_user_storage_handler
 from src.services.ui.inline_keyboards import create_main_menu_kb
 from src.utils.exceptions.decorators import handel_storage_unexpected_response
 from src.utils.exceptions.storage import StorageNotFound
@@ -16,7 +17,7 @@ logger = getLogger(__name__)
 
 
 @handel_storage_unexpected_response
-async def start(msg: types.Message, sh: IUserStorageHandler = UserStorageHandler()) -> None:
+async def start(msg: types.Message, sh: IUserStorageHandler = get_user_storage_handler()) -> None:
     user_id = str(msg.from_user.id)
     logger.info(f"start handling 'start' event from user: {user_id}")
     try:
@@ -30,7 +31,8 @@ async def start(msg: types.Message, sh: IUserStorageHandler = UserStorageHandler
             first_name=msg.from_user.first_name,
             last_name=msg.from_user.last_name
         )
-        await sh.create(user)
+        # Key is new on every /start, so only retries of this create request are deduplicated by backend
+        await sh.create(user, idempotency_key=f"{user_id}:create_user:{uuid.uuid4().hex}")
     finally:
         kb = create_main_menu_kb()
         await msg.answer(text="Тут текст приветствия и главного меню", reply_markup=kb.as_markup())
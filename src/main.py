@@ -4,7 +4,11 @@ import logging
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
 
+from src.handlers.middlewares import DeadlineMiddleware, CancelPrefetchMiddleware, LoadTreeSnapshotMiddleware, \
+    ConsistencyKeyMiddleware
+from src.services.requests.RequestHandler import get_request_handler
 from src.services.scheduler.scheduler import create_and_start_scheduler
+from src.services.warmup import warm_up, mark_ready, mark_not_ready
 from src.utils import config
 from src.handlers.router import get_main_router
 
@@ -15,12 +19,27 @@ async def main():
     bot = Bot(token=config.BOT_TOKEN, parse_mode=ParseMode.HTML)
 
     dp = Dispatcher()
+    dp.update.outer_middleware(DeadlineMiddleware())
+    dp.update.outer_middleware(ConsistencyKeyMiddleware())
+    dp.update.outer_middleware(CancelPrefetchMiddleware())
+    if config.BACKEND_TREE_SNAPSHOT_ENABLED:
+        dp.update.outer_middleware(LoadTreeSnapshotMiddleware())
     dp.include_router(get_main_router())
 
+    request_handler = get_request_handler()
+    await request_handler.open()
+    await warm_up(bot, request_handler)
+
     scheduler = create_and_start_scheduler(bot)
     scheduler.start()
 
-    await dp.start_polling(bot)
+    try:
+        mark_ready()
+        await dp.start_polling(bot)
+    finally:
+        mark_not_ready()
+        scheduler.shutdown(wait=False)
+        await request_handler.close()
 
 
 if __name__ == '__main__':
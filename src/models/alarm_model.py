@@ -11,6 +11,10 @@ class AlarmStatus(str, Enum):
     FINISH: str = "FINISH"
 
 
+# Alarms which are not finished yet, only they are shown in note menu
+ACTIVE_ALARM_STATUSES: list[AlarmStatus] = [AlarmStatus.READY, AlarmStatus.QUEUE]
+
+
 class AlarmLinkModel(BaseModel):
     """Models with all relation links that the alarm has"""
     user_id: str
@@ -36,6 +40,13 @@ class AlarmModel(BaseModel):
     times: AlarmTimesModel
 
 
+class AlarmSummaryModel(BaseModel):
+    """Alarm projection with fields needed to show it in list"""
+    id: str = Field(alias="_id")
+    name: str
+    status: AlarmStatus
+
+
 class AlarmModelToCreate(BaseModel):
     """Model to create new Alarm use backend endpoint"""
     name: str
@@ -37,6 +37,12 @@ class NoteModel(BaseModel):
     times: NoteTimesModel
 
 
+class NoteSummaryModel(BaseModel):
+    """Note projection with fields needed to show it in list"""
+    id: str = Field(alias="_id")
+    name: str
+
+
 class NoteModelToCreate(BaseModel):
     """Model to create new Alarm use backend endpoint"""
     name: str
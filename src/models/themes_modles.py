@@ -14,6 +14,12 @@ class ThemeModel(BaseModel):
     links: ThemeLinksModel
 
 
+class ThemeSummaryModel(BaseModel):
+    """Theme projection with fields needed to show it in list"""
+    id: str = Field(alias="_id")
+    name: str
+
+
 class ThemeModelToCreate(BaseModel):
     """Model to create new theme use backend endpoint"""
     name: str
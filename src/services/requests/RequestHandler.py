@@ -1,19 +1,29 @@
 import asyncio
+import base64
 import json
+import os
+import time
 from abc import ABC, abstractmethod
-from logging import getLogger
-
-from aiogram.client.session import aiohttp
-from aiohttp import ClientResponse
-from pydantic import BaseModel
+from contextlib import AbstractAsyncContextManager, asynccontextmanager, AsyncExitStack
+from logging import getLogger, DEBUG
+from typing import AsyncIterator
+
+from src.services.requests.adaptive_limiter import AdaptiveLimiterRegistry
+from src.services.requests.balancer import create_backend_transport
+from src.services.requests.batch import RequestBatch, get_batch_slot
+from src.services.requests.conditional_cache import ConditionalCache, CachedResponse
+from src.services.requests.deadline import deadline_timeout, get_remaining_time
+from src.services.requests.circuit_breaker import CircuitBreakerRegistry, is_failure_status
+from src.services.requests.compression import WireStats
+from src.services.requests.hedging import Hedger
+from src.services.requests.lanes import LaneScheduler
+from src.services.requests.models import ResponseModel, StreamResponseModel
+from src.services.requests.single_flight import SingleFlight
+from src.services.requests.retry import RetryStats, TRANSPORT_ERRORS, get_retry_policy, parse_retry_after
+from src.services.requests.transports import ITransport
 from src.utils import statuses, config
 from src.utils.request_methods import RequestMethods
-from src.utils.exceptions.request import AuthException
-
-
-class ResponseModel(BaseModel):
-    body: str
-    status: int
+from src.utils.exceptions.request import AuthException, BackendUnavailable, CircuitBreakerOpen
 
 
 class IRequestHandler(ABC):
@@ -24,7 +34,13 @@ class IRequestHandler(ABC):
         ...
 
     @abstractmethod
-    async def post(self, url: str, body: dict) -> ResponseModel:
+    def stream_get(self, url: str) -> AbstractAsyncContextManager[StreamResponseModel]:
+        """GET request with streamed body, use as `async with`"""
+        ...
+
+    @abstractmethod
+    async def post(self, url: str, body: dict | None = None, data: dict | None = None,
+                   idempotency_key: str | None = None) -> ResponseModel:
         """POST request"""
         ...
 
@@ -39,28 +55,69 @@ class IRequestHandler(ABC):
         ...
 
 
-class RequestHandler(IRequestHandler):
-    _token = str | None
-    _available_methods = RequestMethods
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+
 
-    def __init__(self, host: str = config.BACKEND_HOST):
+class RequestHandler(IRequestHandler):
+    _token: str | None = None
+    _token_expire_time: float | None = None
+    _token_version: int = 0
+    _auth_lock = asyncio.Lock()
+    _available_methods = RequestMethods()
+
+    def __init__(self, host: str = config.BACKEND_HOST, transport: ITransport | None = None,
+                 read_hosts: str = config.BACKEND_READ_HOSTS):
         """
 
-        :param host: backend host
+        :param host: backend host, its scheme selects transport: http(s)://, unix:///path or asgi://module:app.
+        Several comma separated hosts are balanced
+        :param transport: Ready transport, host is ignored if it passed
+        :param read_hosts: Comma separated read replicas for GET requests
         """
         self._logger = getLogger(f"app.request_handler")
         self.host = host
-
-    @staticmethod
-    async def parce_response(r: ClientResponse) -> ResponseModel:
-        """Parce ClientResponse obj to ResponseModel obj"""
-        status = r.status
-        details: str = await r.text()
-        return ResponseModel(body=details, status=status)
+        self.wire_stats = WireStats()
+        self.transport = transport if transport is not None else create_backend_transport(
+            host, read_hosts, self.wire_stats
+        )
+        self.retry_stats = RetryStats()
+        self.circuit_breakers = CircuitBreakerRegistry()
+        self.get_single_flight = SingleFlight()
+        self.conditional_cache = ConditionalCache()
+        self.lanes = LaneScheduler()
+        self.limiters = AdaptiveLimiterRegistry()
+        self.hedger = Hedger()
+        self.batch_supported = config.BACKEND_BATCH_ENABLED  # Turned off if backend has no batch endpoint
+
+    async def open(self) -> None:
+        """Open backend transport. Connections to backend are pooled and kept alive between requests"""
+        await self.transport.open()
+
+    async def close(self) -> None:
+        """Close backend transport and all pooled connections"""
+        await self.transport.close()
 
     def get_auth_header(self) -> dict:
         return {"Authorization": f"bearer {self._token}"}
 
+    @staticmethod
+    def get_token_expire_time(token: str) -> float | None:
+        """Read 'exp' claim from JWT payload. Signature is not checked, backend do it"""
+        try:
+            payload = token.split(".")[1]
+            payload += "=" * (-len(payload) % 4)
+            return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+        except (IndexError, KeyError, TypeError, ValueError):
+            return None
+
+    def is_token_expiring(self) -> bool:
+        """True if there is no token or it expires within refresh leeway"""
+        if self._token is None:
+            return True
+        if self._token_expire_time is None:
+            return False
+        return self._token_expire_time - time.time() <= config.BACKEND_TOKEN_REFRESH_LEEWAY
+
     async def auth(self) -> None:
         """Auth with backend. Get JWT token and write it to class "_token" protected var"""
         cred = {
@@ -68,123 +125,359 @@ class RequestHandler(IRequestHandler):
             "password": config.BACKEND_USER_PASSWORD,
         }
 
-        r = await self.post("auth/jwt/login", data=cred)
+        r = await self.send(self._available_methods.POST, "auth/jwt/login", data=cred)
         if r.status == statuses.SUCCESS_200:
-            r_body = json.loads(r.body)
-            self.__class__._token = r_body["access_token"]
+            r_body = r.json()
+            token = r_body["access_token"]
+            self.__class__._token = token
+            self.__class__._token_expire_time = self.get_token_expire_time(token)
+            self.__class__._token_version += 1
             self._logger.info(f"Successfully update auth token")
+            if config.BACKEND_TOKEN_FILE:
+                self.save_token(config.BACKEND_TOKEN_FILE)
         else:
             self._logger.critical(f"Auth was failed: {r.body}")
             raise AuthException(status=r.status, msg=r.body)
 
-    async def check_response_auth_and_try_new_request(self, response: ResponseModel, method: str, url: str, *args,
-                                                      **kwargs) -> ResponseModel:
+    def save_token(self, path: str) -> None:
+        """Persist token, so it's used after restart instead of new login. File is readable by owner only"""
+        if self._token is None:
+            return
+        try:
+            fd = os.open(f"{path}.tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                f.write(self._token)
+            os.replace(f"{path}.tmp", path)
+        except OSError as err:
+            self._logger.warning(f"Can't save auth token to {path}: {err!r}")
+
+    def load_token(self, path: str) -> bool:
+        """
+        Load token persisted by previous run
+        :return: True if token is loaded and not expiring
+        """
+        try:
+            with open(path) as f:
+                token = f.read().strip()
+        except OSError:
+            return False
+
+        expire_time = self.get_token_expire_time(token)
+        if not token or expire_time is None or expire_time - time.time() <= config.BACKEND_TOKEN_REFRESH_LEEWAY:
+            return False
+        self.__class__._token = token
+        self.__class__._token_expire_time = expire_time
+        self.__class__._token_version += 1
+        self._logger.info(f"Load auth token from {path}")
+        return True
+
+    async def refresh_token(self, stale_version: int) -> None:
+        """
+        Single-flight token refresh. Only one login request is sent, concurrent callers wait for it
+        :param stale_version: Version of token the caller has found invalid. If it already replaced, no new login
+        """
+        async with self._auth_lock:
+            if self._token_version != stale_version:
+                return
+            await self.auth()
+
+    async def ensure_token(self) -> None:
+        """Refresh token before it expires, so requests don't get 401 and retry"""
+        if self.is_token_expiring():
+            await self.refresh_token(self._token_version)
+
+    async def request(self, method: str, url: str, body: dict | None = None, data: dict | None = None,
+                      idempotency_key: str | None = None) -> ResponseModel:
+        """
+        Send request with retries by method retry policy. Transient error statuses and connection errors are retried
+        with exponential backoff and jitter, 'Retry-After' header is respected.
+        Request made inside `batch().run` is queued to batch envelope instead
+        :param method: one of _available_methods value
+        :param url: Url relative to backend host
+        :param body: json body
+        :param data: form data
+        :param idempotency_key: Sent in 'Idempotency-Key' header, makes request retryable whatever its method
+        :return: Last response, if it still has retryable status code after all attempts
+        :raise BackendUnavailable: If backend can't be reached after all attempts
+        :raise CircuitBreakerOpen: If circuit of endpoint family is open
+        :raise DeadlineExceeded: If deadline of current update is gone
+        """
+        batch_slot = get_batch_slot()
+        if batch_slot is not None and data is None:
+            batch, slot = batch_slot
+            async with deadline_timeout(f"{method}/ url: {url}"):
+                return await batch.enqueue(slot, method, url, body=body, idempotency_key=idempotency_key)
+
+        policy = get_retry_policy(method, idempotency_key)
+        headers = {IDEMPOTENCY_KEY_HEADER: idempotency_key} if idempotency_key is not None else None
+        started_at = time.monotonic()
+        attempt = 0
+        self.retry_stats.calls[method] += 1
+
+        # Deadline of current update limits all attempts, retry sleeps and waits in limiter and lane queues
+        async with deadline_timeout(f"{method}/ url: {url}"):
+            while True:
+                attempt += 1
+                try:
+                    response = await self.hedged_send(method, url, body=body, data=data, headers=headers)
+                except TRANSPORT_ERRORS as err:
+                    delay = policy.get_delay(attempt, started_at, remaining=get_remaining_time())
+                    if delay is None:
+                        self.retry_stats.exhausted[method] += 1
+                        self._logger.error(
+                            f"{method}/ backend unavailable - url: {url} - attempts: {attempt}: {err!r}"
+                        )
+                        raise BackendUnavailable(
+                            status=statuses.SERVICE_UNAVAILABLE_503,
+                            msg=f"{method}/ backend unavailable - url: {url}: {err!r}"
+                        ) from err
+                    reason = repr(err)
+                else:
+                    if not policy.is_retryable_status(response.status):
+                        if attempt > 1:
+                            self.retry_stats.recovered[method] += 1
+                        return response
+                    retry_after = parse_retry_after(response.headers.get("retry-after"))
+                    delay = policy.get_delay(attempt, started_at, retry_after, get_remaining_time())
+                    if delay is None:
+                        self.retry_stats.exhausted[method] += 1
+                        return response
+                    reason = f"status {response.status}"
+
+                self.retry_stats.retries[method] += 1
+                self._logger.warning(f"{method}/ retry in {delay:.2f}s - url: {url} - attempt: {attempt} - {reason}")
+                await asyncio.sleep(delay)
+
+    async def hedged_send(self, method: str, url: str, body: dict | None = None,
+                          data: dict | None = None, headers: dict[str, str] | None = None) -> ResponseModel:
+        """
+        If hedging is enabled, GET request that has not answered within latency percentile of its endpoint family
+        is sent second time. First answer wins, the other request is cancelled
+        """
+        if method != self._available_methods.GET or not self.hedger.enabled:
+            return await self.guarded_send(method, url, body=body, data=data, headers=headers)
+        return await self.hedger.run(url, lambda: self.guarded_send(method, url, headers=headers))
+
+    async def guarded_send(self, method: str, url: str, body: dict | None = None,
+                           data: dict | None = None, headers: dict[str, str] | None = None) -> ResponseModel:
+        """
+        Send request through circuit breaker and adaptive concurrency limiter of url endpoint family,
+        then through traffic lane. Fail fast without request if circuit is open or limiter queue is full
+        :raise CircuitBreakerOpen: If circuit is open
+        :raise ConcurrencyLimitExceeded: If request is shed by adaptive limiter
+        """
+        breaker = self.circuit_breakers.get(url)
+        admission = breaker.allow_request()
+        if not admission:
+            raise CircuitBreakerOpen(
+                status=statuses.SERVICE_UNAVAILABLE_503,
+                msg=f"{method}/ circuit '{breaker.name}' is open - url: {url}"
+            )
+
+        limiter = self.limiters.get(url)
+        try:
+            await limiter.acquire()
+            latency: float | None = None
+            ok: bool | None = None
+            try:
+                async with self.lanes.slot():
+                    started_at = time.monotonic()
+                    response = await self.authorized_send(method, url, body=body, data=data, headers=headers)
+                    latency = time.monotonic() - started_at
+                ok = not is_failure_status(response.status)
+            except TRANSPORT_ERRORS:
+                ok = False
+                raise
+            finally:
+                limiter.release(latency, ok)
+        except TRANSPORT_ERRORS:
+            breaker.record_failure(admission)
+            raise
+        except BaseException:
+            breaker.record_cancel(admission)
+            raise
+
+        if ok:
+            breaker.record_success(admission)
+        else:
+            breaker.record_failure(admission)
+        return response
+
+    async def authorized_send(self, method: str, url: str, body: dict | None = None,
+                              data: dict | None = None, headers: dict[str, str] | None = None) -> ResponseModel:
         """
-        Check response and if it has 401 status code, then make auth request and new request with input method and url
-        :param response: Response to check
+        Send request with valid auth token. If backend still answers 401, refresh token and repeat request once
         :param method: one of _available_methods value
-        :param url: Url to new request after auth
-        :param args: For "POST", "PATCH", "DELETE"
-        :param kwargs: For "POST", "PATCH", "DELETE"
-        :return: Input response if not 401 status code or new request response
+        :param url: Url relative to backend host
+        :param body: json body
+        :param data: form data
+        :param headers: Extra request headers
         """
+        await self.ensure_token()
+
+        token_version = self._token_version
+        response = await self.send(method, url, body=body, data=data, headers=headers)
         if response.status != statuses.UNAUTHORIZED_401:
             return response
 
-        await self.auth()
-        match method:
-            case self._available_methods.GET:
-                res = await self.get(url)
-                return res
-            case self._available_methods.POST:
-                res = await self.post(url, *args, **kwargs)
-                return res
-            case self._available_methods.PATCH:
-                res = await self.patch(url, *args, **kwargs)
-                return res
-            case self._available_methods.DELETE:
-                res = await self.delete(url, *args, **kwargs)
-                return res
-
-        raise ValueError(f"Method should be in: {self._available_methods}")
+        await self.refresh_token(token_version)
+        return await self.send(method, url, body=body, data=data, headers=headers)
+
+    async def send(self, method: str, url: str, body: dict | None = None, data: dict | None = None,
+                   headers: dict[str, str] | None = None) -> ResponseModel:
+        """
+        Send one request to backend through transport.
+        GET request is conditional if url has cached validators, 304 answer is replaced with cached response
+        :param method: one of _available_methods value
+        :param url: Url relative to backend host
+        :param body: json body
+        :param data: form data
+        :param headers: Extra request headers
+        """
+        is_get = method == self._available_methods.GET
+        cache_key = url
+        cached = self.conditional_cache.get(cache_key) if is_get else None
+        request_headers = self.get_auth_header()
+        request_headers.update(self.conditional_cache.get_conditional_headers(cached))
+        if headers:
+            request_headers.update(headers)
+
+        self._logger.info(f"{method}/ send request - url: {url}")
+        response = await self.transport.request(method, url, request_headers, body=body, data=data)
+
+        if is_get:
+            response = self.revalidate_response(cache_key, cached, response)
+        self._logger.info(
+            f"{method}/ get response - url: {url} - status: {response.status}. size: {len(response.content)}"
+        )
+        if self._logger.isEnabledFor(DEBUG):
+            self._logger.debug(f"{method}/ response details - url: {url}: {response.body}")
+
+        return response
+
+    def revalidate_response(self, cache_key: str, cached: CachedResponse | None,
+                            response: ResponseModel) -> ResponseModel:
+        """
+        Update conditional cache with GET response
+        :param cache_key: Conditional cache key of request
+        :param cached: Cached response request was made conditional with
+        :param response: Backend response
+        :return: Cached response if backend answered 304, otherwise input response
+        """
+        if response.status == statuses.NOT_MODIFIED_304 and cached is not None:
+            self.conditional_cache.record_hit()
+            return ResponseModel(content=cached.content, status=statuses.SUCCESS_200, headers=cached.headers)
+
+        if response.status == statuses.SUCCESS_200:
+            self.conditional_cache.store(cache_key, response.content, response.headers)
+        elif response.status == statuses.NOT_FOUND_404:
+            self.conditional_cache.invalidate(cache_key)
+        return response
+
+    @asynccontextmanager
+    async def stream_get(self, url: str) -> AsyncIterator[StreamResponseModel]:
+        """
+        GET request which body is not buffered, read it by chunks while it comes.
+        Token refresh and circuit breaker work as for other requests, but request is not retried,
+        because it can't be repeated after caller started to read body
+        :raise BackendUnavailable: If backend can't be reached
+        :raise CircuitBreakerOpen: If circuit of endpoint family is open
+        :raise DeadlineExceeded: If deadline of current update is gone before response headers
+        """
+        method = self._available_methods.GET
+        breaker = self.circuit_breakers.get(url)
+        admission = breaker.allow_request()
+        if not admission:
+            raise CircuitBreakerOpen(
+                status=statuses.SERVICE_UNAVAILABLE_503,
+                msg=f"{method}/ circuit '{breaker.name}' is open - url: {url}"
+            )
+
+        async with AsyncExitStack() as stack:
+            try:
+                await self.ensure_token()
+                token_version = self._token_version
+                # Lane slot is held until response headers only, body may be read for long by slow consumer
+                async with deadline_timeout(f"{method}/ url: {url}"), self.lanes.slot():
+                    self._logger.info(f"{method}/ send stream request - url: {url}")
+                    response = await stack.enter_async_context(
+                        self.transport.stream(method, url, self.get_auth_header())
+                    )
+                    if response.status == statuses.UNAUTHORIZED_401:
+                        await stack.aclose()
+                        await self.refresh_token(token_version)
+                        response = await stack.enter_async_context(
+                            self.transport.stream(method, url, self.get_auth_header())
+                        )
+            except TRANSPORT_ERRORS as err:
+                breaker.record_failure(admission)
+                raise BackendUnavailable(
+                    status=statuses.SERVICE_UNAVAILABLE_503,
+                    msg=f"{method}/ backend unavailable - url: {url}: {err!r}"
+                ) from err
+            except BaseException:
+                breaker.record_cancel(admission)
+                raise
+
+            self._logger.info(f"{method}/ get stream response - url: {url} - status: {response.status}")
+            if is_failure_status(response.status):
+                breaker.record_failure(admission)
+            else:
+                breaker.record_success(admission)
+
+            try:
+                yield response
+            except TRANSPORT_ERRORS as err:
+                raise BackendUnavailable(
+                    status=statuses.SERVICE_UNAVAILABLE_503,
+                    msg=f"{method}/ stream was broken - url: {url}: {err!r}"
+                ) from err
+
+    def batch(self) -> RequestBatch:
+        """
+        Batch of concurrent requests, sent to backend as one envelope request:
+        `notes, theme = await request_handler.batch().run(notes_sh.get_all_by_theme(_id), themes_sh.get(_id))`
+        """
+        return RequestBatch(self)
 
     async def get(self, url: str) -> ResponseModel:
-        """"""
-        input_url = url
-        url = f"{self.host}/{url}"
-
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=self.get_auth_header()) as r:
-                self._logger.info(f"GET/ send request - url: {url}")
-                response = await self.parce_response(r)
-                self._logger.info(
-                    f"GET/ get response - url: {url} - status: {response.status}. details: {response.body}"
-                )
-
-        result = await self.check_response_auth_and_try_new_request(response=response,
-                                                                    method=self._available_methods.GET,
-                                                                    url=input_url)
-        return result
-
-    async def post(self, url: str, body: dict | None = None, data: dict | None = None) -> ResponseModel:
-        """"""
-        input_url = url
-        url = f"{self.host}/{url}"
-
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=body, data=data, headers=self.get_auth_header()) as r:
-                self._logger.info(f"POST/ send request - url: {url}")
-                response = await self.parce_response(r)
-                self._logger.info(
-                    f"POST/ get response - url: {url} - status: {response.status}. details: {response.body}"
-                )
-
-        result = await self.check_response_auth_and_try_new_request(response=response,
-                                                                    method=self._available_methods.POST,
-                                                                    url=input_url,
-                                                                    body=body,
-                                                                    data=data)
-        return result
+        """Identical concurrent GET requests with the same auth token are sent to backend only once"""
+        key = (url, self._token)
+        # Batched GET joins identical request in flight, e.g. started by background prefetch, instead of repeating it
+        if get_batch_slot() is not None and key not in self.get_single_flight:
+            return await self.request(self._available_methods.GET, url)
+
+        # Caller which joined request in flight stops waiting by its own deadline
+        async with deadline_timeout(f"{self._available_methods.GET}/ url: {url}"):
+            return await self.get_single_flight.do(
+                key,
+                lambda: self.request(self._available_methods.GET, url)
+            )
+
+    async def post(self, url: str, body: dict | None = None, data: dict | None = None,
+                   idempotency_key: str | None = None) -> ResponseModel:
+        """
+        :param idempotency_key: Client generated key of the operation. Backend executes request with the same key
+        only once, so the request is retried as idempotent one
+        """
+        return await self.request(
+            self._available_methods.POST, url, body=body, data=data, idempotency_key=idempotency_key
+        )
 
     async def patch(self, url: str, body: dict | None = None, data: dict | None = None) -> ResponseModel:
         """"""
-        input_url = url
-        url = f"{self.host}/{url}"
-
-        async with aiohttp.ClientSession() as session:
-            async with session.patch(url, json=body, headers=self.get_auth_header()) as r:
-                self._logger.info(f"PATCH/ send request - url: {url}")
-                response = await self.parce_response(r)
-                self._logger.info(
-                    f"PATCH/ get response - url: {url} - status: {response.status}. details: {response.body}"
-                )
-
-        result = await self.check_response_auth_and_try_new_request(response=response,
-                                                                    method=self._available_methods.PATCH,
-                                                                    url=input_url,
-                                                                    body=body,
-                                                                    data=data)
-        return result
+        return await self.request(self._available_methods.PATCH, url, body=body)
 
     async def delete(self, url: str, body: dict | None = None, data: dict | None = None) -> ResponseModel:
-        input_url = url
-        url = f"{self.host}/{url}"
+        return await self.request(self._available_methods.DELETE, url, body=body)
 
-        async with aiohttp.ClientSession() as session:
-            async with session.delete(url, json=body, headers=self.get_auth_header()) as r:
-                self._logger.info(f"DELETE/ send request - url: {url}")
-                response = await self.parce_response(r)
-                self._logger.info(
-                    f"DELETE/ get response - url: {url} - status: {response.status}. details: {response.body}"
-                )
 
-        result = await self.check_response_auth_and_try_new_request(response=response,
-                                                                    method=self._available_methods.DELETE,
-                                                                    url=input_url,
-                                                                    body=body,
-                                                                    data=data)
-        return result
+_request_handler: RequestHandler | None = None
 
 
 def get_request_handler() -> RequestHandler:
-    return RequestHandler()
+    """Return application-wide request handler. All storage handlers share it and its connection pool"""
+    global _request_handler
+    if _request_handler is None:
+        _request_handler = RequestHandler()
+    return _request_handler
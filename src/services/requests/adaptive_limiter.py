@@ -0,0 +1,153 @@
+import asyncio
+import time
+from collections import deque
+from logging import getLogger
+
+from src.services.requests.endpoint_family import get_endpoint_family
+from src.utils import config, statuses
+from src.utils.exceptions.request import ConcurrencyLimitExceeded
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit of one endpoint family.
+    Every fast successful request grows limit by 1 / limit (about +1 per round of requests),
+    error or slow answer cuts limit by backoff ratio. Requests over limit wait in bounded queue
+    """
+
+    def __init__(
+            self,
+            name: str,
+            initial_limit: int = config.BACKEND_LIMITER_INITIAL_LIMIT,
+            min_limit: int = config.BACKEND_LIMITER_MIN_LIMIT,
+            max_limit: int = config.BACKEND_MAX_CONCURRENCY,
+            latency_threshold: float = config.BACKEND_LIMITER_LATENCY_THRESHOLD,
+            backoff_ratio: float = config.BACKEND_LIMITER_BACKOFF_RATIO,
+            max_queue: int = config.BACKEND_LIMITER_MAX_QUEUE,
+            queue_timeout: float = config.BACKEND_REQUEST_TIMEOUT
+    ) -> None:
+        """
+        :param name: Endpoint family name
+        :param latency_threshold: Seconds. Slower answer is treated as backend overload signal
+        :param backoff_ratio: Limit multiplier on overload signal
+        :param max_queue: Requests over this queue length are shed at once
+        :param queue_timeout: Seconds request may wait in queue before it's shed
+        """
+        self._logger = getLogger(f"app.adaptive_limiter.{name}")
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_threshold = latency_threshold
+        self.backoff_ratio = backoff_ratio
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self.limit = float(initial_limit)
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+
+        self.started = 0
+        self.shed = 0
+        self.total_queue_wait = 0.0
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    async def acquire(self) -> None:
+        """
+        Wait for free slot under current limit
+        :raise ConcurrencyLimitExceeded: Queue is full or request waited in queue too long
+        """
+        if self._has_capacity() and not self._waiters:
+            self.in_flight += 1
+            self.started += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self._shed("queue is full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        queued_at = time.monotonic()
+        try:
+            async with asyncio.timeout(self.queue_timeout):
+                await waiter
+        except (asyncio.CancelledError, TimeoutError) as err:
+            if waiter.done() and not waiter.cancelled():
+                self.release(latency=None, ok=None)  # Slot was given right before cancel
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            self.total_queue_wait += time.monotonic() - queued_at
+            if isinstance(err, TimeoutError):
+                self._shed("queue wait timeout")
+            raise
+
+        self.total_queue_wait += time.monotonic() - queued_at
+        self.started += 1
+
+    def release(self, latency: float | None, ok: bool | None) -> None:
+        """
+        :param latency: Seconds request took, None if unknown
+        :param ok: Backend answered well. None if request was cancelled and says nothing about backend
+        """
+        self.in_flight -= 1
+        if ok is not None:
+            if ok and latency is not None and latency <= self.latency_threshold:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            else:
+                self._decrease()
+        self._wake_up()
+
+    def _decrease(self) -> None:
+        # Requests in flight during overload come back slow together, cut limit once per threshold period
+        now = time.monotonic()
+        if now - self._last_decrease < self.latency_threshold:
+            return
+        self._last_decrease = now
+        new_limit = max(self.min_limit, self.limit * self.backoff_ratio)
+        if int(new_limit) != int(self.limit):
+            self._logger.warning(f"Concurrency limit of '{self.name}' decreased to {int(new_limit)}")
+        self.limit = new_limit
+
+    def _wake_up(self) -> None:
+        while self._waiters and self._has_capacity():
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue  # Cancelled, its task cleans up
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def _shed(self, reason: str) -> None:
+        self.shed += 1
+        raise ConcurrencyLimitExceeded(
+            status=statuses.SERVICE_UNAVAILABLE_503,
+            msg=f"Request to '{self.name}' is shed: {reason}. limit: {int(self.limit)}"
+        )
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "started": self.started,
+            "shed": self.shed,
+            "avg_queue_wait": self.total_queue_wait / self.started if self.started else 0.0,
+        }
+
+
+class AdaptiveLimiterRegistry:
+    """Adaptive limiters by endpoint family"""
+
+    def __init__(self) -> None:
+        self._limiters: dict[str, AdaptiveLimiter] = {}
+
+    def get(self, url: str) -> AdaptiveLimiter:
+        family = get_endpoint_family(url)
+        limiter = self._limiters.get(family)
+        if limiter is None:
+            limiter = self._limiters[family] = AdaptiveLimiter(family)
+        return limiter
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        return {family: limiter.stats() for family, limiter in self._limiters.items()}
@@ -0,0 +1,258 @@
+import asyncio
+import random
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from logging import getLogger
+from typing import Any, AsyncIterator, Iterator
+
+import aiohttp
+
+from src.services.requests.circuit_breaker import is_failure_status
+from src.services.requests.compression import WireStats
+from src.services.requests.models import ResponseModel, StreamResponseModel
+from src.services.requests.retry import TRANSPORT_ERRORS
+from src.services.requests.transports import ITransport, create_transport
+from src.utils import config
+from src.utils.request_methods import RequestMethods
+
+# Who makes backend requests of current context, e.g. telegram user of update being handled
+_consistency_key: ContextVar[str | None] = ContextVar("backend_consistency_key", default=None)
+
+
+@contextmanager
+def consistency_key(key: str) -> Iterator[None]:
+    """Backend requests made inside this block (and tasks started from it) read writes made with the same key"""
+    token = _consistency_key.set(key)
+    try:
+        yield
+    finally:
+        _consistency_key.reset(token)
+
+
+class Upstream:
+    """
+    One backend host. Passively ejected after consecutive failures, every next ejection is longer.
+    After ejection host gets traffic share growing from small to full during slow start
+    """
+
+    def __init__(
+            self,
+            host: str,
+            transport: ITransport,
+            ejection_threshold: int = config.BACKEND_EJECTION_THRESHOLD,
+            ejection_time: float = config.BACKEND_EJECTION_TIME,
+            slow_start: float = config.BACKEND_SLOW_START
+    ) -> None:
+        self._logger = getLogger("app.balancer")
+        self.host = host
+        self.transport = transport
+        self.ejection_threshold = ejection_threshold
+        self.ejection_time = ejection_time
+        self.slow_start = slow_start
+
+        self.outstanding = 0
+        self.requests = 0
+        self._failures = 0
+        self._ejections = 0
+        self._ejected_until = 0.0
+
+    @property
+    def is_ejected(self) -> bool:
+        return time.monotonic() < self._ejected_until
+
+    @property
+    def weight(self) -> float:
+        """Traffic share of host, 1 for healthy host, grows linearly from 0.1 during slow start"""
+        if self._ejections == 0 or self.slow_start <= 0:
+            return 1.0
+        recovered_for = time.monotonic() - self._ejected_until
+        return min(1.0, max(0.1, recovered_for / self.slow_start))
+
+    def get_load(self) -> float:
+        """Least outstanding requests score, lower is better"""
+        return (self.outstanding + 1) / self.weight
+
+    def record_success(self) -> None:
+        self._failures = 0
+        if self._ejections and self.weight >= 1.0:
+            self._ejections = 0
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._failures < self.ejection_threshold or self.is_ejected:
+            return
+        self._failures = 0
+        self._ejections += 1
+        eject_for = self.ejection_time * min(self._ejections, 10)
+        self._ejected_until = time.monotonic() + eject_for
+        self._logger.warning(f"Eject backend host {self.host} for {eject_for:.0f}s")
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "ejected": self.is_ejected,
+            "weight": round(self.weight, 2),
+        }
+
+
+class BalancedTransport(ITransport):
+    """
+    Spread requests over several backend hosts, each request goes to host with least outstanding requests.
+    If read hosts are set, GET requests go to them and other methods go to primary hosts.
+    Shortly after write completes, GET requests with the same consistency key go to primary hosts too,
+    so user reads what they just wrote, while reads of other users still go to replicas.
+    Requests made without consistency key are keyed by their auth token
+    """
+    _available_methods = RequestMethods()
+
+    def __init__(
+            self,
+            primary: list[Upstream],
+            replicas: list[Upstream] | None = None,
+            read_after_write_window: float = config.BACKEND_READ_AFTER_WRITE_WINDOW,
+            max_writers: int = 10_000
+    ) -> None:
+        """
+        :param max_writers: Max consistency keys which last write is remembered,
+        keys whose write is older than read_after_write_window are forgotten anyway
+        """
+        self.primary = primary
+        self.replicas = replicas or []
+        self.read_after_write_window = read_after_write_window
+        self.max_writers = max_writers
+        # Consistency key to time.monotonic() moment its last write completed, in order of writes
+        self._last_writes: OrderedDict[str, float] = OrderedDict()
+
+    @property
+    def upstreams(self) -> list[Upstream]:
+        return self.primary + self.replicas
+
+    async def open(self) -> None:
+        for upstream in self.upstreams:
+            await upstream.transport.open()
+
+    async def close(self) -> None:
+        for upstream in self.upstreams:
+            await upstream.transport.close()
+
+    async def warm_up(self, connections: int) -> int:
+        """Open connections to every host"""
+        results = await asyncio.gather(*(upstream.transport.warm_up(connections) for upstream in self.upstreams))
+        return sum(results)
+
+    @staticmethod
+    def get_consistency_key(headers: dict[str, str]) -> str:
+        key = _consistency_key.get()
+        return key if key is not None else headers.get("Authorization", "")
+
+    def record_write(self, key: str) -> None:
+        now = time.monotonic()
+        self._last_writes.pop(key, None)
+        self._last_writes[key] = now
+        while self._last_writes:
+            written_at = next(iter(self._last_writes.values()))
+            if now - written_at <= self.read_after_write_window and len(self._last_writes) <= self.max_writers:
+                break
+            self._last_writes.popitem(last=False)
+
+    def has_recent_write(self, key: str) -> bool:
+        written_at = self._last_writes.get(key)
+        return written_at is not None and time.monotonic() - written_at <= self.read_after_write_window
+
+    def choose(self, method: str, exclude: set[Upstream] | None = None, key: str | None = None) -> Upstream:
+        """
+        Least loaded not ejected host of method pool. If all hosts are ejected, choose among all of them
+        :param exclude: Hosts already tried for this request, they are chosen only if there are no other hosts
+        :param key: Consistency key of request, GET goes to primary hosts shortly after write with this key
+        """
+        pool = self.primary
+        if method == self._available_methods.GET and self.replicas:
+            if key is None or not self.has_recent_write(key):
+                pool = self.replicas
+
+        if exclude:
+            pool = [upstream for upstream in pool if upstream not in exclude] or pool
+        candidates = [upstream for upstream in pool if not upstream.is_ejected] or pool
+        min_load = min(upstream.get_load() for upstream in candidates)
+        return random.choice([upstream for upstream in candidates if upstream.get_load() == min_load])
+
+    @asynccontextmanager
+    async def _track(self, upstream: Upstream) -> AsyncIterator[None]:
+        upstream.outstanding += 1
+        upstream.requests += 1
+        try:
+            yield
+        except TRANSPORT_ERRORS:
+            upstream.record_failure()
+            raise
+        finally:
+            upstream.outstanding -= 1
+
+    def _record_status(self, upstream: Upstream, status: int) -> None:
+        if is_failure_status(status):
+            upstream.record_failure()
+        else:
+            upstream.record_success()
+
+    async def request(self, method: str, url: str, headers: dict[str, str], body: dict | None = None,
+                      data: dict | None = None) -> ResponseModel:
+        key = self.get_consistency_key(headers)
+        try:
+            return await self._request(method, url, headers, body, data, key)
+        finally:
+            # Replicas may lag behind write until it completes, even failed write may be applied
+            if method != self._available_methods.GET:
+                self.record_write(key)
+
+    async def _request(self, method: str, url: str, headers: dict[str, str], body: dict | None,
+                       data: dict | None, key: str) -> ResponseModel:
+        # Request that failed to connect never reached backend, so it's safe to send it to other host for any method
+        tried: set[Upstream] = set()
+        while True:
+            upstream = self.choose(method, tried, key)
+            tried.add(upstream)
+            try:
+                async with self._track(upstream):
+                    response = await upstream.transport.request(method, url, headers, body=body, data=data)
+            except aiohttp.ClientConnectorError:
+                if self.choose(method, tried, key) in tried:
+                    raise
+                continue
+            self._record_status(upstream, response.status)
+            return response
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, headers: dict[str, str]) -> AsyncIterator[StreamResponseModel]:
+        upstream = self.choose(method, key=self.get_consistency_key(headers))
+        async with self._track(upstream):
+            async with upstream.transport.stream(method, url, headers) as response:
+                self._record_status(upstream, response.status)
+                yield response
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {upstream.host: upstream.stats() for upstream in self.upstreams}
+
+
+def parse_hosts(hosts: str) -> list[str]:
+    """Split comma separated hosts"""
+    return [host.strip() for host in hosts.split(",") if host.strip()]
+
+
+def create_backend_transport(hosts: str, read_hosts: str = "", wire_stats: WireStats | None = None) -> ITransport:
+    """
+    Create transport for backend hosts
+    :param hosts: Comma separated primary hosts, all requests go to them if there are no read hosts
+    :param read_hosts: Comma separated read replicas for GET requests
+    :param wire_stats: Bytes on wire counters shared by all hosts
+    :return: Single host transport if there is one host only, otherwise balanced transport
+    """
+    primary, replicas = parse_hosts(hosts), parse_hosts(read_hosts)
+    if len(primary) == 1 and not replicas:
+        return create_transport(primary[0], wire_stats)
+    return BalancedTransport(
+        primary=[Upstream(host, create_transport(host, wire_stats)) for host in primary],
+        replicas=[Upstream(host, create_transport(host, wire_stats)) for host in replicas]
+    )
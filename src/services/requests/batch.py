@@ -0,0 +1,199 @@
+import asyncio
+import contextvars
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import partial
+from logging import getLogger
+from typing import TYPE_CHECKING, Any, Coroutine
+
+from src.services.requests.models import ResponseModel
+from src.utils import config, statuses
+from src.utils.exceptions.storage import UnexpectedResponse
+from src.utils.json_backend import json_dumps
+from src.utils.request_methods import RequestMethods
+
+if TYPE_CHECKING:
+    from src.services.requests.RequestHandler import RequestHandler
+
+# Batch and slot of coroutine current request belongs to
+_current_batch: ContextVar[tuple["RequestBatch", int] | None] = ContextVar("request_batch", default=None)
+
+# Envelope endpoint answers with one of these if backend doesn't support batches
+BATCH_NOT_SUPPORTED_STATUSES = frozenset((
+    statuses.NOT_FOUND_404, statuses.METHOD_NOT_ALLOWED_405, statuses.NOT_IMPLEMENTED_501
+))
+
+
+def get_batch_slot() -> tuple["RequestBatch", int] | None:
+    return _current_batch.get()
+
+
+@dataclass
+class BatchOperation:
+    slot: int
+    method: str
+    url: str
+    body: dict | None = None
+    idempotency_key: str | None = None
+    future: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+    def to_envelope(self) -> dict[str, Any]:
+        operation: dict[str, Any] = {"method": self.method, "url": self.url, "body": self.body}
+        if self.idempotency_key is not None:
+            operation["idempotency_key"] = self.idempotency_key
+        return operation
+
+
+class RequestBatch:
+    """
+    Run several coroutines which make backend requests, requests they make at the same time
+    are packed to one envelope POST request and executed by backend in order of coroutines.
+    If backend doesn't support envelope, requests are sent one by one as usual
+    """
+    _available_methods = RequestMethods()
+
+    def __init__(self, request_handler: "RequestHandler", linger: float = config.BACKEND_BATCH_LINGER) -> None:
+        """
+        :param request_handler: Handler which sends envelope and not batched requests
+        :param linger: Max seconds to wait other coroutines requests after the first one is queued
+        """
+        self._logger = getLogger("app.request_batch")
+        self.request_handler = request_handler
+        self.linger = linger
+        self._queue: list[BatchOperation] = []
+        self._live: set[int] = set()
+        self._changed = asyncio.Event()
+
+    async def run(self, *coroutines: Coroutine[Any, Any, Any], return_exceptions: bool = False) -> list[Any]:
+        """
+        Same as asyncio.gather, but requests of coroutines are batched
+        :param return_exceptions: Return exceptions as results instead of raising the first one
+        """
+        tasks = []
+        for slot, coroutine in enumerate(coroutines):
+            context = contextvars.copy_context()
+            context.run(_current_batch.set, (self, slot))
+            task = asyncio.create_task(coroutine, context=context)
+            task.add_done_callback(partial(self._on_done, slot))
+            tasks.append(task)
+        self._live = set(range(len(tasks)))
+
+        try:
+            while self._live:
+                await self._wait_ready()
+                if self._queue:
+                    await self._flush()
+            return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def enqueue(self, slot: int, method: str, url: str, body: dict | None = None,
+                      idempotency_key: str | None = None) -> ResponseModel:
+        """Queue request of coroutine and wait its response"""
+        operation = BatchOperation(slot, method, url, body, idempotency_key)
+        self._queue.append(operation)
+        self._changed.set()
+        return await operation.future
+
+    def _on_done(self, slot: int, _: asyncio.Task) -> None:
+        self._live.discard(slot)
+        self._changed.set()
+
+    def _is_ready(self) -> bool:
+        """Every not finished coroutine waits for response of queued request"""
+        return self._live <= {operation.slot for operation in self._queue}
+
+    async def _wait_ready(self) -> None:
+        """Wait until all coroutines queued requests or finished, but not longer than linger after first request"""
+        while self._live and not self._is_ready():
+            self._changed.clear()
+            if not self._queue:
+                await self._changed.wait()
+                continue
+            try:
+                async with asyncio.timeout(self.linger):
+                    await self._changed.wait()
+            except TimeoutError:
+                return
+
+    async def _flush(self) -> None:
+        operations = sorted(self._queue, key=lambda operation: operation.slot)
+        self._queue = []
+        try:
+            if len(operations) > 1 and self.request_handler.batch_supported:
+                responses = await self._send_envelope(operations)
+            else:
+                responses = None
+            if responses is None:
+                responses = await self._send_one_by_one(operations)
+        except Exception as err:
+            for operation in operations:
+                if not operation.future.done():
+                    operation.future.set_exception(err)
+            return
+
+        for operation, response in zip(operations, responses):
+            if not operation.future.done():
+                operation.future.set_result(response)
+
+    async def _send_envelope(self, operations: list[BatchOperation]) -> list[ResponseModel] | None:
+        """
+        :return: Responses in order of operations or None if backend doesn't support batches
+        """
+        # Envelope of reads only may be safely repeated, so it's retried as idempotent request
+        is_read_only = all(operation.method == self._available_methods.GET for operation in operations)
+        response = await self.request_handler.request(
+            self._available_methods.POST,
+            config.BACKEND_BATCH_URL,
+            body={"requests": [operation.to_envelope() for operation in operations]},
+            idempotency_key=f"batch:{uuid.uuid4().hex}" if is_read_only else None
+        )
+        if response.status in BATCH_NOT_SUPPORTED_STATUSES:
+            self._logger.info(f"Backend doesn't support batch requests, status: {response.status}")
+            self.request_handler.batch_supported = False
+            return None
+        if response.status != statuses.SUCCESS_200:
+            return [response] * len(operations)
+
+        results = self._parse_envelope(response, len(operations))
+        return [
+            ResponseModel(
+                content=json_dumps(result["body"]) if result.get("body") is not None else b"",
+                status=result["status"],
+                headers={k.lower(): v for k, v in (result.get("headers") or {}).items()}
+            )
+            for result in results
+        ]
+
+    def _parse_envelope(self, response: ResponseModel, operations_count: int) -> list[dict[str, Any]]:
+        """
+        :return: Results of envelope, one per operation
+        :raise UnexpectedResponse: Envelope is malformed, so no operation has known result
+        """
+        try:
+            results = response.json()["responses"]
+        except (ValueError, TypeError, KeyError) as err:
+            self._logger.error(f"Malformed batch response: {err!r}")
+            raise UnexpectedResponse(f"Malformed batch response: {err!r}") from err
+        if not isinstance(results, list) or not all(
+            isinstance(result, dict) and isinstance(result.get("status"), int) for result in results
+        ):
+            self._logger.error(f"Malformed batch response, responses: {results!r:.200}")
+            raise UnexpectedResponse("Malformed batch response, every response must be object with status")
+        if len(results) != operations_count:
+            self._logger.error(f"Batch response has {len(results)} responses for {operations_count} requests")
+            raise UnexpectedResponse(f"Batch response has {len(results)} responses for {operations_count} requests")
+        return results
+
+    async def _send_one_by_one(self, operations: list[BatchOperation]) -> list[ResponseModel]:
+        """Reads are sent concurrently, if there is a write all requests are sent in order"""
+        def send(operation: BatchOperation) -> Coroutine[Any, Any, ResponseModel]:
+            return self.request_handler.request(
+                operation.method, operation.url, body=operation.body, idempotency_key=operation.idempotency_key
+            )
+
+        if all(operation.method == self._available_methods.GET for operation in operations):
+            return list(await asyncio.gather(*(send(operation) for operation in operations)))
+        return [await send(operation) for operation in operations]
@@ -0,0 +1,140 @@
+import time
+from dataclasses import dataclass
+from enum import Enum
+from logging import getLogger
+
+from src.services.requests.endpoint_family import get_endpoint_family
+from src.utils import config, statuses
+
+
+class CircuitState(str, Enum):
+    """Possible circuit breaker states"""
+    CLOSED = "CLOSED"  # Requests pass, failures are counted
+    OPEN = "OPEN"  # Requests fail fast without touching backend
+    HALF_OPEN = "HALF_OPEN"  # Limited probe requests pass to check backend is back
+
+
+@dataclass(frozen=True)
+class Admission:
+    """
+    Breaker decision on request, it's passed back to record_* with request result.
+    Probe holds probe slot of the half-open period it was admitted in, only its result is counted as probe
+    """
+    allowed: bool
+    probe_period: int | None = None
+
+    def __bool__(self) -> bool:
+        return self.allowed
+
+
+def is_failure_status(status: int) -> bool:
+    """Statuses that mean backend is overloaded or broken, not that request is wrong"""
+    return status >= 500 or status == statuses.TOO_MANY_REQUESTS_429
+
+
+class CircuitBreaker:
+    """Circuit breaker for one endpoint family"""
+
+    def __init__(
+            self,
+            name: str,
+            failure_threshold: int = config.BACKEND_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout: float = config.BACKEND_CIRCUIT_RESET_TIMEOUT,
+            half_open_probes: int = config.BACKEND_CIRCUIT_HALF_OPEN_PROBES
+    ) -> None:
+        """
+        :param name: Endpoint family name
+        :param failure_threshold: Consecutive failures to open circuit
+        :param reset_timeout: Seconds circuit stays open before probes are allowed
+        :param half_open_probes: Successful probes needed to close circuit
+        """
+        self._logger = getLogger(f"app.circuit_breaker.{name}")
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._period = 0  # Number of current state period, it changes with every state change
+
+    @property
+    def state(self) -> CircuitState:
+        if self._state == CircuitState.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._set_state(CircuitState.HALF_OPEN)
+        return self._state
+
+    def allow_request(self) -> Admission:
+        """
+        Check request may be sent. In half-open state it takes one probe slot,
+        admission must be passed to record_* to release it
+        """
+        match self.state:
+            case CircuitState.CLOSED:
+                return Admission(True)
+            case CircuitState.HALF_OPEN:
+                if self._probes_in_flight + self._probe_successes >= self.half_open_probes:
+                    return Admission(False)
+                self._probes_in_flight += 1
+                return Admission(True, probe_period=self._period)
+        return Admission(False)
+
+    def record_success(self, admission: Admission) -> None:
+        if self._is_probe(admission):
+            self._probes_in_flight -= 1
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_probes:
+                self._set_state(CircuitState.CLOSED)
+        elif self._state == CircuitState.CLOSED:
+            self._failures = 0
+
+    def record_failure(self, admission: Admission) -> None:
+        if self._is_probe(admission):
+            self._probes_in_flight -= 1
+            self._set_state(CircuitState.OPEN)
+        elif self._state == CircuitState.CLOSED:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._set_state(CircuitState.OPEN)
+
+    def record_cancel(self, admission: Admission) -> None:
+        """Request was cancelled before any answer, it says nothing about backend health"""
+        if self._is_probe(admission):
+            self._probes_in_flight -= 1
+
+    def _is_probe(self, admission: Admission) -> bool:
+        """
+        Request is probe of current half-open period. Result of request admitted before, e.g. while circuit was closed,
+        says nothing about backend after reset timeout and its slot belongs to other period
+        """
+        return admission.probe_period is not None and admission.probe_period == self._period
+
+    def _set_state(self, state: CircuitState) -> None:
+        self._logger.warning(f"Circuit '{self.name}' {self._state.value} -> {state.value}")
+        self._state = state
+        self._period += 1
+        self._failures = 0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        if state == CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+
+
+class CircuitBreakerRegistry:
+    """Circuit breakers by endpoint family"""
+
+    def __init__(self) -> None:
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, url: str) -> CircuitBreaker:
+        family = get_endpoint_family(url)
+        breaker = self._breakers.get(family)
+        if breaker is None:
+            breaker = self._breakers[family] = CircuitBreaker(family)
+        return breaker
+
+    def states(self) -> dict[str, str]:
+        return {family: breaker.state.value for family, breaker in self._breakers.items()}
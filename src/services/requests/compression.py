@@ -0,0 +1,104 @@
+import gzip
+import time
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+from src.services.requests.endpoint_family import get_endpoint
+from src.utils import config
+
+# zstandard is optional, without it only gzip is negotiated
+try:
+    import zstandard  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover
+    zstandard = None  # type: ignore[assignment]
+
+GZIP = "gzip"
+DEFLATE = "deflate"
+ZSTD = "zstd"
+IDENTITY = "identity"
+
+SUPPORTED_ENCODINGS: tuple[str, ...] = (ZSTD, GZIP, DEFLATE) if zstandard is not None else (GZIP, DEFLATE)
+ACCEPT_ENCODING: str = ", ".join(SUPPORTED_ENCODINGS)
+
+
+class Decoder(Protocol):
+    def decompress(self, data: bytes) -> bytes:
+        ...
+
+
+class _IdentityDecoder:
+    def decompress(self, data: bytes) -> bytes:
+        return data
+
+
+def get_decoder(encoding: str | None) -> Decoder:
+    """
+    Incremental decoder of response body by 'Content-Encoding'
+    :raise ValueError: If encoding is not supported
+    """
+    encoding = (encoding or IDENTITY).strip().lower()
+    if encoding == IDENTITY:
+        return _IdentityDecoder()
+    if encoding in (GZIP, DEFLATE):
+        return zlib.decompressobj(wbits=zlib.MAX_WBITS | 32)  # Detects gzip or zlib header
+    if encoding == ZSTD and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompressobj()
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def compress(content: bytes, encoding: str = config.BACKEND_REQUEST_ENCODING) -> bytes:
+    """Compress request body, zstd falls back to gzip if zstandard is not installed"""
+    if encoding == ZSTD and zstandard is not None:
+        return zstandard.ZstdCompressor().compress(content)
+    return gzip.compress(content, compresslevel=6)
+
+
+def get_request_encoding(encoding: str = config.BACKEND_REQUEST_ENCODING) -> str:
+    return ZSTD if encoding == ZSTD and zstandard is not None else GZIP
+
+
+@dataclass
+class EndpointWireStats:
+    """Body sizes before and after compression and decode time of one endpoint"""
+    responses: int = 0
+    wire_bytes_in: int = 0
+    body_bytes_in: int = 0
+    decode_seconds: float = 0.0
+    requests_compressed: int = 0
+    wire_bytes_out: int = 0
+    body_bytes_out: int = 0
+
+
+class WireStats:
+    """Per endpoint bytes on wire, so compression saving can be checked"""
+
+    def __init__(self) -> None:
+        self._endpoints: defaultdict[str, EndpointWireStats] = defaultdict(EndpointWireStats)
+
+    def record_response(self, url: str, wire_size: int, body_size: int, decode_seconds: float) -> None:
+        stats = self._endpoints[get_endpoint(url)]
+        stats.responses += 1
+        stats.wire_bytes_in += wire_size
+        stats.body_bytes_in += body_size
+        stats.decode_seconds += decode_seconds
+
+    def record_request(self, url: str, wire_size: int, body_size: int, compressed: bool) -> None:
+        stats = self._endpoints[get_endpoint(url)]
+        stats.requests_compressed += compressed
+        stats.wire_bytes_out += wire_size
+        stats.body_bytes_out += body_size
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        return {endpoint: vars(stats).copy() for endpoint, stats in self._endpoints.items()}
+
+
+def decode_body(content: bytes, encoding: str | None) -> tuple[bytes, float]:
+    """
+    :return: Decoded body and seconds spent to decode it
+    """
+    started_at = time.perf_counter()
+    decoder = get_decoder(encoding)
+    body = decoder.decompress(content)
+    return body, time.perf_counter() - started_at
@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from src.utils import config
+
+
+@dataclass
+class CachedResponse:
+    """Last successful response of url with its validators"""
+    content: bytes
+    headers: dict[str, str]
+    etag: str | None
+    last_modified: str | None
+
+
+class ConditionalCache:
+    """
+    LRU cache of GET responses that have 'ETag' or 'Last-Modified' validators.
+    Cached response is never served without asking backend, it's used only when backend answers 304
+    """
+
+    def __init__(
+            self,
+            max_entries: int = config.BACKEND_HTTP_CACHE_MAX_ENTRIES,
+            max_bytes: int = config.BACKEND_HTTP_CACHE_MAX_BYTES
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._size = 0
+
+        self.hits = 0  # 304 answered from cache
+        self.misses = 0  # Full response received
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """Bytes of cached bodies"""
+        return self._size
+
+    @staticmethod
+    def get_conditional_headers(entry: CachedResponse | None) -> dict[str, str]:
+        """Headers to make request conditional, empty if url not cached"""
+        if entry is None:
+            return {}
+
+        headers = {}
+        if entry.etag is not None:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified is not None:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def get(self, url: str) -> CachedResponse | None:
+        entry = self._entries.get(url)
+        if entry is not None:
+            self._entries.move_to_end(url)
+        return entry
+
+    def record_hit(self) -> None:
+        self.hits += 1
+
+    def store(self, url: str, content: bytes, headers: dict[str, str]) -> None:
+        """Store response if it has validators, otherwise drop old entry of url"""
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        self.misses += 1
+        self.invalidate(url)
+        if etag is None and last_modified is None:
+            return
+        if len(content) > self.max_bytes:
+            return
+
+        self._entries[url] = CachedResponse(content=content, headers=headers, etag=etag, last_modified=last_modified)
+        self._size += len(content)
+        while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted.content)
+            self.evictions += 1
+
+    def invalidate(self, url: str) -> None:
+        entry = self._entries.pop(url, None)
+        if entry is not None:
+            self._size -= len(entry.content)
@@ -0,0 +1,63 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Iterator
+
+from src.utils import statuses
+from src.utils.exceptions.request import DeadlineExceeded
+
+# time.monotonic() moment current update must be handled before, None means no deadline
+_deadline: ContextVar[float | None] = ContextVar("backend_deadline", default=None)
+
+
+def get_remaining_time() -> float | None:
+    """Seconds left until deadline of current context, None if there is no deadline"""
+    deadline_at = _deadline.get()
+    if deadline_at is None:
+        return None
+    return deadline_at - time.monotonic()
+
+
+def clear_deadline() -> None:
+    """Remove deadline of current context, for work shared by callers with different deadlines"""
+    _deadline.set(None)
+
+
+@contextmanager
+def deadline(timeout: float) -> Iterator[None]:
+    """
+    Set deadline for all backend calls inside block and in tasks started from it.
+    Nested deadline can't extend outer one
+    :param timeout: Seconds from now
+    """
+    deadline_at = time.monotonic() + timeout
+    outer = _deadline.get()
+    if outer is not None:
+        deadline_at = min(deadline_at, outer)
+    token = _deadline.set(deadline_at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@asynccontextmanager
+async def deadline_timeout(msg: str) -> AsyncIterator[None]:
+    """
+    Cancel block when deadline of current context is gone
+    :param msg: Description of call for exception message
+    :raise DeadlineExceeded: If there is no time left before or while block runs
+    """
+    remaining = get_remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded(status=statuses.GATEWAY_TIMEOUT_504, msg=f"{msg} - deadline exceeded before call")
+
+    timeout = asyncio.timeout(remaining)
+    try:
+        async with timeout:
+            yield
+    except TimeoutError as err:
+        if timeout.expired():
+            raise DeadlineExceeded(status=statuses.GATEWAY_TIMEOUT_504, msg=f"{msg} - deadline exceeded") from err
+        raise
@@ -0,0 +1,8 @@
+def get_endpoint_family(url: str) -> str:
+    """Endpoint family is first url path segment: users, themes, notes, alarms, auth"""
+    return url.lstrip("/").split("/", 1)[0].split("?", 1)[0]
+
+
+def get_endpoint(url: str) -> str:
+    """Endpoint is family and method path segments without ids and query: notes/get_all_notes_by_user_id"""
+    return "/".join(url.lstrip("/").split("?", 1)[0].split("/")[:2])
@@ -0,0 +1,128 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+from src.services.requests.endpoint_family import get_endpoint_family
+from src.utils import config
+
+
+class LatencyTracker:
+    """Rolling window of request latencies"""
+
+    def __init__(self, window: int = config.BACKEND_HEDGE_WINDOW) -> None:
+        self._latencies: deque[float] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._latencies)
+
+    def add(self, latency: float) -> None:
+        self._latencies.append(latency)
+
+    def percentile(self, percent: float) -> float | None:
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+        return ordered[index]
+
+
+class HedgeBudget:
+    """Token bucket: every request earns `ratio` token, every hedge spends one, so hedges <= ratio of requests"""
+
+    def __init__(self, ratio: float = config.BACKEND_HEDGE_BUDGET_RATIO, max_tokens: float = 10.0) -> None:
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = 0.0
+
+    def on_request(self) -> None:
+        self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+class Hedger:
+    """
+    Send second identical request if the first one has not answered within latency percentile of endpoint family.
+    First answer wins, the other request is cancelled
+    """
+
+    def __init__(
+            self,
+            enabled: bool = config.BACKEND_HEDGING_ENABLED,
+            percentile: float = config.BACKEND_HEDGE_PERCENTILE,
+            min_samples: int = config.BACKEND_HEDGE_MIN_SAMPLES
+    ) -> None:
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.budget = HedgeBudget()
+        self._trackers: dict[str, LatencyTracker] = {}
+
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_won = 0  # Hedge request answered before first one
+
+    def get_tracker(self, url: str) -> LatencyTracker:
+        family = get_endpoint_family(url)
+        tracker = self._trackers.get(family)
+        if tracker is None:
+            tracker = self._trackers[family] = LatencyTracker()
+        return tracker
+
+    def get_hedge_delay(self, url: str) -> float | None:
+        """Seconds to wait before hedge, None if there are not enough latency samples yet"""
+        tracker = self.get_tracker(url)
+        if len(tracker) < self.min_samples:
+            return None
+        return tracker.percentile(self.percentile)
+
+    async def run(self, url: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        :param url: Request url, used to find endpoint family latency
+        :param call: Makes coroutine of one request attempt, may be called twice
+        """
+        tracker = self.get_tracker(url)
+        delay = self.get_hedge_delay(url)
+        self.requests += 1
+        self.budget.on_request()
+
+        async def timed_call() -> Any:
+            started_at = time.monotonic()
+            result = await call()
+            tracker.add(time.monotonic() - started_at)
+            return result
+
+        first = asyncio.ensure_future(timed_call())
+        tasks = {first}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self.budget.try_spend():
+                    self.hedged += 1
+                    tasks.add(asyncio.ensure_future(timed_call()))
+
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_won += 1
+                        return task.result()
+            # Every attempt failed, error of the first one is raised
+            return first.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_won": self.hedge_won,
+            "delays": {family: tracker.percentile(self.percentile) for family, tracker in self._trackers.items()},
+        }
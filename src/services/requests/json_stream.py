@@ -0,0 +1,84 @@
+import codecs
+import json
+from typing import Any, AsyncIterator
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]"
+
+
+class JsonArrayDecoder:
+    """
+    Incremental decoder of top-level json array.
+    Feed it body chunks as they come and get every array element as soon as it is complete
+    """
+
+    def __init__(self) -> None:
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._started = False
+        self._finished = False
+        self._expect_item = True  # False after element, until ',' is read
+
+    def feed(self, chunk: bytes) -> list[Any]:
+        """
+        :param chunk: Next part of json array bytes
+        :return: Elements completed by this chunk
+        """
+        self._buffer += self._text_decoder.decode(chunk)
+        items = []
+        pos = 0
+        buffer = self._buffer
+
+        while not self._finished:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= len(buffer):
+                break
+
+            if not self._started:
+                if buffer[pos] != "[":
+                    raise ValueError(f"Json array expected, got: {buffer[pos:pos + 20]!r}")
+                self._started = True
+                pos += 1
+                continue
+
+            if buffer[pos] == "]":
+                self._finished = True
+                pos += 1
+                break
+
+            if not self._expect_item:
+                if buffer[pos] != ",":
+                    raise ValueError(f"',' or ']' expected, got: {buffer[pos:pos + 20]!r}")
+                self._expect_item = True
+                pos += 1
+                continue
+
+            try:
+                item, end = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # Element is not complete yet, wait for next chunk
+            if end >= len(buffer) or buffer[end] not in _DELIMITERS:
+                break  # Scalar may be cut in the middle, like number '4' of '4.5'. Wait for next chunk
+            items.append(item)
+            self._expect_item = False
+            pos = end
+
+        self._buffer = buffer[pos:]
+        return items
+
+    def close(self) -> None:
+        """Check that whole array was received"""
+        self._buffer += self._text_decoder.decode(b"", final=True)
+        if not self._finished or self._buffer.strip():
+            raise ValueError(f"Json array is not complete, rest: {self._buffer[:100]!r}")
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """Yield elements of json array read from stream of bytes chunks"""
+    decoder = JsonArrayDecoder()
+    async for chunk in chunks:
+        for item in decoder.feed(chunk):
+            yield item
+    decoder.close()
@@ -0,0 +1,150 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import Enum
+from typing import AsyncIterator, Iterator
+
+from src.utils import config
+
+
+class RequestLane(str, Enum):
+    """Backend traffic lanes, in priority order"""
+    INTERACTIVE = "INTERACTIVE"  # User handlers, user is waiting for answer
+    SCHEDULER = "SCHEDULER"  # Scheduler jobs
+    MAINTENANCE = "MAINTENANCE"  # Background work nobody waits for: warm up, prefetch
+
+
+_current_lane: ContextVar[RequestLane] = ContextVar("request_lane", default=RequestLane.INTERACTIVE)
+
+
+def get_current_lane() -> RequestLane:
+    return _current_lane.get()
+
+
+def raise_lane(lane: RequestLane) -> None:
+    """Move current context to lane if lane has higher priority"""
+    lanes = list(RequestLane)
+    if lanes.index(lane) < lanes.index(_current_lane.get()):
+        _current_lane.set(lane)
+
+
+@contextmanager
+def request_lane(lane: RequestLane) -> Iterator[None]:
+    """All backend requests made inside this block (and tasks started from it) go to the lane"""
+    token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+@dataclass
+class LaneStats:
+    limit: int
+    in_flight: int = 0
+    queued: int = 0
+    max_queued: int = 0
+    started: int = 0
+    total_wait: float = 0.0  # Seconds requests waited in queue
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "started": self.started,
+            "avg_wait": self.total_wait / self.started if self.started else 0.0,
+        }
+
+
+class LaneScheduler:
+    """
+    Bulkhead per lane plus one shared backend concurrency limit.
+    When shared limit is reached, free slot goes to the waiter of the highest priority lane
+    """
+
+    def __init__(
+            self,
+            total_limit: int = config.BACKEND_MAX_CONCURRENCY,
+            lane_limits: dict[RequestLane, int] | None = None
+    ) -> None:
+        if lane_limits is None:
+            lane_limits = {
+                RequestLane.INTERACTIVE: config.BACKEND_LANE_INTERACTIVE_LIMIT,
+                RequestLane.SCHEDULER: config.BACKEND_LANE_SCHEDULER_LIMIT,
+                RequestLane.MAINTENANCE: config.BACKEND_LANE_MAINTENANCE_LIMIT,
+            }
+        self.total_limit = total_limit
+        self._in_flight = 0
+        self._stats = {lane: LaneStats(limit=lane_limits[lane]) for lane in RequestLane}
+        self._waiters: dict[RequestLane, deque[asyncio.Future]] = {lane: deque() for lane in RequestLane}
+
+    def _can_start(self, lane: RequestLane) -> bool:
+        stats = self._stats[lane]
+        return self._in_flight < self.total_limit and stats.in_flight < stats.limit
+
+    def _start(self, lane: RequestLane, wait: float) -> None:
+        stats = self._stats[lane]
+        self._in_flight += 1
+        stats.in_flight += 1
+        stats.started += 1
+        stats.total_wait += wait
+
+    async def acquire(self, lane: RequestLane) -> None:
+        """Wait for free slot in lane"""
+        # Waiters are woken up on every release, so if slot is free now, nobody waits for it
+        if self._can_start(lane):
+            self._start(lane, 0.0)
+            return
+
+        stats = self._stats[lane]
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append(waiter)
+        stats.queued += 1
+        stats.max_queued = max(stats.max_queued, stats.queued)
+        queued_at = time.monotonic()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(lane)  # Slot was given right before cancel
+            elif waiter in self._waiters[lane]:
+                self._waiters[lane].remove(waiter)
+                stats.queued -= 1
+            raise
+        stats.total_wait += time.monotonic() - queued_at
+
+    def release(self, lane: RequestLane) -> None:
+        self._in_flight -= 1
+        self._stats[lane].in_flight -= 1
+        self._wake_up()
+
+    def _wake_up(self) -> None:
+        for lane in RequestLane:
+            waiters = self._waiters[lane]
+            while waiters and self._can_start(lane):
+                waiter = waiters.popleft()
+                self._stats[lane].queued -= 1
+                if waiter.done():
+                    continue  # Cancelled, its task cleans up
+                self._start(lane, 0.0)
+                waiter.set_result(None)
+            if self._in_flight >= self.total_limit:
+                return
+
+    @asynccontextmanager
+    async def slot(self, lane: RequestLane | None = None) -> AsyncIterator[None]:
+        """Hold slot of lane, by default of current context lane"""
+        lane = lane if lane is not None else get_current_lane()
+        await self.acquire(lane)
+        try:
+            yield
+        finally:
+            self.release(lane)
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        return {lane.value: stats.as_dict() for lane, stats in self._stats.items()}
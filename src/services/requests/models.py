@@ -0,0 +1,39 @@
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, AsyncIterator, Callable
+
+from src.utils.json_backend import json_loads
+
+
+@dataclass
+class ResponseModel:
+    """
+    Backend response. Raw body bytes are kept as is, validate them directly with
+    `Model.model_validate_json(response.content)` without decoding to str first
+    """
+    content: bytes
+    status: int
+    headers: dict[str, str] = field(default_factory=dict)  # Lower-cased header names
+
+    @cached_property
+    def body(self) -> str:
+        """Body decoded to str, only for places which really need text"""
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        """Parse body as json with the fastest available json backend"""
+        return json_loads(self.content)
+
+
+@dataclass
+class StreamResponseModel:
+    """Backend response which body is not read yet. Read it by chunks with `iter_chunks`"""
+    status: int
+    headers: dict[str, str]
+    _chunks: Callable[[int], AsyncIterator[bytes]]  # Transport body reader, takes chunk size
+
+    def iter_chunks(self, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+        return self._chunks(chunk_size)
+
+    async def read(self) -> bytes:
+        return b"".join([chunk async for chunk in self._chunks(64 * 1024)])
@@ -0,0 +1,123 @@
+import asyncio
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import aiohttp
+
+from src.utils import statuses, config
+from src.utils.request_methods import RequestMethods
+
+# Errors raised by aiohttp when request didn't reach backend or connection was lost
+TRANSPORT_ERRORS: tuple[type[Exception], ...] = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter.
+    Delay before retry n is random in [0, min(max_delay, base_delay * 2 ** n)]
+    """
+    max_attempts: int
+    base_delay: float = 0.0
+    max_delay: float = 0.0
+    budget: float = 0.0  # Max seconds of one call spent in retries
+    retry_statuses: frozenset[int] = frozenset()
+
+    def is_retryable_status(self, status: int) -> bool:
+        return status in self.retry_statuses
+
+    def get_delay(self, attempt: int, started_at: float, retry_after: float | None = None,
+                  remaining: float | None = None) -> float | None:
+        """
+        :param attempt: Number of attempts already made
+        :param started_at: time.monotonic() of first attempt
+        :param retry_after: Delay asked by backend in 'Retry-After' header
+        :param remaining: Seconds left until caller deadline, no retry if it will be gone after delay
+        :return: Seconds to wait before next attempt or None if no more attempts allowed
+        """
+        if attempt >= self.max_attempts:
+            return None
+
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        spent = time.monotonic() - started_at
+        if spent + delay > self.budget:
+            return None
+        if remaining is not None and delay >= remaining:
+            return None
+        return delay
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+IDEMPOTENT_RETRY = RetryPolicy(
+    max_attempts=config.BACKEND_RETRY_MAX_ATTEMPTS,
+    base_delay=config.BACKEND_RETRY_BASE_DELAY,
+    max_delay=config.BACKEND_RETRY_MAX_DELAY,
+    budget=config.BACKEND_RETRY_BUDGET,
+    retry_statuses=frozenset((
+        statuses.TOO_MANY_REQUESTS_429,
+        statuses.BAD_GATEWAY_502,
+        statuses.SERVICE_UNAVAILABLE_503,
+        statuses.GATEWAY_TIMEOUT_504,
+    )),
+)
+
+_methods = RequestMethods()
+RETRY_POLICIES: dict[str, RetryPolicy] = {
+    _methods.GET: IDEMPOTENT_RETRY,
+    _methods.DELETE: IDEMPOTENT_RETRY,
+    _methods.POST: NO_RETRY,
+    _methods.PATCH: NO_RETRY,
+}
+
+
+def get_retry_policy(method: str, idempotency_key: str | None = None) -> RetryPolicy:
+    """
+    :param method: Http method
+    :param idempotency_key: Request with idempotency key may be retried whatever its method,
+    backend answers repeated request with result of the first one
+    """
+    if idempotency_key is not None:
+        return IDEMPOTENT_RETRY
+    return RETRY_POLICIES.get(method, NO_RETRY)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse 'Retry-After' header, it may be seconds or http date"""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass
+class RetryStats:
+    """Retry counters by http method"""
+    calls: Counter = field(default_factory=Counter)
+    retries: Counter = field(default_factory=Counter)
+    recovered: Counter = field(default_factory=Counter)  # Calls succeeded after at least one retry
+    exhausted: Counter = field(default_factory=Counter)  # Calls failed after all allowed attempts
+
+    def as_dict(self) -> dict[str, dict[str, int]]:
+        return {
+            "calls": dict(self.calls),
+            "retries": dict(self.retries),
+            "recovered": dict(self.recovered),
+            "exhausted": dict(self.exhausted),
+        }
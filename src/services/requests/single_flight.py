@@ -0,0 +1,71 @@
+import asyncio
+import contextvars
+from dataclasses import dataclass
+from typing import Any, Callable, Coroutine, Hashable
+
+from src.services.requests.deadline import clear_deadline
+from src.services.requests.lanes import get_current_lane, raise_lane
+
+
+@dataclass
+class _Flight:
+    task: asyncio.Task
+    context: contextvars.Context  # Context call runs in
+    waiters: int = 0
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one call.
+    Every caller awaits the same task and gets the same result or exception
+    """
+
+    def __init__(self) -> None:
+        self._in_flight: dict[Hashable, _Flight] = {}
+        self.calls = 0  # Calls that started new task
+        self.shared = 0  # Calls that joined task already in flight
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._in_flight
+
+    async def do(self, key: Hashable, func: Callable[[], Coroutine[Any, Any, Any]]) -> Any:
+        """
+        Call serves all its callers: it runs without deadline, each caller stops waiting by its own one,
+        and in the highest priority lane of its callers. Call is cancelled when all its callers stopped waiting
+        :param key: Calls with equal keys are collapsed
+        :param func: Makes coroutine to run if no call with this key is in flight
+        """
+        flight = self._in_flight.get(key)
+        if flight is None:
+            self.calls += 1
+            context = contextvars.copy_context()
+            context.run(clear_deadline)
+            flight = _Flight(asyncio.get_running_loop().create_task(func(), context=context), context)
+            self._in_flight[key] = flight
+            flight.task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.shared += 1
+            # Requests of call which haven't got lane slot yet go to lane of the most urgent caller
+            flight.context.run(raise_lane, get_current_lane())
+
+        flight.waiters += 1
+        try:
+            # One caller cancellation must not cancel call for the others
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                # Nobody waits for result, new caller starts new call instead of joining cancelled one
+                flight.task.cancel()
+                if self._in_flight.get(key) is flight:
+                    del self._in_flight[key]
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        flight = self._in_flight.get(key)
+        if flight is not None and flight.task is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()  # Mark exception as retrieved, if all callers were cancelled
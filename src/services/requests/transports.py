@@ -0,0 +1,542 @@
+import asyncio
+import importlib
+import itertools
+import time
+import zlib
+from abc import ABC, abstractmethod
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from logging import getLogger
+from typing import Any, AsyncIterator, Callable
+from urllib.parse import urlencode, urlsplit
+
+import aiohttp
+
+from src.services.requests.compression import ACCEPT_ENCODING, WireStats, compress, decode_body, get_decoder, \
+    get_request_encoding
+from src.services.requests.models import ResponseModel, StreamResponseModel
+from src.utils import config
+from src.utils.json_backend import json_dumps, json_loads
+
+UNIX_SCHEME = "unix://"
+ASGI_SCHEME = "asgi://"
+WS_SCHEMES = ("ws://", "wss://")
+
+
+class ITransport(ABC):
+    """Deliver requests to backend. Urls are relative to backend host"""
+
+    @abstractmethod
+    async def open(self) -> None:
+        ...
+
+    @abstractmethod
+    async def close(self) -> None:
+        ...
+
+    @abstractmethod
+    async def request(self, method: str, url: str, headers: dict[str, str], body: dict | None = None,
+                      data: dict | None = None) -> ResponseModel:
+        """Send request and read whole response body"""
+        ...
+
+    @abstractmethod
+    def stream(self, method: str, url: str,
+               headers: dict[str, str]) -> AbstractAsyncContextManager[StreamResponseModel]:
+        """Send request and return response which body is read by chunks, use as `async with`"""
+        ...
+
+    async def warm_up(self, connections: int) -> int:
+        """
+        Open connections to backend before first requests
+        :return: Number of opened connections
+        """
+        return 0
+
+
+class AiohttpTransport(ITransport, ABC):
+    """
+    Transport over shared aiohttp session. Connections are pooled and kept alive between requests.
+    Response compression is negotiated and decoded here, not by aiohttp, to count bytes on wire
+    """
+
+    def __init__(self, base_url: str, wire_stats: WireStats | None = None) -> None:
+        self._logger = getLogger("app.transport")
+        self.base_url = base_url.rstrip("/")
+        self.wire_stats = wire_stats if wire_stats is not None else WireStats()
+        self._session: aiohttp.ClientSession | None = None
+
+    @abstractmethod
+    def create_connector(self) -> aiohttp.BaseConnector:
+        ...
+
+    async def open(self) -> None:
+        await self.get_session()
+
+    async def close(self) -> None:
+        if self._session is None:
+            return
+
+        await self._session.close()
+        self._session = None
+        self._logger.info(f"Close backend session - {self!r}")
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Return shared session, open it if it not opened yet"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=self.create_connector(),
+                timeout=aiohttp.ClientTimeout(total=config.BACKEND_REQUEST_TIMEOUT),
+                auto_decompress=False
+            )
+            self._logger.info(f"Open backend session - {self!r} - pool size: {config.BACKEND_POOL_SIZE}")
+        return self._session
+
+    async def warm_up(self, connections: int) -> int:
+        """Open pooled connections by concurrent HEAD requests to backend root, they stay in pool as keep-alive"""
+        session = await self.get_session()
+
+        async def touch() -> None:
+            async with session.head(f"{self.base_url}/", allow_redirects=False) as r:
+                await r.read()
+
+        results = await asyncio.gather(*(touch() for _ in range(connections)), return_exceptions=True)
+        opened = sum(not isinstance(result, BaseException) for result in results)
+        self._logger.info(f"Warm up {self!r} - opened connections: {opened}/{connections}")
+        return opened
+
+    def encode_request(self, url: str, headers: dict[str, str], body: dict | None,
+                       data: dict | None) -> tuple[dict[str, str], Any]:
+        """
+        Add 'Accept-Encoding' and serialize json body. Body larger than threshold is compressed if it's enabled
+        :return: Request headers and payload
+        """
+        headers = {**headers, "Accept-Encoding": ACCEPT_ENCODING}
+        if body is None:
+            return headers, data
+
+        content = json_dumps(body)
+        headers["Content-Type"] = "application/json"
+        is_compressed = config.BACKEND_COMPRESS_REQUESTS and len(content) >= config.BACKEND_COMPRESS_THRESHOLD
+        payload = compress(content) if is_compressed else content
+        if is_compressed:
+            headers["Content-Encoding"] = get_request_encoding()
+        self.wire_stats.record_request(url, len(payload), len(content), is_compressed)
+        return headers, payload
+
+    @staticmethod
+    def get_response_headers(r: aiohttp.ClientResponse) -> tuple[dict[str, str], str | None]:
+        """
+        :return: Lower-cased headers of decoded body and content encoding
+        """
+        headers = {k.lower(): v for k, v in r.headers.items()}
+        encoding = headers.pop("content-encoding", None)
+        if encoding is not None:
+            headers.pop("content-length", None)
+        return headers, encoding
+
+    async def request(self, method: str, url: str, headers: dict[str, str], body: dict | None = None,
+                      data: dict | None = None) -> ResponseModel:
+        session = await self.get_session()
+        headers, payload = self.encode_request(url, headers, body, data)
+        async with session.request(method, f"{self.base_url}/{url}", data=payload, headers=headers) as r:
+            wire_content = await r.read()
+            response_headers, encoding = self.get_response_headers(r)
+
+        try:
+            content, decode_seconds = decode_body(wire_content, encoding)
+        except (ValueError, zlib.error) as err:
+            raise aiohttp.ClientPayloadError(f"Can't decode response body - url: {url}: {err!r}") from err
+        self.wire_stats.record_response(url, len(wire_content), len(content), decode_seconds)
+        return ResponseModel(content=content, status=r.status, headers=response_headers)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, headers: dict[str, str]) -> AsyncIterator[StreamResponseModel]:
+        session = await self.get_session()
+        headers, _ = self.encode_request(url, headers, None, None)
+        # Body may come longer than usual request, so limit only time between chunks
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=config.BACKEND_REQUEST_TIMEOUT)
+        r = await session.request(method, f"{self.base_url}/{url}", headers=headers, timeout=timeout)
+        response_headers, encoding = self.get_response_headers(r)
+
+        async def iter_chunks(chunk_size: int) -> AsyncIterator[bytes]:
+            wire_size = body_size = 0
+            decode_seconds = 0.0
+            try:
+                decoder = get_decoder(encoding)
+                async for chunk in r.content.iter_chunked(chunk_size):
+                    started_at = time.perf_counter()
+                    body = decoder.decompress(chunk)
+                    decode_seconds += time.perf_counter() - started_at
+                    wire_size += len(chunk)
+                    body_size += len(body)
+                    if body:
+                        yield body
+            except (ValueError, zlib.error) as err:
+                raise aiohttp.ClientPayloadError(f"Can't decode response body - url: {url}: {err!r}") from err
+            finally:
+                self.wire_stats.record_response(url, wire_size, body_size, decode_seconds)
+
+        try:
+            yield StreamResponseModel(status=r.status, headers=response_headers, _chunks=iter_chunks)
+        finally:
+            r.release()
+
+
+class TCPTransport(AiohttpTransport):
+
+    def create_connector(self) -> aiohttp.BaseConnector:
+        return aiohttp.TCPConnector(
+            limit=config.BACKEND_POOL_SIZE,
+            keepalive_timeout=config.BACKEND_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=config.BACKEND_DNS_CACHE_TTL,
+        )
+
+    def __repr__(self) -> str:
+        return f"TCPTransport({self.base_url})"
+
+
+class UnixSocketTransport(AiohttpTransport):
+    """Co-located backend listening Unix domain socket, no TCP/IP stack and DNS on the way"""
+
+    def __init__(self, path: str, wire_stats: WireStats | None = None) -> None:
+        super().__init__("http://localhost", wire_stats)
+        self.path = path
+
+    def create_connector(self) -> aiohttp.BaseConnector:
+        return aiohttp.UnixConnector(
+            path=self.path,
+            limit=config.BACKEND_POOL_SIZE,
+            keepalive_timeout=config.BACKEND_KEEPALIVE_TIMEOUT,
+        )
+
+    def __repr__(self) -> str:
+        return f"UnixSocketTransport({self.path})"
+
+
+class ASGITransport(ITransport):
+    """
+    Call ASGI application in the same process, request never leaves event loop.
+    For co-located backend and test stand-ins, also to benchmark bot-side overhead without network
+    """
+
+    def __init__(self, app: Callable[..., Any], root_path: str = "") -> None:
+        self.app = app
+        self.root_path = root_path
+
+    async def open(self) -> None:
+        return
+
+    async def close(self) -> None:
+        return
+
+    @staticmethod
+    def encode_body(headers: dict[str, str], body: dict | None, data: dict | None) -> tuple[bytes, dict[str, str]]:
+        """Encode json body or form data the same way aiohttp does"""
+        headers = dict(headers)
+        if body is not None:
+            headers.setdefault("Content-Type", "application/json")
+            return json_dumps(body), headers
+        if data is not None:
+            headers.setdefault("Content-Type", "application/x-www-form-urlencoded")
+            return urlencode(data).encode(), headers
+        return b"", headers
+
+    async def request(self, method: str, url: str, headers: dict[str, str], body: dict | None = None,
+                      data: dict | None = None) -> ResponseModel:
+        async with asyncio.timeout(config.BACKEND_REQUEST_TIMEOUT):
+            async with self._call(method, url, headers, body, data) as response:
+                return ResponseModel(content=await response.read(), status=response.status, headers=response.headers)
+
+    def stream(self, method: str, url: str,
+               headers: dict[str, str]) -> AbstractAsyncContextManager[StreamResponseModel]:
+        return self._call(method, url, headers)
+
+    @asynccontextmanager
+    async def _call(self, method: str, url: str, headers: dict[str, str], body: dict | None = None,
+                    data: dict | None = None) -> AsyncIterator[StreamResponseModel]:
+        content, headers = self.encode_body(headers, body, data)
+        parts = urlsplit(f"/{url}")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": parts.path,
+            "raw_path": parts.path.encode(),
+            "query_string": parts.query.encode(),
+            "root_path": self.root_path,
+            "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+            + [(b"content-length", str(len(content)).encode())],
+            "client": ("127.0.0.1", 0),
+            "server": ("localhost", 80),
+        }
+        # Small queue gives backpressure: application waits while consumer reads previous chunks
+        messages: asyncio.Queue[dict] = asyncio.Queue(maxsize=8)
+        request_sent = False
+        disconnected = asyncio.Event()
+
+        async def receive() -> dict:
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": content, "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def run_app() -> None:
+            try:
+                await self.app(scope, receive, messages.put)
+            except Exception as err:
+                end = {"type": "app.error", "error": err}
+            else:
+                end = {"type": "http.response.body", "body": b"", "more_body": False}
+            await messages.put(end)
+
+        task = asyncio.create_task(run_app())
+        try:
+            start = await self._next_message(messages)
+            if start["type"] != "http.response.start":
+                raise aiohttp.ServerDisconnectedError(f"ASGI application didn't answer - url: {url}")
+
+            async def iter_chunks(chunk_size: int) -> AsyncIterator[bytes]:
+                while True:
+                    message = await self._next_message(messages)
+                    if message.get("body"):
+                        yield message["body"]
+                    if not message.get("more_body", False):
+                        return
+
+            yield StreamResponseModel(
+                status=start["status"],
+                headers={k.decode().lower(): v.decode() for k, v in start.get("headers", [])},
+                _chunks=iter_chunks
+            )
+        finally:
+            disconnected.set()
+            if not task.done():
+                task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    @staticmethod
+    async def _next_message(messages: asyncio.Queue[dict]) -> dict:
+        """Next message sent by application. Application error is raised as lost connection"""
+        message = await messages.get()
+        if message["type"] == "app.error":
+            raise aiohttp.ServerDisconnectedError(f"ASGI application failed: {message['error']!r}")
+        return message
+
+    def __repr__(self) -> str:
+        return f"ASGITransport({self.app!r})"
+
+
+class WebSocketTransport(ITransport):
+    """
+    Multiplex requests over one persistent WebSocket. Every request frame has id,
+    backend answers with frames of the same id in any order, so slow request doesn't hold others.
+    Frames are json: request - {id, method, url, headers, body, data},
+    response - {id, status, headers, body, more}, body of long response may come in several frames with `more`
+    """
+
+    def __init__(self, url: str, wire_stats: WireStats | None = None,
+                 max_in_flight: int = config.BACKEND_WS_MAX_IN_FLIGHT) -> None:
+        """
+        :param url: WebSocket endpoint of backend
+        :param max_in_flight: Max requests waiting response, others wait for free slot
+        """
+        self._logger = getLogger("app.transport")
+        self.url = url
+        self.wire_stats = wire_stats if wire_stats is not None else WireStats()
+        self._session: aiohttp.ClientSession | None = None
+        self._ws: aiohttp.ClientWebSocketResponse | None = None
+        self._reader: asyncio.Task | None = None
+        # Response frames queues by request id of current connection
+        self._pending: dict[int, asyncio.Queue[dict]] = {}
+        self._ids = itertools.count(1)
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._connect_lock = asyncio.Lock()
+        self._reconnect_delay = 0.0
+
+    async def open(self) -> None:
+        """Connection is opened by first request or warm-up"""
+        await self.get_session()
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Return session WebSocket is connected by, open it if it not opened yet"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=None, connect=config.BACKEND_REQUEST_TIMEOUT)
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._ws is not None:
+            await self._ws.close()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+            self._reader = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        self._logger.info(f"Close backend session - {self!r}")
+
+    async def warm_up(self, connections: int) -> int:
+        """All requests share one connection. Backend being down is logged only, connection is opened by request"""
+        try:
+            await self._connect()
+        except aiohttp.ClientConnectionError as err:
+            self._logger.warning(f"Warm up {self!r} failed: {err!r}")
+            return 0
+        return 1
+
+    async def _connect(self) -> aiohttp.ClientWebSocketResponse:
+        """Return open WebSocket, reconnect if it was lost. Attempts after failed one are delayed with backoff"""
+        if self._ws is not None and not self._ws.closed:
+            return self._ws
+
+        async with self._connect_lock:
+            if self._ws is not None and not self._ws.closed:
+                return self._ws
+            session = await self.get_session()
+            await asyncio.sleep(self._reconnect_delay)
+            try:
+                ws = await session.ws_connect(self.url, heartbeat=config.BACKEND_WS_HEARTBEAT)
+            except (aiohttp.ClientError, OSError) as err:
+                self._reconnect_delay = min(max(self._reconnect_delay * 2, 0.1), config.BACKEND_WS_MAX_RECONNECT_DELAY)
+                self._logger.warning(f"Can't connect {self!r}: {err!r}, next attempt in {self._reconnect_delay}s")
+                if isinstance(err, aiohttp.ClientConnectionError):
+                    raise
+                raise aiohttp.ClientConnectionError(f"Can't connect {self!r}: {err!r}") from err
+
+            self._reconnect_delay = 0.0
+            self._ws, self._pending = ws, {}
+            self._reader = asyncio.create_task(self._read(ws, self._pending))
+            self._logger.info(f"Open backend session - {self!r}")
+            return ws
+
+    async def _read(self, ws: aiohttp.ClientWebSocketResponse, pending: dict[int, asyncio.Queue[dict]]) -> None:
+        """
+        Route response frames to waiting requests, malformed frames are skipped.
+        When connection is lost, all its requests fail and the next request reconnects
+        """
+        try:
+            async for message in ws:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                try:
+                    frame = json_loads(message.data)
+                except ValueError as err:
+                    self._logger.warning(f"Skip malformed frame of {self!r}: {err!r}")
+                    continue
+                if not isinstance(frame, dict):
+                    self._logger.warning(f"Skip frame of {self!r} which isn't object: {message.data[:100]!r}")
+                    continue
+                request_id = frame.get("id")
+                queue = pending.get(request_id) if isinstance(request_id, int) else None
+                # Response of request which already gave up waiting is dropped
+                if queue is not None:
+                    queue.put_nowait(frame)
+        except Exception as err:
+            self._logger.warning(f"Can't read {self!r}: {err!r}")
+        finally:
+            self._logger.info(f"Backend session lost - {self!r} - pending requests: {len(pending)}")
+            for queue in pending.values():
+                queue.put_nowait({"lost": True})
+            pending.clear()
+            if self._ws is ws:
+                self._ws = None
+            await ws.close()
+
+    async def request(self, method: str, url: str, headers: dict[str, str], body: dict | None = None,
+                      data: dict | None = None) -> ResponseModel:
+        async with asyncio.timeout(config.BACKEND_REQUEST_TIMEOUT):
+            async with self._exchange(method, url, headers, body, data) as response:
+                return ResponseModel(content=await response.read(), status=response.status, headers=response.headers)
+
+    def stream(self, method: str, url: str,
+               headers: dict[str, str]) -> AbstractAsyncContextManager[StreamResponseModel]:
+        return self._exchange(method, url, headers)
+
+    @asynccontextmanager
+    async def _exchange(self, method: str, url: str, headers: dict[str, str], body: dict | None = None,
+                        data: dict | None = None) -> AsyncIterator[StreamResponseModel]:
+        # Slot is held while response is read, it's backpressure for callers when backend is slow
+        async with self._in_flight:
+            ws = await self._connect()
+            pending = self._pending
+            request_id = next(self._ids)
+            frames: asyncio.Queue[dict] = asyncio.Queue()
+            pending[request_id] = frames
+            try:
+                content = json_dumps({
+                    "id": request_id, "method": method, "url": url, "headers": headers, "body": body, "data": data
+                })
+                self.wire_stats.record_request(url, len(content), len(content), False)
+                try:
+                    await ws.send_str(content.decode())
+                except (ConnectionResetError, RuntimeError) as err:
+                    raise aiohttp.ServerDisconnectedError(f"Backend session lost - {self!r}: {err!r}") from err
+
+                first = await self._next_frame(frames, url)
+                body_size = 0
+
+                async def iter_chunks(chunk_size: int) -> AsyncIterator[bytes]:
+                    nonlocal body_size
+                    frame = first
+                    while True:
+                        chunk = frame.get("body", "").encode()
+                        body_size += len(chunk)
+                        if chunk:
+                            yield chunk
+                        if not frame.get("more", False):
+                            return
+                        frame = await self._next_frame(frames, url)
+
+                try:
+                    yield StreamResponseModel(
+                        status=first["status"],
+                        headers={k.lower(): v for k, v in (first.get("headers") or {}).items()},
+                        _chunks=iter_chunks
+                    )
+                finally:
+                    self.wire_stats.record_response(url, body_size, body_size, 0.0)
+            finally:
+                pending.pop(request_id, None)
+
+    async def _next_frame(self, frames: asyncio.Queue[dict], url: str) -> dict:
+        frame = await frames.get()
+        if frame.get("lost"):
+            raise aiohttp.ServerDisconnectedError(f"Backend session lost while waiting response - url: {url}")
+        return frame
+
+    def __repr__(self) -> str:
+        return f"WebSocketTransport({self.url})"
+
+
+def import_app(path: str) -> Callable[..., Any]:
+    """
+    Import ASGI application by 'module.path:attr' string
+    """
+    module_name, _, attr = path.partition(":")
+    app: Any = importlib.import_module(module_name)
+    for name in (attr or "app").split("."):
+        app = getattr(app, name)
+    return app
+
+
+def create_transport(host: str, wire_stats: WireStats | None = None) -> ITransport:
+    """
+    Create transport by backend host scheme:
+    http(s)://host:port - pooled TCP connections,
+    unix:///path/to/socket - Unix domain socket,
+    asgi://module.path:app - ASGI application in the same process,
+    ws(s)://host:port/path - requests multiplexed over one WebSocket
+    :param wire_stats: Shared bytes on wire counters, network transports write to it
+    """
+    if host.startswith(UNIX_SCHEME):
+        return UnixSocketTransport(host[len(UNIX_SCHEME):], wire_stats)
+    if host.startswith(ASGI_SCHEME):
+        return ASGITransport(import_app(host[len(ASGI_SCHEME):]))
+    if host.startswith(WS_SCHEMES):
+        return WebSocketTransport(host, wire_stats)
+    return TCPTransport(host, wire_stats)
@@ -0,0 +1,85 @@
+"""
+WebSocket side of WebSocketTransport protocol. Gateway answers frames by forwarding them to any transport,
+so it serves as local stand-in of backend for tests or as sidecar in front of HTTP backend
+"""
+import asyncio
+from logging import getLogger
+from typing import AsyncIterator
+
+import aiohttp
+from aiohttp import web
+
+from src.services.requests.transports import ITransport
+from src.utils import config, statuses
+from src.utils.json_backend import json_dumps, json_loads
+
+FRAME_SIZE = 64 * 1024  # Longer bodies are sent by several frames
+
+
+class WebSocketGateway:
+    """Answer every request frame concurrently, responses are sent as soon as they are ready"""
+
+    def __init__(self, transport: ITransport, max_in_flight: int = config.BACKEND_WS_MAX_IN_FLIGHT) -> None:
+        """
+        :param transport: Requests from frames are sent by it
+        :param max_in_flight: Max requests of one connection processed at the same time,
+        connection isn't read while all of them are busy
+        """
+        self._logger = getLogger("app.websocket_gateway")
+        self.transport = transport
+        self.max_in_flight = max_in_flight
+
+    async def handle(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(heartbeat=config.BACKEND_WS_HEARTBEAT)
+        await ws.prepare(request)
+
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        tasks: set[asyncio.Task] = set()
+        try:
+            async for message in ws:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                await in_flight.acquire()
+                task = asyncio.create_task(self._answer(ws, json_loads(message.data)))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                task.add_done_callback(lambda _: in_flight.release())
+        finally:
+            for task in tasks:
+                task.cancel()
+        return ws
+
+    async def _answer(self, ws: web.WebSocketResponse, frame: dict) -> None:
+        request_id = frame.get("id")
+        try:
+            response = await self.transport.request(
+                frame["method"], frame["url"], frame.get("headers") or {}, frame.get("body"), frame.get("data")
+            )
+            status, headers, body = response.status, response.headers, response.content.decode()
+        except Exception as err:
+            self._logger.warning(f"Can't forward request - url: {frame.get('url')}: {err!r}")
+            status, headers, body = statuses.BAD_GATEWAY_502, {}, str(err)
+
+        if ws.closed:
+            return
+        chunks = [body[i:i + FRAME_SIZE] for i in range(0, len(body), FRAME_SIZE)] or [""]
+        await ws.send_str(json_dumps({
+            "id": request_id, "status": status, "headers": headers, "body": chunks[0], "more": len(chunks) > 1
+        }).decode())
+        for i, chunk in enumerate(chunks[1:], start=2):
+            await ws.send_str(json_dumps({"id": request_id, "body": chunk, "more": i < len(chunks)}).decode())
+
+
+def create_gateway_app(transport: ITransport, path: str = "/ws") -> web.Application:
+    gateway = WebSocketGateway(transport)
+    app = web.Application()
+    app.router.add_get(path, gateway.handle)
+
+    async def transport_context(_: web.Application) -> AsyncIterator[None]:
+        await transport.open()
+        yield
+        await transport.close()
+
+    app.cleanup_ctx.append(transport_context)
+    return app
+
@@ -1,34 +1,21 @@
 from logging import getLogger
 
 from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
 from aiogram.utils.formatting import Bold
 
 from src.models.alarm_model import AlarmModel, AlarmStatus
-from src.services.storage.alarms_storage_handler import AlarmsStoragehandler
+from src.services.requests.lanes import request_lane, RequestLane
+from src.services.storage.alarms_storage_handler import get_alarms_storage_handler
 from src.services.storage.interfaces import IAlarmsStoragehandler
 from src.services.ui.inline_keyboards import create_sent_alarm_kb
 from src.utils.exceptions.decorators import handel_storage_unexpected_response
-from src.utils.exceptions.storage import StorageNotFound
+from src.utils.exceptions.storage import StorageException, StorageNotFound
 from src.utils.handlers_utils import async_method_arguments_logger
 
 logger = getLogger(__name__)
 
 
-#  331230161
-
-@handel_storage_unexpected_response
-@async_method_arguments_logger(logger)
-async def check_active_alarms(
-        alarms_storage: IAlarmsStoragehandler = AlarmsStoragehandler()
-) -> list[AlarmModel] | None:
-    """"""
-    try:
-        alarms = await alarms_storage.get_all_ready()
-        return alarms
-    except StorageNotFound:
-        return None
-
-
 @async_method_arguments_logger(logger)
 async def send_alarm_to_user(alarm: AlarmModel, bot: Bot) -> None:
     text = f"{alarm.name}:\n{alarm.description}"
@@ -40,21 +27,37 @@ async def send_alarm_to_user(alarm: AlarmModel, bot: Bot) -> None:
     )
 
 
+async def process_ready_alarm(alarm: AlarmModel, bot: Bot, alarms_storage: IAlarmsStoragehandler) -> None:
+    """Send alarm to user and move it to the next state. Error of one alarm is logged and doesn't stop others"""
+    try:
+        await send_alarm_to_user(alarm, bot)
+        logger.info(f"Successful sent alarm with id: {alarm.id}")
+        if alarm.is_repeatable:
+            await alarms_storage.postpone_repeatable(alarm.id)
+        else:
+            await alarms_storage.update_status(alarm.id, AlarmStatus.FINISH.value)
+    except (TelegramAPIError, StorageException) as err:
+        logger.error(f"Can't process alarm with id: {alarm.id}: {err!r}")
+
+
+@handel_storage_unexpected_response
 @async_method_arguments_logger(logger)
 async def job_check_active_alarms(
         bot: Bot,
-        alarms_storage: IAlarmsStoragehandler = AlarmsStoragehandler()
+        alarms_storage: IAlarmsStoragehandler = get_alarms_storage_handler()
 ) -> None:
-    """"""
-    alarms = await check_active_alarms()
-    if alarms is None:
-        logger.info(f"Not found active alarms")
-        return
-    else:
-        for alarm in alarms:
-            await send_alarm_to_user(alarm, bot)
-            logger.info(f"Successful sent alarm with id: {alarm.id}")
-            if alarm.is_repeatable:
-                await alarms_storage.postpone_repeatable(alarm.id)
-            else:
-                await alarms_storage.update_status(alarm.id, AlarmStatus.FINISH.value)
+    """
+    Ready alarms are streamed, so first alarms are sent before the whole list is received.
+    Requests go to scheduler lane, so big alarms batch doesn't take backend from user handlers
+    """
+    with request_lane(RequestLane.SCHEDULER):
+        alarms = alarms_storage.iter_all_ready()
+        try:
+            alarm = await anext(alarms, None)
+        except StorageNotFound:
+            logger.info(f"Not found active alarms")
+            return
+
+        while alarm is not None:
+            await process_ready_alarm(alarm, bot, alarms_storage)
+            alarm = await anext(alarms, None)
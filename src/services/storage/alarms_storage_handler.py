@@ -1,15 +1,24 @@
-import json
 from datetime import datetime
-from typing import Any, List
+from typing import Any, AsyncIterator, List
 
 from pydantic import ValidationError, TypeAdapter
 
-from src.models.alarm_model import AlarmStatus, AlarmModelToCreate, AlarmModel, AlarmLinkModel
+from src.models.alarm_model import AlarmStatus, AlarmModelToCreate, AlarmModel, AlarmLinkModel, AlarmSummaryModel
+from src.services.requests.json_stream import iter_json_array
+from src.services.storage.cache import get_entity_cache
+from src.services.storage.cached_storage_handlers import CachedAlarmsStorageHandler
 from src.services.storage.interfaces import IAlarmsStoragehandler
-from src.utils import statuses
+from src.services.storage.projection import get_list_url
+from src.services.storage.snapshot_storage_handlers import SnapshotAlarmsStorageHandler
+from src.services.storage.tree_snapshot import get_tree_snapshots
+from src.utils import config, statuses
 from src.utils.exceptions.storage import StorageValidationError, StorageNotFound, UnexpectedResponse
 
 
+alarms_list_adapter = TypeAdapter(List[AlarmModel])  # Need to validate list of pydantic models
+alarms_summaries_adapter = TypeAdapter(List[AlarmSummaryModel])
+
+
 class AlarmsStoragehandler(IAlarmsStoragehandler):
     async def get(self, _id: str) -> AlarmModel:
         """"""
@@ -18,7 +27,7 @@ class AlarmsStoragehandler(IAlarmsStoragehandler):
         match response.status:
             case statuses.SUCCESS_200:
                 try:
-                    return AlarmModel.model_validate_json(response.body)
+                    return AlarmModel.model_validate_json(response.content)
                 except ValidationError as err:
                     self.logger.error(f"StorageValidationError: {str(err)}")
                     raise StorageValidationError(str(err))
@@ -34,9 +43,8 @@ class AlarmsStoragehandler(IAlarmsStoragehandler):
 
         match response.status:
             case statuses.SUCCESS_200:
-                ta = TypeAdapter(List[AlarmModel])  # Need to validate list of pydantic models
                 try:
-                    return ta.validate_json(response.body)
+                    return alarms_list_adapter.validate_json(response.content)
                 except ValidationError as err:
                     self.logger.error(f"StorageValidationError: {str(err)}")
                     raise StorageValidationError(str(err))
@@ -47,15 +55,44 @@ class AlarmsStoragehandler(IAlarmsStoragehandler):
                 self.logger.error(f"Unacceptable response status code: {response.status}")
                 raise UnexpectedResponse(f"Unacceptable response status code: {response.status}")
 
+    async def get_summaries_by_parent(self, _id: str,
+                                      status: list[AlarmStatus] | None = None) -> list[AlarmSummaryModel]:
+        """"""
+        response = await self.request_handler.get(get_list_url(
+            f"alarms/get_all_alarm_by_parent_id/{_id}",
+            AlarmSummaryModel,
+            status=[AlarmStatus(alarm_status).value for alarm_status in status] if status is not None else None
+        ))
+
+        match response.status:
+            case statuses.SUCCESS_200:
+                try:
+                    alarms = alarms_summaries_adapter.validate_json(response.content)
+                except ValidationError as err:
+                    self.logger.error(f"StorageValidationError: {str(err)}")
+                    raise StorageValidationError(str(err))
+                # Backend may ignore filter query param
+                if status is not None:
+                    alarms = [alarm for alarm in alarms if alarm.status in status]
+                    if not alarms:
+                        self.logger.info(f"Storage not found alarms with status {status} relates to entity: {_id}")
+                        raise StorageNotFound(f"Storage not found alarms with status {status} relates to entity: {_id}")
+                return alarms
+            case statuses.NOT_FOUND_404:
+                self.logger.info(f"Storage not found alarms relates to entity with id: {_id}")
+                raise StorageNotFound(f"Storage not found alarms relates to entity with id: {_id}")
+            case _:
+                self.logger.error(f"Unacceptable response status code: {response.status}")
+                raise UnexpectedResponse(f"Unacceptable response status code: {response.status}")
+
     async def get_all_by_user(self, _id: str) -> list[AlarmModel]:
         """"""
         response = await self.request_handler.get(f"alarms/get_all_user_alarms/{_id}")
 
         match response.status:
             case statuses.SUCCESS_200:
-                ta = TypeAdapter(List[AlarmModel])  # Need to validate list of pydantic models
                 try:
-                    return ta.validate_json(response.body)
+                    return alarms_list_adapter.validate_json(response.content)
                 except ValidationError as err:
                     self.logger.error(f"StorageValidationError: {str(err)}")
                     raise StorageValidationError(str(err))
@@ -70,9 +107,8 @@ class AlarmsStoragehandler(IAlarmsStoragehandler):
         response = await self.request_handler.get("alarms/get_all_ready_alarms")
         match response.status:
             case statuses.SUCCESS_200:
-                ta = TypeAdapter(List[AlarmModel])  # Need to validate list of pydantic models
                 try:
-                    return ta.validate_json(response.body)
+                    return alarms_list_adapter.validate_json(response.content)
                 except ValidationError as err:
                     self.logger.error(f"StorageValidationError: {str(err)}")
                     raise StorageValidationError(str(err))
@@ -83,11 +119,42 @@ class AlarmsStoragehandler(IAlarmsStoragehandler):
                 self.logger.error(f"Unacceptable response status code: {response.status}")
                 raise UnexpectedResponse(f"Unacceptable response status code: {response.status}")
 
-    async def create(self, alarm: AlarmModelToCreate, next_notion_time: datetime, repeat_interval: int | None = None) -> str:
+    def iter_all_ready(self) -> AsyncIterator[AlarmModel]:
+        """"""
+        return self._iter_alarms("alarms/get_all_ready_alarms", "Storage not found alarms with READY status")
+
+    async def _iter_alarms(self, url: str, not_found_msg: str) -> AsyncIterator[AlarmModel]:
+        """
+        Stream json list of alarms and validate every alarm as soon as it's received
+        :param url: Endpoint that returns list of alarms
+        :param not_found_msg: StorageNotFound message on 404
+        """
+        async with self.request_handler.stream_get(url) as response:
+            match response.status:
+                case statuses.SUCCESS_200:
+                    try:
+                        async for item in iter_json_array(response.iter_chunks()):
+                            yield AlarmModel.model_validate(item)
+                    except ValidationError as err:
+                        self.logger.error(f"StorageValidationError: {str(err)}")
+                        raise StorageValidationError(str(err))
+                    except ValueError as err:
+                        self.logger.error(f"UnexpectedResponse: Can't parse alarms list: {err}")
+                        raise UnexpectedResponse(f"Can't parse alarms list: {err}")
+                case statuses.NOT_FOUND_404:
+                    self.logger.info(not_found_msg)
+                    raise StorageNotFound(not_found_msg)
+                case _:
+                    self.logger.error(f"Unacceptable response status code: {response.status}")
+                    raise UnexpectedResponse(f"Unacceptable response status code: {response.status}")
+
+    async def create(self, alarm: AlarmModelToCreate, next_notion_time: datetime, repeat_interval: int | None = None,
+                     idempotency_key: str | None = None) -> str:
         """
         :param alarm:
         :param next_notion_time:
         :param repeat_interval:
+        :param idempotency_key: Repeated request with the same key is not executed by backend twice
         :return:
         """
         if repeat_interval is not None:
@@ -96,7 +163,8 @@ class AlarmsStoragehandler(IAlarmsStoragehandler):
             request_str = f"alarms/create_alarm?next_notion_time={next_notion_time}"
         response = await self.request_handler.post(
             request_str,
-            body=alarm.model_dump()
+            body=alarm.model_dump(),
+            idempotency_key=idempotency_key
         )
 
         match response.status:
@@ -117,7 +185,7 @@ class AlarmsStoragehandler(IAlarmsStoragehandler):
         match response.status:
             case statuses.SUCCESS_200:
                 try:
-                    body: dict = json.loads(response.body)
+                    body: dict = response.json()
                     next_notion_time: str = body["next_notion_time"]
                     result = datetime.strptime(
                         next_notion_time.split(".")[0],
@@ -227,3 +295,23 @@ class AlarmsStoragehandler(IAlarmsStoragehandler):
             case _:
                 self.logger.error(f"Unacceptable response status code: {response.status}")
                 raise UnexpectedResponse(f"Unacceptable response status code: {response.status}")
+
+
+_alarms_storage_handler: IAlarmsStoragehandler | None = None
+
+
+def get_alarms_storage_handler() -> IAlarmsStoragehandler:
+    """
+    Return application-wide alarms storage handler, it's wrapped by entity cache if cache is enabled
+    and by tree snapshot of users if snapshot is enabled
+    """
+    global _alarms_storage_handler
+    if _alarms_storage_handler is None:
+        storage: IAlarmsStoragehandler = AlarmsStoragehandler()
+        if config.BACKEND_ENTITY_CACHE_ENABLED:
+            storage = CachedAlarmsStorageHandler(storage, get_entity_cache())
+        if config.BACKEND_TREE_SNAPSHOT_ENABLED:
+            storage = SnapshotAlarmsStorageHandler(storage, get_tree_snapshots())
+        _alarms_storage_handler = storage
+    return _alarms_storage_handler
+
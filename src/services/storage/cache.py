@@ -0,0 +1,182 @@
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Any, Hashable, Iterable, Iterator
+
+from pydantic import BaseModel
+
+from src.utils import config
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    tags: frozenset[str]
+    size: int
+    expires_at: float
+
+
+@dataclass(frozen=True)
+class CachedNotFound:
+    """Storage answered there is no such entity or list, cached for a short time"""
+    message: str
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory of cached models by size of their json"""
+    if isinstance(value, BaseModel):
+        return len(value.model_dump_json())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(item) for item in value) + 8 * len(value)
+    return 64
+
+
+def copy_value(value: Any) -> Any:
+    """Cached models are shared, caller gets deep copies to change them and their nested models freely"""
+    if isinstance(value, BaseModel):
+        return value.model_copy(deep=True)
+    if isinstance(value, list):
+        return [copy_value(item) for item in value]
+    return value
+
+
+class EntityCache:
+    """
+    LRU cache of storage entities and lists with TTL and memory bound.
+    Every entry has tags, write invalidates tags it affects and all entries with these tags are dropped
+    """
+
+    def __init__(self, max_entries: int = config.BACKEND_ENTITY_CACHE_MAX_ENTRIES,
+                 max_bytes: int = config.BACKEND_ENTITY_CACHE_MAX_BYTES,
+                 ttl: float = config.BACKEND_ENTITY_CACHE_TTL,
+                 max_invalidations: int = 10_000) -> None:
+        """
+        :param max_bytes: Memory bound by estimated size of entries
+        :param ttl: Seconds entry lives, bounds staleness of changes made not by bot
+        :param max_invalidations: How many last invalidated tags to remember to reject results of concurrent reads
+        """
+        self._logger = getLogger("app.entity_cache")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_invalidations = max_invalidations
+        self._entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+        self._keys_by_tag: dict[str, set[Hashable]] = {}
+        self._size = 0
+        # Generation is increased by every invalidation, reads remember it before request to backend
+        self._generation = 0
+        self._invalidated_at: OrderedDict[str, int] = OrderedDict()
+        self._forgotten_generation = 0
+        self._writing: Counter[str] = Counter()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def put(self, key: Hashable, value: Any, tags: Iterable[str], generation: int, ttl: float | None = None) -> None:
+        """
+        :param generation: Cache generation before value was read from backend,
+        value isn't cached if some of its tags were invalidated while it was read
+        :param ttl: Seconds entry lives instead of default
+        """
+        tags = frozenset(tags)
+        if self._is_invalidated_since(tags, generation):
+            return
+
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = CacheEntry(value, tags, size, time.monotonic() + (ttl if ttl is not None else self.ttl))
+        self._size += size
+        for tag in tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate(self, *tags: str) -> None:
+        self._generation += 1
+        for tag in tags:
+            self._invalidated_at[tag] = self._generation
+            self._invalidated_at.move_to_end(tag)
+            for key in list(self._keys_by_tag.get(tag, ())):
+                self._remove(key)
+
+        while len(self._invalidated_at) > self.max_invalidations:
+            _, generation = self._invalidated_at.popitem(last=False)
+            self._forgotten_generation = max(self._forgotten_generation, generation)
+
+    @contextmanager
+    def writing(self, *tags: str) -> Iterator[None]:
+        """Mark tags as being changed while write request is in flight, they are invalidated after it"""
+        self._writing.update(tags)
+        try:
+            yield
+        finally:
+            self._writing.subtract(tags)
+            self._writing += Counter()
+            self.invalidate(*tags)
+
+    def is_writing(self, *tags: str) -> bool:
+        """Concurrent read of changing data should go to storage to see result of write"""
+        return any(self._writing[tag] for tag in tags)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._forgotten_generation = self._generation
+        self._invalidated_at.clear()
+        self._entries.clear()
+        self._keys_by_tag.clear()
+        self._size = 0
+
+    def stats(self) -> dict[str, int]:
+        return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits, "misses": self.misses}
+
+    def _is_invalidated_since(self, tags: frozenset[str], generation: int) -> bool:
+        if generation == self._generation:
+            return False
+        if generation < self._forgotten_generation:
+            # Invalidations after this read are not remembered anymore, can't prove value is fresh
+            return True
+        return any(self._invalidated_at.get(tag, 0) > generation for tag in tags)
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._size -= entry.size
+        for tag in entry.tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+
+_entity_cache: EntityCache | None = None
+
+
+def get_entity_cache() -> EntityCache:
+    """Return application-wide cache shared by all cached storage handlers"""
+    global _entity_cache
+    if _entity_cache is None:
+        _entity_cache = EntityCache()
+    return _entity_cache
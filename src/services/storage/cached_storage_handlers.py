@@ -0,0 +1,307 @@
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Hashable, Iterable, TypeVar
+
+from src.models.alarm_model import ACTIVE_ALARM_STATUSES, AlarmModel, AlarmModelToCreate, AlarmStatus, AlarmSummaryModel
+from src.models.notes_models import NoteModel, NoteModelToCreate, NoteSummaryModel
+from src.models.themes_modles import ThemeModel, ThemeModelToCreate, ThemeSummaryModel
+from src.models.user_model import UserModel
+from src.services.storage.cache import CachedNotFound, EntityCache, copy_value
+from src.services.storage.interfaces import IAlarmsStoragehandler, INotesStorageHandler, IThemesStorageHandler, \
+    IUserStorageHandler
+from src.utils import config
+from src.utils.exceptions.storage import StorageNotFound
+
+T = TypeVar("T")
+I = TypeVar("I")
+
+# Entity tags are set on the entity and on every list containing it,
+# group tags are set on all entities of parent and their lists, list tags - only on lists of parent
+
+
+def theme_tags(theme: ThemeModel | ThemeSummaryModel) -> set[str]:
+    tags = {f"theme:{theme.id}"}
+    if isinstance(theme, ThemeModel):
+        tags.add(f"themes_of_user:{theme.links.user_id}")
+    return tags
+
+
+def note_tags(note: NoteModel | NoteSummaryModel) -> set[str]:
+    tags = {f"note:{note.id}"}
+    if isinstance(note, NoteModel):
+        tags.update((f"notes_of_theme:{note.links.theme_id}", f"notes_of_user:{note.links.user_id}"))
+    return tags
+
+
+def alarm_tags(alarm: AlarmModel | AlarmSummaryModel) -> set[str]:
+    tags = {f"alarm:{alarm.id}"}
+    if isinstance(alarm, AlarmModel):
+        tags.update((f"alarms_of_parent:{alarm.links.parent_id}", f"alarms_of_user:{alarm.links.user_id}"))
+    return tags
+
+
+def list_tags(items: list[T], item_tags: Callable[[T], set[str]], *tags: str) -> set[str]:
+    result = set(tags)
+    for item in items:
+        result |= item_tags(item)
+    return result
+
+
+class CachedStorageMixin:
+    """Read-through caching of storage handler results"""
+    cache: EntityCache
+
+    async def _cached(self, key: Hashable, load: Callable[[], Awaitable[T]],
+                      tags: Callable[[T], Iterable[str]], depends_on: str, not_found_tags: Iterable[str] = ()) -> T:
+        """
+        StorageNotFound is cached too, but for short time and only with depends_on and not_found_tags
+        :param load: Read value from wrapped storage on cache miss
+        :param tags: Tags of loaded value
+        :param depends_on: Value is read from storage while write which changes this tag is in flight,
+        write which creates entity or list item invalidates this tag
+        :param not_found_tags: Tags of StorageNotFound, which don't depend on value
+        """
+        if self.cache.is_writing(depends_on):
+            return await load()
+
+        value = self.cache.get(key)
+        if isinstance(value, CachedNotFound):
+            raise StorageNotFound(value.message)
+        if value is not None:
+            return copy_value(value)
+
+        generation = self.cache.generation
+        try:
+            value = await load()
+        except StorageNotFound as err:
+            if config.BACKEND_NOT_FOUND_CACHE_TTL > 0:
+                self.cache.put(
+                    key, CachedNotFound(str(err)), (depends_on, *not_found_tags), generation,
+                    ttl=config.BACKEND_NOT_FOUND_CACHE_TTL
+                )
+            raise
+        self.cache.put(key, value, tags(value), generation)
+        return copy_value(value)
+
+    async def _cached_list(self, key: Hashable, load: Callable[[], Awaitable[list[I]]],
+                           item_tags: Callable[[I], set[str]], depends_on: str, *group_tags: str) -> list[I]:
+        """
+        List is tagged with tags of its items, its list tag and group tags.
+        Not found list has list and group tags too, so write which drops lists of group drops it as well
+        :param depends_on: List tag, see _cached
+        """
+        return await self._cached(
+            key, load, lambda items: list_tags(items, item_tags, depends_on, *group_tags), depends_on, group_tags
+        )
+
+    async def _write(self, write: Awaitable[T], *tags: str) -> T:
+        """Wait write and invalidate tags it changes"""
+        with self.cache.writing(*tags):
+            return await write
+
+
+class CachedUserStorageHandler(CachedStorageMixin, IUserStorageHandler):
+
+    def __init__(self, storage: IUserStorageHandler, cache: EntityCache) -> None:
+        super().__init__()
+        self.storage = storage
+        self.cache = cache
+
+    async def get(self, user_id: str) -> UserModel:
+        return await self._cached(
+            ("user", user_id), lambda: self.storage.get(user_id), lambda _: {f"user:{user_id}"}, f"user:{user_id}"
+        )
+
+    async def create(self, user: UserModel, idempotency_key: str | None = None) -> str:
+        return await self._write(self.storage.create(user, idempotency_key), f"user:{user.telegram_id}")
+
+    async def update_username(self, user_id: str, new_username: str) -> None:
+        return await self._write(self.storage.update_username(user_id, new_username), f"user:{user_id}")
+
+    async def delete(self, user_id: str) -> None:
+        return await self._write(self.storage.delete(user_id), f"user:{user_id}")
+
+
+class CachedThemesStorageHandler(CachedStorageMixin, IThemesStorageHandler):
+
+    def __init__(self, storage: IThemesStorageHandler, cache: EntityCache) -> None:
+        super().__init__()
+        self.storage = storage
+        self.cache = cache
+
+    async def get(self, _id: str) -> ThemeModel:
+        return await self._cached(
+            ("theme", _id), lambda: self.storage.get(_id), theme_tags, f"theme:{_id}"
+        )
+
+    async def get_all_by_user(self, _id: str) -> list[ThemeModel]:
+        return await self._cached_list(
+            ("themes_by_user", _id),
+            lambda: self.storage.get_all_by_user(_id),
+            theme_tags, f"theme_lists_of_user:{_id}", "theme_lists", f"themes_of_user:{_id}"
+        )
+
+    async def get_summaries_by_user(self, _id: str) -> list[ThemeSummaryModel]:
+        return await self._cached_list(
+            ("theme_summaries_by_user", _id),
+            lambda: self.storage.get_summaries_by_user(_id),
+            theme_tags, f"theme_lists_of_user:{_id}", "theme_lists", f"themes_of_user:{_id}"
+        )
+
+    async def create(self, theme: ThemeModelToCreate, idempotency_key: str | None = None) -> str:
+        return await self._write(
+            self.storage.create(theme, idempotency_key), f"theme_lists_of_user:{theme.links.user_id}"
+        )
+
+    async def patch(self, _id: str, new_data: dict[str, Any]) -> None:
+        return await self._write(self.storage.patch(_id, new_data), f"theme:{_id}")
+
+    async def delete(self, _id: str) -> None:
+        return await self._write(self.storage.delete(_id), f"theme:{_id}")
+
+    async def delete_all_by_user(self, _id: str) -> None:
+        return await self._write(self.storage.delete_all_by_user(_id), f"themes_of_user:{_id}")
+
+
+class CachedNotesStorageHandler(CachedStorageMixin, INotesStorageHandler):
+
+    def __init__(self, storage: INotesStorageHandler, cache: EntityCache) -> None:
+        super().__init__()
+        self.storage = storage
+        self.cache = cache
+
+    async def get(self, _id: str) -> NoteModel:
+        return await self._cached(
+            ("note", _id), lambda: self.storage.get(_id), note_tags, f"note:{_id}"
+        )
+
+    async def get_all_by_theme(self, _id: str) -> list[NoteModel]:
+        return await self._cached_list(
+            ("notes_by_theme", _id),
+            lambda: self.storage.get_all_by_theme(_id),
+            note_tags, f"note_lists_of_theme:{_id}", "note_lists", f"notes_of_theme:{_id}"
+        )
+
+    async def get_summaries_by_theme(self, _id: str) -> list[NoteSummaryModel]:
+        return await self._cached_list(
+            ("note_summaries_by_theme", _id),
+            lambda: self.storage.get_summaries_by_theme(_id),
+            note_tags, f"note_lists_of_theme:{_id}", "note_lists", f"notes_of_theme:{_id}"
+        )
+
+    async def get_all_by_user(self, _id: str) -> list[NoteModel]:
+        return await self._cached_list(
+            ("notes_by_user", _id),
+            lambda: self.storage.get_all_by_user(_id),
+            note_tags, f"note_lists_of_user:{_id}", "note_lists", f"notes_of_user:{_id}"
+        )
+
+    async def create(self, note: NoteModelToCreate, idempotency_key: str | None = None) -> str:
+        return await self._write(
+            self.storage.create(note, idempotency_key),
+            f"note_lists_of_theme:{note.links.theme_id}", f"note_lists_of_user:{note.links.user_id}"
+        )
+
+    async def patch(self, _id: str, new_data: dict[str, Any]) -> None:
+        # Note moved to other theme appears in lists which don't contain it yet
+        moved = ("note_lists",) if "links" in new_data else ()
+        return await self._write(self.storage.patch(_id, new_data), f"note:{_id}", *moved)
+
+    async def delete(self, _id: str) -> None:
+        return await self._write(self.storage.delete(_id), f"note:{_id}")
+
+    async def delete_by_theme(self, _id: str) -> None:
+        return await self._write(self.storage.delete_by_theme(_id), f"notes_of_theme:{_id}")
+
+
+class CachedAlarmsStorageHandler(CachedStorageMixin, IAlarmsStoragehandler):
+    """Ready alarms are always read from storage, they are selected by backend time"""
+
+    def __init__(self, storage: IAlarmsStoragehandler, cache: EntityCache) -> None:
+        super().__init__()
+        self.storage = storage
+        self.cache = cache
+
+    async def get(self, _id: str) -> AlarmModel:
+        return await self._cached(
+            ("alarm", _id), lambda: self.storage.get(_id), alarm_tags, f"alarm:{_id}"
+        )
+
+    async def get_all_by_parent(self, _id: str) -> list[AlarmModel]:
+        return await self._cached_list(
+            ("alarms_by_parent", _id),
+            lambda: self.storage.get_all_by_parent(_id),
+            alarm_tags, f"alarm_lists_of_parent:{_id}", "alarm_lists", f"alarms_of_parent:{_id}"
+        )
+
+    async def get_summaries_by_parent(self, _id: str,
+                                      status: list[AlarmStatus] | None = None) -> list[AlarmSummaryModel]:
+        return await self._cached_list(
+            ("alarm_summaries_by_parent", _id, tuple(status) if status is not None else None),
+            lambda: self.storage.get_summaries_by_parent(_id, status),
+            alarm_tags, f"alarm_lists_of_parent:{_id}", "alarm_lists", f"alarms_of_parent:{_id}"
+        )
+
+    async def get_all_by_user(self, _id: str) -> list[AlarmModel]:
+        return await self._cached_list(
+            ("alarms_by_user", _id),
+            lambda: self.storage.get_all_by_user(_id),
+            alarm_tags, f"alarm_lists_of_user:{_id}", "alarm_lists", f"alarms_of_user:{_id}"
+        )
+
+    async def get_all_ready(self) -> list[AlarmModel]:
+        alarms = await self.storage.get_all_ready()
+        self.cache.invalidate(*(f"alarm:{alarm.id}" for alarm in alarms))
+        return alarms
+
+    async def iter_all_ready(self) -> AsyncIterator[AlarmModel]:
+        async for alarm in self.storage.iter_all_ready():
+            # Ready alarm is going to change its status and time, cached copy is stale
+            self.cache.invalidate(f"alarm:{alarm.id}")
+            yield alarm
+
+    async def create(self, alarm: AlarmModelToCreate, next_notion_time: datetime, repeat_interval: int | None = None,
+                     idempotency_key: str | None = None) -> str:
+        return await self._write(
+            self.storage.create(alarm, next_notion_time, repeat_interval, idempotency_key),
+            f"alarm_lists_of_parent:{alarm.links.parent_id}", f"alarm_lists_of_user:{alarm.links.user_id}"
+        )
+
+    async def postpone_repeatable(self, _id: str) -> datetime:
+        return await self._write(self.storage.postpone_repeatable(_id), f"alarm:{_id}")
+
+    async def patch(self, _id: str, new_data: dict[str, Any]) -> None:
+        # Alarm moved to other parent appears in lists which don't contain it yet
+        if "links" in new_data:
+            lists: tuple[str, ...] = ("alarm_lists",)
+        elif "status" in new_data:
+            lists = self._status_lists_tags(_id)
+        else:
+            lists = ()
+        return await self._write(self.storage.patch(_id, new_data), f"alarm:{_id}", *lists)
+
+    async def update_status(self, _id: str, new_status: AlarmStatus) -> None:
+        cached = self.cache.get(("alarm", _id))
+        # Alarm becoming active appears in lists of active alarms, finished one is removed from lists tagged with it
+        lists = self._status_lists_tags(_id) if AlarmStatus(new_status) in ACTIVE_ALARM_STATUSES else ()
+        await self._write(self.storage.update_status(_id, new_status), f"alarm:{_id}", *lists)
+
+        # Lists containing alarm are dropped, but alarm itself is known after successful update
+        if isinstance(cached, AlarmModel):
+            updated = cached.model_copy(update={"status": AlarmStatus(new_status)})
+            self.cache.put(("alarm", _id), updated, alarm_tags(updated), self.cache.generation)
+
+    async def delete(self, _id: str) -> None:
+        return await self._write(self.storage.delete(_id), f"alarm:{_id}")
+
+    async def delete_by_parent(self, _id: str) -> None:
+        return await self._write(self.storage.delete_by_parent(_id), f"alarms_of_parent:{_id}")
+
+    async def delete_by_user(self, _id: str) -> None:
+        return await self._write(self.storage.delete_by_user(_id), f"alarms_of_user:{_id}")
+
+    def _status_lists_tags(self, _id: str) -> tuple[str, ...]:
+        """Lists filtered by status may get alarm after its status change, they are dropped with lists of its parent"""
+        cached = self.cache.get(("alarm", _id))
+        if isinstance(cached, AlarmModel):
+            return (f"alarm_lists_of_parent:{cached.links.parent_id}",)
+        return ("alarm_lists",)
@@ -1,11 +1,11 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
 from logging import getLogger
-from typing import Any
+from typing import Any, AsyncIterator
 
-from src.models.alarm_model import AlarmModel, AlarmModelToCreate, AlarmStatus
-from src.models.notes_models import NoteModel, NoteModelToCreate
-from src.models.themes_modles import ThemeModel, ThemeModelToCreate
+from src.models.alarm_model import AlarmModel, AlarmModelToCreate, AlarmStatus, AlarmSummaryModel
+from src.models.notes_models import NoteModel, NoteModelToCreate, NoteSummaryModel
+from src.models.themes_modles import ThemeModel, ThemeModelToCreate, ThemeSummaryModel
 from src.models.user_model import UserModel
 from src.services.requests.RequestHandler import RequestHandler, get_request_handler
 
@@ -29,7 +29,7 @@ class IUserStorageHandler(IStorageRequestHandler, ABC):
         ...
 
     @abstractmethod
-    async def create(self, user: UserModel) -> str:
+    async def create(self, user: UserModel, idempotency_key: str | None = None) -> str:
         """Create user in storage"""
         ...
 
@@ -64,7 +64,15 @@ class IThemesStorageHandler(IStorageRequestHandler, ABC):
         ...
 
     @abstractmethod
-    async def create(self, theme: ThemeModelToCreate) -> str:
+    async def get_summaries_by_user(self, _id: str) -> list[ThemeSummaryModel]:
+        """
+        Same as get_all_by_user, but backend returns only fields needed to show themes list
+        :param _id: User id
+        """
+        ...
+
+    @abstractmethod
+    async def create(self, theme: ThemeModelToCreate, idempotency_key: str | None = None) -> str:
         """create user in storage"""
         ...
 
@@ -107,6 +115,14 @@ class INotesStorageHandler(IStorageRequestHandler, ABC):
         """
         ...
 
+    @abstractmethod
+    async def get_summaries_by_theme(self, _id: str) -> list[NoteSummaryModel]:
+        """
+        Same as get_all_by_theme, but backend returns only fields needed to show notes list
+        :param _id: theme id
+        """
+        ...
+
     @abstractmethod
     async def get_all_by_user(self, _id: str) -> list[NoteModel]:
         """
@@ -116,7 +132,7 @@ class INotesStorageHandler(IStorageRequestHandler, ABC):
         ...
 
     @abstractmethod
-    async def create(self, note: NoteModelToCreate) -> str:
+    async def create(self, note: NoteModelToCreate, idempotency_key: str | None = None) -> str:
         """Create note in storage"""
         ...
 
@@ -158,6 +174,16 @@ class IAlarmsStoragehandler(IStorageRequestHandler, ABC):
         """
         ...
 
+    @abstractmethod
+    async def get_summaries_by_parent(self, _id: str,
+                                      status: list[AlarmStatus] | None = None) -> list[AlarmSummaryModel]:
+        """
+        Same as get_all_by_parent, but backend returns only fields needed to show alarms list
+        :param _id: parent entity id
+        :param status: Return only alarms with one of these statuses, None - all alarms
+        """
+        ...
+
     @abstractmethod
     async def get_all_by_user(self, _id: str) -> list[AlarmModel]:
         """
@@ -172,7 +198,13 @@ class IAlarmsStoragehandler(IStorageRequestHandler, ABC):
         ...
 
     @abstractmethod
-    async def create(self, alarm: AlarmModelToCreate, next_notion_time: datetime, repeat_interval: int | None) -> str:
+    def iter_all_ready(self) -> AsyncIterator[AlarmModel]:
+        """Same as get_all_ready, but alarms are yielded one by one while response body is received"""
+        ...
+
+    @abstractmethod
+    async def create(self, alarm: AlarmModelToCreate, next_notion_time: datetime, repeat_interval: int | None,
+                     idempotency_key: str | None = None) -> str:
         """Create new alarm in storage"""
         ...
 
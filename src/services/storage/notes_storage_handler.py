@@ -2,12 +2,21 @@ from typing import Any, List
 
 from pydantic import ValidationError, TypeAdapter
 
-from src.models.notes_models import NoteModelToCreate, NoteModel
+from src.models.notes_models import NoteModelToCreate, NoteModel, NoteSummaryModel
+from src.services.storage.cache import get_entity_cache
+from src.services.storage.cached_storage_handlers import CachedNotesStorageHandler
 from src.services.storage.interfaces import INotesStorageHandler
-from src.utils import statuses
+from src.services.storage.projection import get_list_url
+from src.services.storage.snapshot_storage_handlers import SnapshotNotesStorageHandler
+from src.services.storage.tree_snapshot import get_tree_snapshots
+from src.utils import config, statuses
 from src.utils.exceptions.storage import StorageValidationError, StorageNotFound, UnexpectedResponse
 
 
+notes_list_adapter = TypeAdapter(List[NoteModel])  # Need to validate list of pydantic models
+notes_summaries_adapter = TypeAdapter(List[NoteSummaryModel])
+
+
 class NotesStorageHandler(INotesStorageHandler):
     async def get(self, _id: str) -> NoteModel:
         """"""
@@ -16,7 +25,7 @@ class NotesStorageHandler(INotesStorageHandler):
         match response.status:
             case statuses.SUCCESS_200:
                 try:
-                    return NoteModel.model_validate_json(response.body)
+                    return NoteModel.model_validate_json(response.content)
                 except ValidationError as err:
                     self.logger.error(f"StorageValidationError: {str(err)}")
                     raise StorageValidationError(str(err))
@@ -33,9 +42,29 @@ class NotesStorageHandler(INotesStorageHandler):
 
         match response.status:
             case statuses.SUCCESS_200:
-                ta = TypeAdapter(List[NoteModel])  # Need to validate list of pydantic models
                 try:
-                    return ta.validate_json(response.body)
+                    return notes_list_adapter.validate_json(response.content)
+                except ValidationError as err:
+                    self.logger.error(f"StorageValidationError: {str(err)}")
+                    raise StorageValidationError(str(err))
+            case statuses.NOT_FOUND_404:
+                self.logger.info(f"Storage not found note relates to theme with id: {_id}")
+                raise StorageNotFound(f"Storage not found note relates to theme with id: {_id}")
+            case _:
+                self.logger.error(f"Unacceptable response status code: {response.status}")
+                raise UnexpectedResponse(f"Unacceptable response status code: {response.status}")
+
+    async def get_summaries_by_theme(self, _id: str) -> list[NoteSummaryModel]:
+        """"""
+
+        response = await self.request_handler.get(
+            get_list_url(f"notes/get_all_notes_by_theme_id/{_id}", NoteSummaryModel)
+        )
+
+        match response.status:
+            case statuses.SUCCESS_200:
+                try:
+                    return notes_summaries_adapter.validate_json(response.content)
                 except ValidationError as err:
                     self.logger.error(f"StorageValidationError: {str(err)}")
                     raise StorageValidationError(str(err))
@@ -53,9 +82,8 @@ class NotesStorageHandler(INotesStorageHandler):
 
         match response.status:
             case statuses.SUCCESS_200:
-                ta = TypeAdapter(List[NoteModel])  # Need to validate list of pydantic models
                 try:
-                    return ta.validate_json(response.body)
+                    return notes_list_adapter.validate_json(response.content)
                 except ValidationError as err:
                     self.logger.error(f"StorageValidationError: {str(err)}")
                     raise StorageValidationError(str(err))
@@ -66,10 +94,12 @@ class NotesStorageHandler(INotesStorageHandler):
                 self.logger.error(f"Unacceptable response status code: {response.status}")
                 raise UnexpectedResponse(f"Unacceptable response status code: {response.status}")
 
-    async def create(self, note: NoteModelToCreate) -> str:
+    async def create(self, note: NoteModelToCreate, idempotency_key: str | None = None) -> str:
         """"""
 
-        response = await self.request_handler.post("notes/create_note", body=note.model_dump())
+        response = await self.request_handler.post(
+            "notes/create_note", body=note.model_dump(), idempotency_key=idempotency_key
+        )
 
         match response.status:
             case statuses.CREATED_201:
@@ -136,3 +166,22 @@ class NotesStorageHandler(INotesStorageHandler):
             case _:
                 self.logger.error(f"Unacceptable response status code: {response.status}")
                 raise UnexpectedResponse(f"Unacceptable response status code: {response.status}")
+
+
+_notes_storage_handler: INotesStorageHandler | None = None
+
+
+def get_notes_storage_handler() -> INotesStorageHandler:
+    """
+    Return application-wide notes storage handler, it's wrapped by entity cache if cache is enabled
+    and by tree snapshot of users if snapshot is enabled
+    """
+    global _notes_storage_handler
+    if _notes_storage_handler is None:
+        storage: INotesStorageHandler = NotesStorageHandler()
+        if config.BACKEND_ENTITY_CACHE_ENABLED:
+            storage = CachedNotesStorageHandler(storage, get_entity_cache())
+        if config.BACKEND_TREE_SNAPSHOT_ENABLED:
+            storage = SnapshotNotesStorageHandler(storage, get_tree_snapshots())
+        _notes_storage_handler = storage
+    return _notes_storage_handler
@@ -0,0 +1,26 @@
+from urllib.parse import urlencode
+
+from pydantic import BaseModel
+
+# Query param with comma separated list of fields backend should return
+FIELDS_PARAM = "fields"
+
+
+def get_projection_fields(model: type[BaseModel]) -> str:
+    """:return: Comma separated names of model fields as they are stored in backend"""
+    return ",".join(field.alias or name for name, field in model.model_fields.items())
+
+
+def get_list_url(url: str, projection: type[BaseModel], **filters: list[str] | None) -> str:
+    """
+    Add projection and filters to list endpoint url as query params.
+    Backend which doesn't support them returns full not filtered list, so caller should filter result too
+    :param url: List endpoint url without query
+    :param projection: Model which fields backend should return
+    :param filters: Field name to list of acceptable values, None means no filter
+    """
+    query = {FIELDS_PARAM: get_projection_fields(projection)}
+    for name, values in filters.items():
+        if values is not None:
+            query[name] = ",".join(values)
+    return f"{url}?{urlencode(query, safe=',')}"
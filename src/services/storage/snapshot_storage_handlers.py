@@ -0,0 +1,275 @@
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, TypeVar
+
+from src.models.alarm_model import AlarmModel, AlarmModelToCreate, AlarmStatus, AlarmSummaryModel
+from src.models.notes_models import NoteModel, NoteModelToCreate, NoteSummaryModel
+from src.models.themes_modles import ThemeModel, ThemeModelToCreate, ThemeSummaryModel
+from src.services.storage.cache import copy_value
+from src.services.storage.interfaces import IAlarmsStoragehandler, INotesStorageHandler, IThemesStorageHandler
+from src.services.storage.tree_snapshot import ALARM, NOTE, THEME, TreeSnapshots, UserTree, apply_patch, children_key, \
+    user_key
+from src.utils.exceptions.storage import StorageNotFound
+
+T = TypeVar("T")
+
+
+class SnapshotStorageMixin:
+    """Serve reads from tree snapshot of entity owner and apply writes to it"""
+    snapshots: TreeSnapshots
+
+    async def _write(self, write: Awaitable[T], kind: str, _id: str, apply: Callable[[T | None], None],
+                     is_idempotent_delete: bool = False) -> T:
+        """
+        :param kind: Kind of entity write changes, its tree is dropped if result of write is unknown
+        :param apply: Apply successful write to snapshot
+        :param is_idempotent_delete: Not found means there is nothing to delete, it's applied as successful write,
+        otherwise not found entity is removed from snapshot
+        """
+        with self.snapshots.writing(*self.snapshots.write_keys(kind, _id)):
+            try:
+                result = await write
+            except StorageNotFound:
+                if is_idempotent_delete:
+                    apply(None)
+                else:
+                    self.snapshots.remove(kind, _id)
+                raise
+            except BaseException:
+                self.snapshots.drop_owner(kind, _id)
+                raise
+            apply(result)
+            return result
+
+    async def _create(self, create: Awaitable[str], user_id: str, get: Callable[[str], Awaitable[Any]],
+                      *keys: tuple[str, str]) -> str:
+        """
+        Created entity is read from storage, only if tree of user is loaded, and added to it
+        :param keys: Keys of lists new entity appears in besides lists of user
+        """
+        with self.snapshots.writing(user_key(user_id), *keys):
+            try:
+                _id = await create
+            except BaseException:
+                self.snapshots.drop(user_id)
+                raise
+            if self.snapshots.get_tree(user_id) is None:
+                # Only counts change, tree which is being loaded now may miss created entity
+                self.snapshots.drop(user_id)
+                return _id
+            try:
+                self.snapshots.put(await get(_id))
+            except Exception:
+                self.snapshots.drop(user_id)
+            return _id
+
+    def _readable_tree(self, tree: UserTree | None, key: tuple[str, str]) -> UserTree | None:
+        """Tree isn't read while write which changes key is in flight"""
+        if tree is None or self.snapshots.is_writing(key):
+            return None
+        return tree
+
+    @staticmethod
+    def _not_found_if_empty(items: list[T], msg: str) -> list[T]:
+        """Storage answers empty list with 404"""
+        if not items:
+            raise StorageNotFound(msg)
+        return copy_value(items)
+
+
+class SnapshotThemesStorageHandler(SnapshotStorageMixin, IThemesStorageHandler):
+
+    def __init__(self, storage: IThemesStorageHandler, snapshots: TreeSnapshots) -> None:
+        super().__init__()
+        self.storage = storage
+        self.snapshots = snapshots
+
+    async def get(self, _id: str) -> ThemeModel:
+        tree = self._readable_tree(self.snapshots.get_owner_tree(THEME, _id), (THEME, _id))
+        if tree is None:
+            return await self.storage.get(_id)
+        return copy_value(tree.themes[_id])
+
+    async def get_all_by_user(self, _id: str) -> list[ThemeModel]:
+        tree = self._readable_tree(self.snapshots.get_tree(_id), user_key(_id))
+        if tree is None:
+            return await self.storage.get_all_by_user(_id)
+        return self._not_found_if_empty(list(tree.themes.values()), f"Snapshot has no themes of user: {_id}")
+
+    async def get_summaries_by_user(self, _id: str) -> list[ThemeSummaryModel]:
+        tree = self._readable_tree(self.snapshots.get_tree(_id), user_key(_id))
+        if tree is None:
+            return await self.storage.get_summaries_by_user(_id)
+        return self._not_found_if_empty(
+            [ThemeSummaryModel.model_validate(theme.model_dump(by_alias=True)) for theme in tree.themes.values()],
+            f"Snapshot has no themes of user: {_id}"
+        )
+
+    async def create(self, theme: ThemeModelToCreate, idempotency_key: str | None = None) -> str:
+        return await self._create(self.storage.create(theme, idempotency_key), theme.links.user_id, self.storage.get)
+
+    async def patch(self, _id: str, new_data: dict[str, Any]) -> None:
+        return await self._write(
+            self.storage.patch(_id, new_data), THEME, _id,
+            lambda _: self.snapshots.update(THEME, _id, lambda theme: apply_patch(theme, new_data))
+        )
+
+    async def delete(self, _id: str) -> None:
+        return await self._write(self.storage.delete(_id), THEME, _id, lambda _: self.snapshots.remove(THEME, _id))
+
+    async def delete_all_by_user(self, _id: str) -> None:
+        with self.snapshots.writing(user_key(_id)):
+            try:
+                return await self.storage.delete_all_by_user(_id)
+            finally:
+                self.snapshots.drop(_id)
+
+
+class SnapshotNotesStorageHandler(SnapshotStorageMixin, INotesStorageHandler):
+
+    def __init__(self, storage: INotesStorageHandler, snapshots: TreeSnapshots) -> None:
+        super().__init__()
+        self.storage = storage
+        self.snapshots = snapshots
+
+    async def get(self, _id: str) -> NoteModel:
+        tree = self._readable_tree(self.snapshots.get_owner_tree(NOTE, _id), (NOTE, _id))
+        if tree is None:
+            return await self.storage.get(_id)
+        return copy_value(tree.notes[_id])
+
+    async def get_all_by_theme(self, _id: str) -> list[NoteModel]:
+        tree = self._readable_tree(self.snapshots.get_owner_tree(THEME, _id), children_key(THEME, _id))
+        if tree is None:
+            return await self.storage.get_all_by_theme(_id)
+        return self._not_found_if_empty(tree.notes_by_theme(_id), f"Snapshot has no notes of theme: {_id}")
+
+    async def get_summaries_by_theme(self, _id: str) -> list[NoteSummaryModel]:
+        tree = self._readable_tree(self.snapshots.get_owner_tree(THEME, _id), children_key(THEME, _id))
+        if tree is None:
+            return await self.storage.get_summaries_by_theme(_id)
+        return self._not_found_if_empty(
+            [NoteSummaryModel.model_validate(note.model_dump(by_alias=True)) for note in tree.notes_by_theme(_id)],
+            f"Snapshot has no notes of theme: {_id}"
+        )
+
+    async def get_all_by_user(self, _id: str) -> list[NoteModel]:
+        tree = self._readable_tree(self.snapshots.get_tree(_id), user_key(_id))
+        if tree is None:
+            return await self.storage.get_all_by_user(_id)
+        return self._not_found_if_empty(list(tree.notes.values()), f"Snapshot has no notes of user: {_id}")
+
+    async def create(self, note: NoteModelToCreate, idempotency_key: str | None = None) -> str:
+        return await self._create(
+            self.storage.create(note, idempotency_key), note.links.user_id, self.storage.get,
+            children_key(THEME, note.links.theme_id)
+        )
+
+    async def patch(self, _id: str, new_data: dict[str, Any]) -> None:
+        return await self._write(
+            self.storage.patch(_id, new_data), NOTE, _id,
+            lambda _: self.snapshots.update(NOTE, _id, lambda note: apply_patch(note, new_data))
+        )
+
+    async def delete(self, _id: str) -> None:
+        return await self._write(self.storage.delete(_id), NOTE, _id, lambda _: self.snapshots.remove(NOTE, _id))
+
+    async def delete_by_theme(self, _id: str) -> None:
+        return await self._write(
+            self.storage.delete_by_theme(_id), THEME, _id, lambda _: self.snapshots.remove_children(THEME, _id),
+            is_idempotent_delete=True
+        )
+
+
+class SnapshotAlarmsStorageHandler(SnapshotStorageMixin, IAlarmsStoragehandler):
+    """Ready alarms are read from storage, they are selected by backend time, and refresh snapshot"""
+
+    def __init__(self, storage: IAlarmsStoragehandler, snapshots: TreeSnapshots) -> None:
+        super().__init__()
+        self.storage = storage
+        self.snapshots = snapshots
+
+    async def get(self, _id: str) -> AlarmModel:
+        tree = self._readable_tree(self.snapshots.get_owner_tree(ALARM, _id), (ALARM, _id))
+        if tree is None:
+            return await self.storage.get(_id)
+        return copy_value(tree.alarms[_id])
+
+    async def get_all_by_parent(self, _id: str) -> list[AlarmModel]:
+        tree = self._readable_tree(self.snapshots.get_owner_tree(NOTE, _id), children_key(NOTE, _id))
+        if tree is None:
+            return await self.storage.get_all_by_parent(_id)
+        return self._not_found_if_empty(tree.alarms_by_note(_id), f"Snapshot has no alarms of note: {_id}")
+
+    async def get_summaries_by_parent(self, _id: str,
+                                      status: list[AlarmStatus] | None = None) -> list[AlarmSummaryModel]:
+        tree = self._readable_tree(self.snapshots.get_owner_tree(NOTE, _id), children_key(NOTE, _id))
+        if tree is None:
+            return await self.storage.get_summaries_by_parent(_id, status)
+        return self._not_found_if_empty(
+            [
+                AlarmSummaryModel.model_validate(alarm.model_dump(by_alias=True))
+                for alarm in tree.alarms_by_note(_id)
+                if status is None or alarm.status in status
+            ],
+            f"Snapshot has no alarms of note: {_id}"
+        )
+
+    async def get_all_by_user(self, _id: str) -> list[AlarmModel]:
+        tree = self._readable_tree(self.snapshots.get_tree(_id), user_key(_id))
+        if tree is None:
+            return await self.storage.get_all_by_user(_id)
+        return self._not_found_if_empty(list(tree.alarms.values()), f"Snapshot has no alarms of user: {_id}")
+
+    async def get_all_ready(self) -> list[AlarmModel]:
+        alarms = await self.storage.get_all_ready()
+        for alarm in alarms:
+            self.snapshots.put(alarm)
+        return alarms
+
+    async def iter_all_ready(self) -> AsyncIterator[AlarmModel]:
+        async for alarm in self.storage.iter_all_ready():
+            self.snapshots.put(alarm)
+            yield alarm
+
+    async def create(self, alarm: AlarmModelToCreate, next_notion_time: datetime, repeat_interval: int | None = None,
+                     idempotency_key: str | None = None) -> str:
+        return await self._create(
+            self.storage.create(alarm, next_notion_time, repeat_interval, idempotency_key),
+            alarm.links.user_id, self.storage.get, children_key(NOTE, alarm.links.parent_id)
+        )
+
+    async def postpone_repeatable(self, _id: str) -> datetime:
+        return await self._write(
+            self.storage.postpone_repeatable(_id), ALARM, _id,
+            lambda next_notion_time: self.snapshots.update(
+                ALARM, _id, lambda alarm: apply_patch(alarm, {"times.next_notion_time": next_notion_time})
+            )
+        )
+
+    async def patch(self, _id: str, new_data: dict[str, Any]) -> None:
+        return await self._write(
+            self.storage.patch(_id, new_data), ALARM, _id,
+            lambda _: self.snapshots.update(ALARM, _id, lambda alarm: apply_patch(alarm, new_data))
+        )
+
+    async def update_status(self, _id: str, new_status: AlarmStatus) -> None:
+        return await self._write(
+            self.storage.update_status(_id, new_status), ALARM, _id,
+            lambda _: self.snapshots.update(ALARM, _id, lambda alarm: apply_patch(alarm, {"status": new_status}))
+        )
+
+    async def delete(self, _id: str) -> None:
+        return await self._write(self.storage.delete(_id), ALARM, _id, lambda _: self.snapshots.remove(ALARM, _id))
+
+    async def delete_by_parent(self, _id: str) -> None:
+        return await self._write(
+            self.storage.delete_by_parent(_id), NOTE, _id, lambda _: self.snapshots.remove_children(NOTE, _id),
+            is_idempotent_delete=True
+        )
+
+    async def delete_by_user(self, _id: str) -> None:
+        with self.snapshots.writing(user_key(_id)):
+            try:
+                return await self.storage.delete_by_user(_id)
+            finally:
+                self.snapshots.drop(_id)
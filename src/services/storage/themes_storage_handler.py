@@ -2,12 +2,21 @@ from typing import Any, List
 
 from pydantic import ValidationError, TypeAdapter
 
-from src.models.themes_modles import ThemeModelToCreate, ThemeModel
+from src.models.themes_modles import ThemeModelToCreate, ThemeModel, ThemeSummaryModel
+from src.services.storage.cache import get_entity_cache
+from src.services.storage.cached_storage_handlers import CachedThemesStorageHandler
 from src.services.storage.interfaces import IThemesStorageHandler
-from src.utils import statuses
+from src.services.storage.projection import get_list_url
+from src.services.storage.snapshot_storage_handlers import SnapshotThemesStorageHandler
+from src.services.storage.tree_snapshot import get_tree_snapshots
+from src.utils import config, statuses
 from src.utils.exceptions.storage import StorageValidationError, UnexpectedResponse, StorageNotFound
 
 
+themes_list_adapter = TypeAdapter(List[ThemeModel])  # Need to validate list of pydantic models
+themes_summaries_adapter = TypeAdapter(List[ThemeSummaryModel])
+
+
 class ThemesStorageHandler(IThemesStorageHandler):
 
     async def get(self, _id: str) -> ThemeModel:
@@ -26,7 +35,7 @@ class ThemesStorageHandler(IThemesStorageHandler):
         match response.status:
             case statuses.SUCCESS_200:
                 try:
-                    return ThemeModel.model_validate_json(response.body)
+                    return ThemeModel.model_validate_json(response.content)
                 except ValidationError as err:
                     self.logger.error(f"StorageValidationError: {str(err)}")
                     raise StorageValidationError(str(err))
@@ -47,9 +56,8 @@ class ThemesStorageHandler(IThemesStorageHandler):
 
         match response.status:
             case statuses.SUCCESS_200:
-                ta = TypeAdapter(List[ThemeModel])  # Need to validate list of pydantic models
                 try:
-                    return ta.validate_json(response.body)
+                    return themes_list_adapter.validate_json(response.content)
                 except ValidationError as err:
                     self.logger.error(f"StorageValidationError: {str(err)}")
                     raise StorageValidationError(str(err))
@@ -60,9 +68,31 @@ class ThemesStorageHandler(IThemesStorageHandler):
                 self.logger.error(f"Unacceptable response status code: {response.status}")
                 raise UnexpectedResponse(f"Unacceptable response status code: {response.status}")
 
-    async def create(self, theme: ThemeModelToCreate) -> str:
+    async def get_summaries_by_user(self, _id: str) -> list[ThemeSummaryModel]:
         """"""
-        response = await self.request_handler.post("themes/create_theme", body=theme.model_dump())
+        response = await self.request_handler.get(
+            get_list_url(f"themes/get_all_user_themes/{_id}", ThemeSummaryModel)
+        )
+
+        match response.status:
+            case statuses.SUCCESS_200:
+                try:
+                    return themes_summaries_adapter.validate_json(response.content)
+                except ValidationError as err:
+                    self.logger.error(f"StorageValidationError: {str(err)}")
+                    raise StorageValidationError(str(err))
+            case statuses.NOT_FOUND_404:
+                self.logger.info(f"Storage not found theme relates to user with id: {_id}")
+                raise StorageNotFound(f"Storage not found theme relates to user with id: {_id}")
+            case _:
+                self.logger.error(f"Unacceptable response status code: {response.status}")
+                raise UnexpectedResponse(f"Unacceptable response status code: {response.status}")
+
+    async def create(self, theme: ThemeModelToCreate, idempotency_key: str | None = None) -> str:
+        """"""
+        response = await self.request_handler.post(
+            "themes/create_theme", body=theme.model_dump(), idempotency_key=idempotency_key
+        )
 
         match response.status:
             case statuses.CREATED_201:
@@ -129,3 +159,22 @@ class ThemesStorageHandler(IThemesStorageHandler):
             case _:
                 self.logger.error(f"Unacceptable response status code: {response.status}")
                 raise UnexpectedResponse(f"Unacceptable response status code: {response.status}")
+
+
+_themes_storage_handler: IThemesStorageHandler | None = None
+
+
+def get_themes_storage_handler() -> IThemesStorageHandler:
+    """
+    Return application-wide themes storage handler, it's wrapped by entity cache if cache is enabled
+    and by tree snapshot of users if snapshot is enabled
+    """
+    global _themes_storage_handler
+    if _themes_storage_handler is None:
+        storage: IThemesStorageHandler = ThemesStorageHandler()
+        if config.BACKEND_ENTITY_CACHE_ENABLED:
+            storage = CachedThemesStorageHandler(storage, get_entity_cache())
+        if config.BACKEND_TREE_SNAPSHOT_ENABLED:
+            storage = SnapshotThemesStorageHandler(storage, get_tree_snapshots())
+        _themes_storage_handler = storage
+    return _themes_storage_handler
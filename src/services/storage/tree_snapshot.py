@@ -0,0 +1,376 @@
+import asyncio
+import contextvars
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import Any, Callable, Iterator, TypeVar
+
+from pydantic import BaseModel
+
+from src.models.alarm_model import AlarmModel
+from src.models.notes_models import NoteModel
+from src.models.themes_modles import ThemeModel
+from src.services.requests.RequestHandler import get_request_handler
+from src.services.requests.deadline import deadline, deadline_timeout
+from src.services.requests.lanes import RequestLane, request_lane
+from src.services.requests.single_flight import SingleFlight
+from src.services.storage.interfaces import IAlarmsStoragehandler, INotesStorageHandler, IThemesStorageHandler
+from src.utils import config
+from src.utils.exceptions.storage import StorageNotFound
+
+M = TypeVar("M", bound=BaseModel)
+Child = TypeVar("Child", NoteModel, AlarmModel)
+Entity = ThemeModel | NoteModel | AlarmModel
+
+THEME = "theme"
+NOTE = "note"
+ALARM = "alarm"
+
+
+def children_key(kind: str, _id: str) -> tuple[str, str]:
+    """Key of list of entity children: notes of theme or alarms of note"""
+    return f"children_of_{kind}", _id
+
+
+def user_key(user_id: str) -> tuple[str, str]:
+    """Key of all user lists"""
+    return "user", user_id
+
+
+def get_kind(entity: Entity) -> str:
+    if isinstance(entity, ThemeModel):
+        return THEME
+    if isinstance(entity, NoteModel):
+        return NOTE
+    return ALARM
+
+
+def apply_patch(model: M, new_data: dict[str, Any]) -> M:
+    """Apply patch in backend format, with dotted paths of nested fields, to model"""
+    data = model.model_dump(by_alias=True)
+    for path, value in new_data.items():
+        *parents, name = path.split(".")
+        target = data
+        for parent in parents:
+            target = target[parent]
+        target[name] = value
+    return type(model).model_validate(data)
+
+
+@dataclass
+class UserTree:
+    """All themes, notes and alarms of user, indexed by parent. Lists keep backend order, new items go last"""
+    user_id: str
+    loaded_at: float
+    themes: dict[str, ThemeModel] = field(default_factory=dict)
+    notes: dict[str, NoteModel] = field(default_factory=dict)
+    alarms: dict[str, AlarmModel] = field(default_factory=dict)
+    # Parent id to ordered set of child ids
+    notes_of_theme: dict[str, dict[str, None]] = field(default_factory=dict)
+    alarms_of_note: dict[str, dict[str, None]] = field(default_factory=dict)
+
+    def get(self, kind: str, _id: str) -> Entity | None:
+        return self._entities(kind).get(_id)
+
+    def keys(self) -> list[tuple[str, str]]:
+        return [(kind, _id) for kind in (THEME, NOTE, ALARM) for _id in self._entities(kind)]
+
+    def notes_by_theme(self, theme_id: str) -> list[NoteModel]:
+        return [self.notes[_id] for _id in self.notes_of_theme.get(theme_id, ())]
+
+    def alarms_by_note(self, note_id: str) -> list[AlarmModel]:
+        return [self.alarms[_id] for _id in self.alarms_of_note.get(note_id, ())]
+
+    def put(self, entity: Entity) -> None:
+        if isinstance(entity, ThemeModel):
+            self.themes[entity.id] = entity
+        elif isinstance(entity, NoteModel):
+            self._put_child(self.notes, self.notes_of_theme, entity, entity.links.theme_id, lambda x: x.links.theme_id)
+        else:
+            self._put_child(
+                self.alarms, self.alarms_of_note, entity, entity.links.parent_id, lambda x: x.links.parent_id
+            )
+
+    def remove(self, kind: str, _id: str) -> list[tuple[str, str]]:
+        """Remove entity with all its children, as backend does. :return: Keys of removed entities"""
+        removed = []
+        if kind == THEME:
+            if self.themes.pop(_id, None) is not None:
+                removed.append((THEME, _id))
+            for note_id in list(self.notes_of_theme.get(_id, ())):
+                removed += self.remove(NOTE, note_id)
+        elif kind == NOTE:
+            note = self.notes.pop(_id, None)
+            if note is not None:
+                self.notes_of_theme.get(note.links.theme_id, {}).pop(_id, None)
+                removed.append((NOTE, _id))
+            for alarm_id in list(self.alarms_of_note.get(_id, ())):
+                removed += self.remove(ALARM, alarm_id)
+        else:
+            alarm = self.alarms.pop(_id, None)
+            if alarm is not None:
+                self.alarms_of_note.get(alarm.links.parent_id, {}).pop(_id, None)
+                removed.append((ALARM, _id))
+        return removed
+
+    def _entities(self, kind: str) -> dict[str, Any]:
+        if kind == THEME:
+            return self.themes
+        if kind == NOTE:
+            return self.notes
+        return self.alarms
+
+    @staticmethod
+    def _put_child(entities: dict[str, Child], children_of: dict[str, dict[str, None]], entity: Child, parent_id: str,
+                   get_parent_id: Callable[[Child], str]) -> None:
+        old = entities.get(entity.id)
+        if old is not None and get_parent_id(old) != parent_id:
+            children_of.get(get_parent_id(old), {}).pop(entity.id, None)
+        entities[entity.id] = entity
+        children_of.setdefault(parent_id, {})[entity.id] = None
+
+
+class TreeSnapshots:
+    """
+    Trees of active users. Tree is loaded in background by three concurrent requests on first user interaction,
+    then menus are served from it and writes made through bot are applied to it.
+    Until tree is loaded, menus are served from storage. Changes made not through bot are seen after tree expires
+    """
+
+    def __init__(self, ttl: float = config.BACKEND_TREE_SNAPSHOT_TTL,
+                 max_users: int = config.BACKEND_TREE_SNAPSHOT_MAX_USERS,
+                 load_timeout: float = config.BACKEND_TREE_SNAPSHOT_LOAD_TIMEOUT) -> None:
+        """
+        :param ttl: Seconds tree is served since it was loaded
+        :param max_users: Max trees in memory, trees of the least recently active users are dropped
+        :param load_timeout: Seconds background load may take
+        """
+        self._logger = getLogger("app.tree_snapshot")
+        self.ttl = ttl
+        self.max_users = max_users
+        self.load_timeout = load_timeout
+        self._background_loads: set[asyncio.Task] = set()
+        self._trees: OrderedDict[str, UserTree] = OrderedDict()
+        self._owners: dict[tuple[str, str], str] = {}  # Entity key to id of user whose tree contains it
+        self._loads = SingleFlight()
+        # Changes are counted to reject tree which was loaded while some change was made
+        self._changes: Counter[str] = Counter()
+        self._writing: Counter[tuple[str, str]] = Counter()
+        # Entities of unknown owner changed while some tree was loading, to number of change
+        self._unowned_changes: dict[tuple[str, str], int] = {}
+        self._unowned_change_number = 0
+        self._loading = 0
+        self.loaded = 0
+        self.rejected = 0
+
+    def get_tree(self, user_id: str) -> UserTree | None:
+        tree = self._trees.get(user_id)
+        if tree is None:
+            return None
+        if tree.loaded_at + self.ttl <= time.monotonic():
+            self.drop(user_id)
+            return None
+        self._trees.move_to_end(user_id)
+        return tree
+
+    def get_owner_tree(self, kind: str, _id: str) -> UserTree | None:
+        """Tree containing entity, None if entity isn't in any tree"""
+        user_id = self._owners.get((kind, _id))
+        return self.get_tree(user_id) if user_id is not None else None
+
+    def write_keys(self, kind: str, _id: str) -> list[tuple[str, str]]:
+        """Keys of entity, its children list, list containing it and lists of its owner, write to entity changes them"""
+        keys = [(kind, _id), children_key(kind, _id)]
+        user_id = self._owners.get((kind, _id))
+        tree = self.get_tree(user_id) if user_id is not None else None
+        if tree is not None:
+            keys.append(user_key(tree.user_id))
+            entity = tree.get(kind, _id)
+            if isinstance(entity, NoteModel):
+                keys.append(children_key(THEME, entity.links.theme_id))
+            elif isinstance(entity, AlarmModel):
+                keys.append(children_key(NOTE, entity.links.parent_id))
+        return keys
+
+    @contextmanager
+    def writing(self, *keys: tuple[str, str]) -> Iterator[None]:
+        """Mark keys as being changed while write request is in flight"""
+        self._writing.update(keys)
+        try:
+            yield
+        finally:
+            self._writing.subtract(keys)
+            self._writing += Counter()
+
+    def is_writing(self, key: tuple[str, str]) -> bool:
+        """Concurrent read of changing data should go to storage to see result of write"""
+        return bool(self._writing[key])
+
+    async def ensure_loaded(self, user_id: str, themes_storage: IThemesStorageHandler,
+                            notes_storage: INotesStorageHandler, alarms_storage: IAlarmsStoragehandler) -> None:
+        """
+        Load tree of user if it isn't loaded yet. Concurrent calls for one user share one load.
+        Load errors are logged only, reads go to storage until tree is loaded
+        """
+        if self.get_tree(user_id) is not None:
+            return
+        try:
+            async with deadline_timeout(f"Load tree of user {user_id}"):
+                await self._loads.do(
+                    user_id, lambda: self._load(user_id, themes_storage, notes_storage, alarms_storage)
+                )
+        except Exception as err:
+            self._logger.warning(f"Can't load tree of user {user_id}: {err!r}")
+
+    def load_in_background(self, user_id: str, themes_storage: IThemesStorageHandler,
+                           notes_storage: INotesStorageHandler, alarms_storage: IAlarmsStoragehandler) -> None:
+        """Start loading tree of user if it isn't loaded or loading yet, caller doesn't wait for it"""
+        if user_id in self._loads or self.get_tree(user_id) is not None:
+            return
+        # Load doesn't belong to update it was started by: it has no update deadline or batch
+        task = asyncio.create_task(
+            self._load_in_background(user_id, themes_storage, notes_storage, alarms_storage),
+            context=contextvars.Context()
+        )
+        self._background_loads.add(task)
+        task.add_done_callback(self._background_loads.discard)
+
+    def put(self, entity: Entity) -> None:
+        """Entity was created or changed in storage"""
+        user_id = entity.links.user_id
+        self._changes[user_id] += 1
+        tree = self.get_tree(user_id)
+        if tree is None:
+            return
+        tree.put(entity)
+        self._owners[(get_kind(entity), entity.id)] = user_id
+
+    def update(self, kind: str, _id: str, change: Callable[[Entity], Entity]) -> None:
+        """Entity was changed in storage, apply the same change to it"""
+        tree = self._changed_tree(kind, _id)
+        if tree is None:
+            return
+        entity = tree.get(kind, _id)
+        if entity is None:
+            return
+        try:
+            tree.put(change(entity))
+        except Exception as err:
+            self._logger.warning(f"Can't apply change to {kind} {_id}, tree of user {tree.user_id} is dropped: {err!r}")
+            self.drop(tree.user_id)
+
+    def remove(self, kind: str, _id: str) -> None:
+        """Entity was deleted from storage with all its children"""
+        tree = self._changed_tree(kind, _id)
+        if tree is None:
+            return
+        for key in tree.remove(kind, _id):
+            self._owners.pop(key, None)
+
+    def remove_children(self, kind: str, parent_id: str) -> None:
+        """All children of entity were deleted from storage"""
+        tree = self._changed_tree(kind, parent_id)
+        if tree is None:
+            return
+        if kind == THEME:
+            children = [(NOTE, _id) for _id in tree.notes_of_theme.get(parent_id, ())]
+        else:
+            children = [(ALARM, _id) for _id in tree.alarms_of_note.get(parent_id, ())]
+        for child_kind, child_id in children:
+            for key in tree.remove(child_kind, child_id):
+                self._owners.pop(key, None)
+
+    def drop(self, user_id: str) -> None:
+        """Forget tree, it's loaded again on next user interaction"""
+        self._changes[user_id] += 1
+        tree = self._trees.pop(user_id, None)
+        if tree is not None:
+            for key in tree.keys():
+                if self._owners.get(key) == user_id:
+                    del self._owners[key]
+
+    def drop_owner(self, kind: str, _id: str) -> None:
+        """Result of write to entity is unknown, so tree containing it can't be trusted"""
+        user_id = self._owners.get((kind, _id))
+        if user_id is not None:
+            self.drop(user_id)
+        else:
+            self._unowned_change(kind, _id)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "users": len(self._trees), "entities": len(self._owners), "loaded": self.loaded, "rejected": self.rejected,
+            "loading": len(self._loads)
+        }
+
+    def _changed_tree(self, kind: str, _id: str) -> UserTree | None:
+        user_id = self._owners.get((kind, _id))
+        if user_id is None:
+            self._unowned_change(kind, _id)
+            return None
+        self._changes[user_id] += 1
+        return self.get_tree(user_id)
+
+    def _unowned_change(self, kind: str, _id: str) -> None:
+        """Entity may be in tree which is being loaded now, such tree is rejected"""
+        if self._loading:
+            self._unowned_change_number += 1
+            self._unowned_changes[(kind, _id)] = self._unowned_change_number
+
+    async def _load_in_background(self, user_id: str, themes_storage: IThemesStorageHandler,
+                                  notes_storage: INotesStorageHandler, alarms_storage: IAlarmsStoragehandler) -> None:
+        with request_lane(RequestLane.MAINTENANCE), deadline(self.load_timeout):
+            await self.ensure_loaded(user_id, themes_storage, notes_storage, alarms_storage)
+
+    async def _load(self, user_id: str, themes_storage: IThemesStorageHandler,
+                    notes_storage: INotesStorageHandler, alarms_storage: IAlarmsStoragehandler) -> None:
+        changes, unowned_change_number = self._changes[user_id], self._unowned_change_number
+        self._loading += 1
+        try:
+            results = await get_request_handler().batch().run(
+                themes_storage.get_all_by_user(user_id),
+                notes_storage.get_all_by_user(user_id),
+                alarms_storage.get_all_by_user(user_id),
+                return_exceptions=True
+            )
+            for result in results:
+                if isinstance(result, BaseException) and not isinstance(result, StorageNotFound):
+                    raise result
+
+            tree = UserTree(user_id, time.monotonic())
+            for entities in results:
+                if not isinstance(entities, StorageNotFound):
+                    for entity in entities:
+                        tree.put(entity)
+
+            # Change made while tree was loading may be missed by it
+            if changes != self._changes[user_id] or any(
+                self._unowned_changes.get(key, 0) > unowned_change_number for key in tree.keys()
+            ):
+                self.rejected += 1
+                return
+        finally:
+            self._loading -= 1
+            if not self._loading:
+                self._unowned_changes.clear()
+        self.drop(user_id)
+        self._trees[user_id] = tree
+        for key in tree.keys():
+            self._owners[key] = user_id
+        self.loaded += 1
+
+        while len(self._trees) > self.max_users:
+            self.drop(next(iter(self._trees)))
+
+
+_tree_snapshots: TreeSnapshots | None = None
+
+
+def get_tree_snapshots() -> TreeSnapshots:
+    """Return application-wide trees shared by all snapshot storage handlers"""
+    global _tree_snapshots
+    if _tree_snapshots is None:
+        _tree_snapshots = TreeSnapshots()
+    return _tree_snapshots
@@ -1,6 +1,8 @@
 from src.models.user_model import UserModel
+from src.services.storage.cache import get_entity_cache
+from src.services.storage.cached_storage_handlers import CachedUserStorageHandler
 from src.services.storage.interfaces import IUserStorageHandler
-from src.utils import statuses
+from src.utils import config, statuses
 from src.utils.exceptions.storage import StorageNotFound, StorageException, UnexpectedResponse, \
     StorageValidationError, StorageDuplicate
 
@@ -19,24 +21,26 @@ class UserStorageHandler(IUserStorageHandler):
 
         match response.status:
             case statuses.SUCCESS_200:
-                return UserModel.model_validate_json(response.body)
+                return UserModel.model_validate_json(response.content)
             case statuses.NOT_FOUND_404:
                 self.logger.info(f"Storage not found user with id: {user_id}")
                 raise StorageNotFound(f"Storage not found user with id: {user_id}")
             case _:
                 raise UnexpectedResponse(f"Unacceptable response status code: {response.status}")
 
-    async def create(self, user: UserModel) -> str:
+    async def create(self, user: UserModel, idempotency_key: str | None = None) -> str:
         """
         Create user in storage
         :param user:
+        :param idempotency_key: Repeated request with the same key is not executed by backend twice
         :return: User id
         :raise StorageDuplicate if user already exist
         :raise StorageValidationError if some endpoint model validation error
         """
         response = await self.request_handler.post(
             f"users/create_user",
-            body=user.model_dump()
+            body=user.model_dump(),
+            idempotency_key=idempotency_key
         )
 
         match response.status:
@@ -89,5 +93,15 @@ class UserStorageHandler(IUserStorageHandler):
                 raise UnexpectedResponse(f"Unacceptable response status code: {response.status}")
 
 
-def get_user_storage_handler() -> UserStorageHandler:
-    return UserStorageHandler()
+_user_storage_handler: IUserStorageHandler | None = None
+
+
+def get_user_storage_handler() -> IUserStorageHandler:
+    """Return application-wide users storage handler, it's wrapped by entity cache if cache is enabled"""
+    global _user_storage_handler
+    if _user_storage_handler is None:
+        storage = UserStorageHandler()
+        _user_storage_handler = (
+            CachedUserStorageHandler(storage, get_entity_cache()) if config.BACKEND_ENTITY_CACHE_ENABLED else storage
+        )
+    return _user_storage_handler
@@ -1,8 +1,8 @@
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from src.models.alarm_model import AlarmModel, AlarmStatus
-from src.models.notes_models import NoteModel
-from src.models.themes_modles import ThemeModel
+from src.models.alarm_model import AlarmModel, AlarmStatus, AlarmSummaryModel
+from src.models.notes_models import NoteSummaryModel
+from src.models.themes_modles import ThemeSummaryModel
 from src.services.ui.callbacks import Callbacks
 
 
@@ -45,7 +45,7 @@ def create_main_menu_kb() -> InlineKeyboardBuilder:
     return builder
 
 
-def create_theme_list_kb(themes: list[ThemeModel] | None) -> InlineKeyboardBuilder:
+def create_theme_list_kb(themes: list[ThemeSummaryModel] | None) -> InlineKeyboardBuilder:
     """
     Create inline keyboard with all users themes as a keys (if list not None) + keys: Create new theme, back to menu
     :return: aiogram keyboard builder
@@ -62,7 +62,7 @@ def create_theme_list_kb(themes: list[ThemeModel] | None) -> InlineKeyboardBuild
     return builder
 
 
-def create_theme_menu_kb(theme_id: str, theme_notes: list[NoteModel] | None) -> InlineKeyboardBuilder:
+def create_theme_menu_kb(theme_id: str, theme_notes: list[NoteSummaryModel] | None) -> InlineKeyboardBuilder:
     """"""
     builder = InlineKeyboardBuilder()
 
@@ -92,7 +92,7 @@ def create_change_name_or_description_kb() -> InlineKeyboardBuilder:
 
 
 def create_note_menu_kb(note_id: str, parent_theme_id: str,
-                        note_alarms: list[AlarmModel] | None) -> InlineKeyboardBuilder:
+                        note_alarms: list[AlarmSummaryModel] | None) -> InlineKeyboardBuilder:
     """"""
     builder = InlineKeyboardBuilder()
 
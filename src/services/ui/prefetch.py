@@ -0,0 +1,137 @@
+import asyncio
+import contextvars
+from functools import partial
+from logging import getLogger
+from typing import Any, Awaitable, Callable
+
+from src.models.alarm_model import ACTIVE_ALARM_STATUSES, AlarmSummaryModel
+from src.models.notes_models import NoteSummaryModel
+from src.models.themes_modles import ThemeSummaryModel
+from src.services.requests.deadline import deadline
+from src.services.requests.lanes import RequestLane, request_lane
+from src.services.storage.alarms_storage_handler import get_alarms_storage_handler
+from src.services.storage.notes_storage_handler import get_notes_storage_handler
+from src.services.storage.themes_storage_handler import get_themes_storage_handler
+from src.services.storage.tree_snapshot import TreeSnapshots, get_tree_snapshots
+from src.utils import config
+from src.utils.exceptions.storage import StorageNotFound
+
+Load = Callable[[], Awaitable[Any]]
+
+
+class NavigationPrefetcher:
+    """
+    Warm entity cache with screens user is likely to open next - menus of items of the list user looks at.
+    Prefetch runs in background in maintenance lane, one per user, and is cancelled by the next update of user.
+    Request in flight is shared with the same request of handler, so cancel doesn't waste it.
+    With tree snapshot prefetch covers only users whose tree isn't loaded yet, loaded tree serves menus without requests
+    """
+
+    def __init__(self, enabled: bool = config.BACKEND_PREFETCH_ENABLED and config.BACKEND_ENTITY_CACHE_ENABLED,
+                 user_budget: int = config.BACKEND_PREFETCH_USER_BUDGET,
+                 global_budget: int = config.BACKEND_PREFETCH_GLOBAL_BUDGET,
+                 timeout: float = config.BACKEND_PREFETCH_TIMEOUT,
+                 snapshots: TreeSnapshots | None = None) -> None:
+        """
+        :param enabled: Prefetch is useless without entity cache
+        :param user_budget: Max requests of one prefetch, menus of the first items of list are prefetched
+        :param global_budget: Max prefetch requests of all users in flight, prefetch gets what is left or is skipped
+        :param timeout: Seconds prefetch may take, later user has most likely gone
+        :param snapshots: Tree snapshots if enabled, users with loaded tree aren't prefetched for
+        """
+        self._logger = getLogger("app.prefetch")
+        self.enabled = enabled
+        self.snapshots = snapshots
+        self.user_budget = user_budget
+        self.global_budget = global_budget
+        self.timeout = timeout
+        self._tasks: dict[int, asyncio.Task] = {}
+        self._reserved = 0
+        self.started = 0
+        self.skipped = 0
+        self.cancelled = 0
+
+    def prefetch_theme_menus(self, user_id: int, themes: list[ThemeSummaryModel] | None) -> None:
+        """Load what open_theme_menu needs for themes of list"""
+        themes_sh, notes_sh = get_themes_storage_handler(), get_notes_storage_handler()
+        self._prefetch(user_id, [
+            load
+            for theme in themes or ()
+            for load in (partial(themes_sh.get, theme.id), partial(notes_sh.get_summaries_by_theme, theme.id))
+        ])
+
+    def prefetch_note_menus(self, user_id: int, notes: list[NoteSummaryModel] | None) -> None:
+        """Load what open_note_menu needs for notes of list"""
+        notes_sh, alarms_sh = get_notes_storage_handler(), get_alarms_storage_handler()
+        self._prefetch(user_id, [
+            load
+            for note in notes or ()
+            for load in (
+                partial(notes_sh.get, note.id),
+                partial(alarms_sh.get_summaries_by_parent, note.id, ACTIVE_ALARM_STATUSES)
+            )
+        ])
+
+    def prefetch_alarm_menus(self, user_id: int, alarms: list[AlarmSummaryModel] | None) -> None:
+        """Load what open_alarm needs for alarms of list"""
+        alarms_sh = get_alarms_storage_handler()
+        self._prefetch(user_id, [partial(alarms_sh.get, alarm.id) for alarm in alarms or ()])
+
+    def cancel(self, user_id: int) -> None:
+        """User navigated elsewhere, prefetch of previous screen isn't needed anymore"""
+        task = self._tasks.pop(user_id, None)
+        if task is not None and not task.done():
+            task.cancel()
+            self.cancelled += 1
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "in_flight": len(self._tasks),
+            "reserved": self._reserved,
+            "started": self.started,
+            "skipped": self.skipped,
+            "cancelled": self.cancelled,
+        }
+
+    def _prefetch(self, user_id: int, loads: list[Load]) -> None:
+        self.cancel(user_id)
+        if not self.enabled or not loads:
+            return
+        if self.snapshots is not None and self.snapshots.get_tree(str(user_id)) is not None:
+            return
+
+        budget = min(len(loads), self.user_budget, self.global_budget - self._reserved)
+        if budget <= 0:
+            self.skipped += 1
+            return
+        self._reserved += budget
+        self.started += 1
+
+        # Prefetch doesn't belong to update it was started by: it has no update deadline or batch
+        task = asyncio.create_task(self._run(loads[:budget]), context=contextvars.Context())
+        self._tasks[user_id] = task
+        task.add_done_callback(lambda done: self._on_done(user_id, done, budget))
+
+    async def _run(self, loads: list[Load]) -> None:
+        with request_lane(RequestLane.MAINTENANCE), deadline(self.timeout):
+            results = await asyncio.gather(*(load() for load in loads), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception) and not isinstance(result, StorageNotFound):
+                self._logger.debug(f"Prefetch request failed: {result!r}")
+
+    def _on_done(self, user_id: int, task: asyncio.Task, budget: int) -> None:
+        self._reserved -= budget
+        if self._tasks.get(user_id) is task:
+            del self._tasks[user_id]
+
+
+_navigation_prefetcher: NavigationPrefetcher | None = None
+
+
+def get_navigation_prefetcher() -> NavigationPrefetcher:
+    global _navigation_prefetcher
+    if _navigation_prefetcher is None:
+        _navigation_prefetcher = NavigationPrefetcher(
+            snapshots=get_tree_snapshots() if config.BACKEND_TREE_SNAPSHOT_ENABLED else None
+        )
+    return _navigation_prefetcher
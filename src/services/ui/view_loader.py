@@ -0,0 +1,70 @@
+from dataclasses import dataclass
+from typing import Any, Coroutine
+
+from src.services.requests.RequestHandler import RequestHandler, get_request_handler
+from src.utils.exceptions.storage import StorageNotFound
+
+
+@dataclass
+class ViewDependency:
+    load: Coroutine[Any, Any, Any]
+    required: bool
+    default: Any = None
+
+
+class ViewData:
+    """Loaded data of screen by dependency names"""
+
+    def __init__(self) -> None:
+        self.values: dict[str, Any] = {}
+        self.not_found: dict[str, StorageNotFound] = {}
+
+    def __getitem__(self, name: str) -> Any:
+        return self.values[name]
+
+    def is_found(self, name: str) -> bool:
+        return name not in self.not_found
+
+
+class ViewLoader:
+    """
+    Declare storage data screen needs and load it at once. Dependencies are independent, so they are loaded
+    concurrently in one request batch and screen waits the slowest of them instead of their sum.
+    Usage:
+    `view = await ViewLoader().require("note", notes_sh.get(_id)).optional("alarms", alarms_sh.get_all(_id)).load()`
+    """
+
+    def __init__(self, request_handler: RequestHandler | None = None) -> None:
+        self.request_handler = request_handler if request_handler is not None else get_request_handler()
+        self._dependencies: dict[str, ViewDependency] = {}
+
+    def require(self, name: str, load: Coroutine[Any, Any, Any]) -> "ViewLoader":
+        """Screen can't be shown without this data, its StorageNotFound is raised by load()"""
+        self._dependencies[name] = ViewDependency(load, required=True)
+        return self
+
+    def optional(self, name: str, load: Coroutine[Any, Any, Any], default: Any = None) -> "ViewLoader":
+        """Screen is shown without this data, on StorageNotFound it gets default and is marked as not found"""
+        self._dependencies[name] = ViewDependency(load, required=False, default=default)
+        return self
+
+    async def load(self) -> ViewData:
+        """
+        Load all dependencies. Errors are raised in order of declaration after all dependencies are finished,
+        so handler sees the same error as if dependencies were loaded one by one
+        """
+        results = await self.request_handler.batch().run(
+            *(dependency.load for dependency in self._dependencies.values()),
+            return_exceptions=True
+        )
+
+        view = ViewData()
+        for (name, dependency), result in zip(self._dependencies.items(), results):
+            if isinstance(result, StorageNotFound) and not dependency.required:
+                view.values[name] = dependency.default
+                view.not_found[name] = result
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                view.values[name] = result
+        return view
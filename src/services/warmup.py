@@ -0,0 +1,60 @@
+import asyncio
+import os
+import time
+from logging import getLogger
+
+from aiogram import Bot
+
+from src.services.requests.RequestHandler import RequestHandler
+from src.services.requests.retry import TRANSPORT_ERRORS
+from src.utils import config
+from src.utils.exceptions.request import RequestException
+
+logger = getLogger("app.warmup")
+
+AUTH_ERRORS: tuple[type[Exception], ...] = (RequestException, *TRANSPORT_ERRORS)
+
+
+async def warm_up(bot: Bot, request_handler: RequestHandler) -> None:
+    """
+    Prepare bot before polling starts: get backend auth token, from persisted file if it's still valid,
+    and open pooled connections to backend and Telegram API, so first updates don't pay for it.
+    Warm-up errors are logged only, bot starts anyway and connects lazily
+    """
+    started_at = time.monotonic()
+
+    if not (config.BACKEND_TOKEN_FILE and request_handler.load_token(config.BACKEND_TOKEN_FILE)):
+        try:
+            await request_handler.ensure_token()
+        except AUTH_ERRORS as err:
+            logger.error(f"Warm up auth failed: {err!r}")
+
+    backend_connections, telegram_results = await asyncio.gather(
+        request_handler.transport.warm_up(config.BACKEND_WARMUP_CONNECTIONS),
+        asyncio.gather(*(bot.get_me() for _ in range(config.BOT_WARMUP_CONNECTIONS)), return_exceptions=True)
+    )
+    telegram_connections = sum(not isinstance(result, BaseException) for result in telegram_results)
+
+    logger.info(
+        f"Warm up finished in {time.monotonic() - started_at:.2f}s - "
+        f"backend connections: {backend_connections}, telegram connections: {telegram_connections}"
+    )
+
+
+def mark_ready(path: str = config.BOT_READINESS_FILE) -> None:
+    """Create readiness file for orchestrator probe"""
+    if not path:
+        return
+    with open(path, "w") as f:
+        f.write(str(os.getpid()))
+    logger.info(f"Bot is ready, readiness file: {path}")
+
+
+def mark_not_ready(path: str = config.BOT_READINESS_FILE) -> None:
+    """Remove readiness file when bot stops"""
+    if not path:
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
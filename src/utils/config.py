@@ -8,13 +8,23 @@ from .exceptions.configurate_exceptions import EnvDependNotFound
 load_dotenv()
 
 
-def get_env_var(var_name: str) -> str:
+def get_bool_env_var(var_name: str, default: bool = False) -> bool:
     """
-    :raise EnvDependNotFound if value in None
     :param var_name: Env var name
+    :param default: Value to use if env var not set
+    :return: True if var value is one of: 1, true, yes
+    """
+    return get_env_var(var_name, str(default)).strip().lower() in ("1", "true", "yes")
+
+
+def get_env_var(var_name: str, default: str | None = None) -> str:
+    """
+    :raise EnvDependNotFound if value in None and no default value
+    :param var_name: Env var name
+    :param default: Value to use if env var not set
     :return: Var value by name
     """
-    value: str | None = os.getenv(var_name)
+    value: str | None = os.getenv(var_name, default)
     if value is None:
         raise EnvDependNotFound(var_name)
     else:
@@ -22,6 +32,99 @@ def get_env_var(var_name: str) -> str:
 
 
 BOT_TOKEN: Final[str] = get_env_var("BOT_TOKEN")
-BACKEND_HOST: Final[str] = get_env_var("BACKEND_HOST")
+BACKEND_HOST: Final[str] = get_env_var("BACKEND_HOST")  # Comma separated if there are several hosts
 BACKEND_USER_LOGIN: Final[str] = get_env_var("BACKEND_USER_LOGIN")
 BACKEND_USER_PASSWORD: Final[str] = get_env_var("BACKEND_USER_PASSWORD")
+BACKEND_TOKEN_REFRESH_LEEWAY: Final[float] = float(get_env_var("BACKEND_TOKEN_REFRESH_LEEWAY", "60"))
+
+# Backend connection pool
+BACKEND_POOL_SIZE: Final[int] = int(get_env_var("BACKEND_POOL_SIZE", "100"))
+BACKEND_KEEPALIVE_TIMEOUT: Final[float] = float(get_env_var("BACKEND_KEEPALIVE_TIMEOUT", "30"))
+BACKEND_DNS_CACHE_TTL: Final[int] = int(get_env_var("BACKEND_DNS_CACHE_TTL", "300"))
+BACKEND_REQUEST_TIMEOUT: Final[float] = float(get_env_var("BACKEND_REQUEST_TIMEOUT", "10"))
+
+# Backend retries for idempotent requests
+BACKEND_RETRY_MAX_ATTEMPTS: Final[int] = int(get_env_var("BACKEND_RETRY_MAX_ATTEMPTS", "3"))
+BACKEND_RETRY_BASE_DELAY: Final[float] = float(get_env_var("BACKEND_RETRY_BASE_DELAY", "0.2"))
+BACKEND_RETRY_MAX_DELAY: Final[float] = float(get_env_var("BACKEND_RETRY_MAX_DELAY", "2"))
+BACKEND_RETRY_BUDGET: Final[float] = float(get_env_var("BACKEND_RETRY_BUDGET", "5"))
+
+# Backend circuit breakers by endpoint family
+BACKEND_CIRCUIT_FAILURE_THRESHOLD: Final[int] = int(get_env_var("BACKEND_CIRCUIT_FAILURE_THRESHOLD", "5"))
+BACKEND_CIRCUIT_RESET_TIMEOUT: Final[float] = float(get_env_var("BACKEND_CIRCUIT_RESET_TIMEOUT", "30"))
+BACKEND_CIRCUIT_HALF_OPEN_PROBES: Final[int] = int(get_env_var("BACKEND_CIRCUIT_HALF_OPEN_PROBES", "1"))
+
+# Conditional GET cache (ETag / Last-Modified)
+BACKEND_HTTP_CACHE_MAX_ENTRIES: Final[int] = int(get_env_var("BACKEND_HTTP_CACHE_MAX_ENTRIES", "1000"))
+BACKEND_HTTP_CACHE_MAX_BYTES: Final[int] = int(get_env_var("BACKEND_HTTP_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+# Backend traffic lanes
+BACKEND_MAX_CONCURRENCY: Final[int] = int(get_env_var("BACKEND_MAX_CONCURRENCY", str(BACKEND_POOL_SIZE)))
+BACKEND_LANE_INTERACTIVE_LIMIT: Final[int] = int(get_env_var("BACKEND_LANE_INTERACTIVE_LIMIT", "64"))
+BACKEND_LANE_SCHEDULER_LIMIT: Final[int] = int(get_env_var("BACKEND_LANE_SCHEDULER_LIMIT", "16"))
+BACKEND_LANE_MAINTENANCE_LIMIT: Final[int] = int(get_env_var("BACKEND_LANE_MAINTENANCE_LIMIT", "8"))
+
+# Adaptive concurrency limit by endpoint family
+BACKEND_LIMITER_INITIAL_LIMIT: Final[int] = int(get_env_var("BACKEND_LIMITER_INITIAL_LIMIT", "20"))
+BACKEND_LIMITER_MIN_LIMIT: Final[int] = int(get_env_var("BACKEND_LIMITER_MIN_LIMIT", "2"))
+BACKEND_LIMITER_LATENCY_THRESHOLD: Final[float] = float(get_env_var("BACKEND_LIMITER_LATENCY_THRESHOLD", "1"))
+BACKEND_LIMITER_BACKOFF_RATIO: Final[float] = float(get_env_var("BACKEND_LIMITER_BACKOFF_RATIO", "0.9"))
+BACKEND_LIMITER_MAX_QUEUE: Final[int] = int(get_env_var("BACKEND_LIMITER_MAX_QUEUE", "200"))
+
+# Hedged GET requests
+BACKEND_HEDGING_ENABLED: Final[bool] = get_bool_env_var("BACKEND_HEDGING_ENABLED")
+BACKEND_HEDGE_PERCENTILE: Final[float] = float(get_env_var("BACKEND_HEDGE_PERCENTILE", "95"))
+BACKEND_HEDGE_BUDGET_RATIO: Final[float] = float(get_env_var("BACKEND_HEDGE_BUDGET_RATIO", "0.05"))
+BACKEND_HEDGE_MIN_SAMPLES: Final[int] = int(get_env_var("BACKEND_HEDGE_MIN_SAMPLES", "20"))
+BACKEND_HEDGE_WINDOW: Final[int] = int(get_env_var("BACKEND_HEDGE_WINDOW", "500"))
+
+# Backend hosts balancing
+BACKEND_READ_HOSTS: Final[str] = get_env_var("BACKEND_READ_HOSTS", "")
+BACKEND_READ_AFTER_WRITE_WINDOW: Final[float] = float(get_env_var("BACKEND_READ_AFTER_WRITE_WINDOW", "2"))
+BACKEND_EJECTION_THRESHOLD: Final[int] = int(get_env_var("BACKEND_EJECTION_THRESHOLD", "3"))
+BACKEND_EJECTION_TIME: Final[float] = float(get_env_var("BACKEND_EJECTION_TIME", "10"))
+BACKEND_SLOW_START: Final[float] = float(get_env_var("BACKEND_SLOW_START", "30"))
+
+# Compression
+BACKEND_COMPRESS_REQUESTS: Final[bool] = get_bool_env_var("BACKEND_COMPRESS_REQUESTS")
+BACKEND_COMPRESS_THRESHOLD: Final[int] = int(get_env_var("BACKEND_COMPRESS_THRESHOLD", "4096"))
+BACKEND_REQUEST_ENCODING: Final[str] = get_env_var("BACKEND_REQUEST_ENCODING", "gzip")
+
+# Update deadlines
+BACKEND_CALLBACK_DEADLINE: Final[float] = float(get_env_var("BACKEND_CALLBACK_DEADLINE", "10"))
+BACKEND_MESSAGE_DEADLINE: Final[float] = float(get_env_var("BACKEND_MESSAGE_DEADLINE", "30"))
+
+# Startup warm-up
+BACKEND_WARMUP_CONNECTIONS: Final[int] = int(get_env_var("BACKEND_WARMUP_CONNECTIONS", "4"))
+BOT_WARMUP_CONNECTIONS: Final[int] = int(get_env_var("BOT_WARMUP_CONNECTIONS", "2"))
+BACKEND_TOKEN_FILE: Final[str] = get_env_var("BACKEND_TOKEN_FILE", "")
+BOT_READINESS_FILE: Final[str] = get_env_var("BOT_READINESS_FILE", "")
+
+# Batch requests
+BACKEND_BATCH_ENABLED: Final[bool] = get_bool_env_var("BACKEND_BATCH_ENABLED")
+BACKEND_BATCH_URL: Final[str] = get_env_var("BACKEND_BATCH_URL", "batch/")
+BACKEND_BATCH_LINGER: Final[float] = float(get_env_var("BACKEND_BATCH_LINGER", "0.005"))
+
+# WebSocket transport
+BACKEND_WS_MAX_IN_FLIGHT: Final[int] = int(get_env_var("BACKEND_WS_MAX_IN_FLIGHT", "256"))
+BACKEND_WS_HEARTBEAT: Final[float] = float(get_env_var("BACKEND_WS_HEARTBEAT", "15"))
+BACKEND_WS_MAX_RECONNECT_DELAY: Final[float] = float(get_env_var("BACKEND_WS_MAX_RECONNECT_DELAY", "5"))
+
+# Entity cache of storage handlers
+BACKEND_ENTITY_CACHE_ENABLED: Final[bool] = get_bool_env_var("BACKEND_ENTITY_CACHE_ENABLED", True)
+BACKEND_ENTITY_CACHE_TTL: Final[float] = float(get_env_var("BACKEND_ENTITY_CACHE_TTL", "60"))
+BACKEND_ENTITY_CACHE_MAX_ENTRIES: Final[int] = int(get_env_var("BACKEND_ENTITY_CACHE_MAX_ENTRIES", "10000"))
+BACKEND_ENTITY_CACHE_MAX_BYTES: Final[int] = int(get_env_var("BACKEND_ENTITY_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+BACKEND_NOT_FOUND_CACHE_TTL: Final[float] = float(get_env_var("BACKEND_NOT_FOUND_CACHE_TTL", "10"))
+
+# Per-user tree snapshot of themes, notes and alarms
+BACKEND_TREE_SNAPSHOT_ENABLED: Final[bool] = get_bool_env_var("BACKEND_TREE_SNAPSHOT_ENABLED")
+BACKEND_TREE_SNAPSHOT_TTL: Final[float] = float(get_env_var("BACKEND_TREE_SNAPSHOT_TTL", "60"))
+BACKEND_TREE_SNAPSHOT_MAX_USERS: Final[int] = int(get_env_var("BACKEND_TREE_SNAPSHOT_MAX_USERS", "1000"))
+BACKEND_TREE_SNAPSHOT_LOAD_TIMEOUT: Final[float] = float(get_env_var("BACKEND_TREE_SNAPSHOT_LOAD_TIMEOUT", "10"))
+
+# Background prefetch of next navigation level, skipped for users whose tree snapshot is loaded
+BACKEND_PREFETCH_ENABLED: Final[bool] = get_bool_env_var("BACKEND_PREFETCH_ENABLED", True)
+BACKEND_PREFETCH_USER_BUDGET: Final[int] = int(get_env_var("BACKEND_PREFETCH_USER_BUDGET", "6"))
+BACKEND_PREFETCH_GLOBAL_BUDGET: Final[int] = int(get_env_var("BACKEND_PREFETCH_GLOBAL_BUDGET", "64"))
+BACKEND_PREFETCH_TIMEOUT: Final[float] = float(get_env_var("BACKEND_PREFETCH_TIMEOUT", "10"))
@@ -5,11 +5,12 @@ from typing import Callable, Any
 
 from aiogram import types
 
+from src.utils.exceptions.request import BackendUnavailable, DeadlineExceeded
 from src.utils.exceptions.storage import UnexpectedResponse
 
 
 def handel_storage_unexpected_response(method: Callable) -> Callable:
-    """Handle UnexpectedResponse in callback or message handlers"""
+    """Handle UnexpectedResponse, BackendUnavailable or DeadlineExceeded in callback or message handlers"""
 
     logger = getLogger("UnexpectedResponse")
 
@@ -18,8 +19,11 @@ def handel_storage_unexpected_response(method: Callable) -> Callable:
         try:
             return await method(*args, **kwargs)
 
-        except UnexpectedResponse as e:
-            logger.critical(f"{str(e)} Details: {traceback.format_exc()}")
+        except (UnexpectedResponse, BackendUnavailable, DeadlineExceeded) as e:
+            if isinstance(e, DeadlineExceeded):
+                logger.warning(f"{str(e)}")
+            else:
+                logger.critical(f"{str(e)} Details: {traceback.format_exc()}")
 
             text = "Что-то пошло не так, попробуйте позже"
             for i in args:
@@ -32,3 +32,31 @@ class ResponseValidationException(RequestException):
                  *args, **kwargs) -> None:
         exception_msg = f"{request_type}/ invalid response {url}, unexpected body: {body}"
         super().__init__(status, exception_msg, *args, *kwargs)
+
+
+class BackendUnavailable(RequestException):
+    """
+    Raise when backend can't be reached, after all allowed retries
+    """
+    ...
+
+
+class CircuitBreakerOpen(BackendUnavailable):
+    """
+    Raise when circuit breaker of endpoint family is open and request is not sent
+    """
+    ...
+
+
+class ConcurrencyLimitExceeded(BackendUnavailable):
+    """
+    Raise when request is shed by adaptive concurrency limiter
+    """
+    ...
+
+
+class DeadlineExceeded(RequestException):
+    """
+    Raise when time budget of current update is gone and backend call is cancelled
+    """
+    ...
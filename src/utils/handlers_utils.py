@@ -1,4 +1,5 @@
 import functools
+import uuid
 
 from logging import Logger
 from typing import Callable, Any
@@ -71,3 +72,28 @@ async def send_error_message(
         )
 
     return message_out
+
+
+IDEMPOTENCY_NONCE_KEY = "idempotency_nonce"
+
+
+async def start_idempotent_flow(state: FSMContext) -> None:
+    """
+    Write nonce of create operation to user FSM data on the first step of create flow.
+    Nonce lives until FSM data is cleared, so repeated save of the same flow gets the same idempotency key
+    """
+    user_data = await state.get_data()
+    if IDEMPOTENCY_NONCE_KEY not in user_data:
+        await state.update_data({IDEMPOTENCY_NONCE_KEY: uuid.uuid4().hex})
+
+
+async def get_idempotency_key(user_id: int | str, state: FSMContext) -> str:
+    """
+    Idempotency key of create operation: user id, current FSM state and flow nonce
+    """
+    user_data = await state.get_data()
+    nonce = user_data.get(IDEMPOTENCY_NONCE_KEY)
+    if nonce is None:
+        nonce = uuid.uuid4().hex
+        await state.update_data({IDEMPOTENCY_NONCE_KEY: nonce})
+    return f"{user_id}:{await state.get_state()}:{nonce}"
@@ -0,0 +1,24 @@
+import json
+from typing import Any, Callable
+
+# orjson is optional, it parses bytes directly and much faster than stdlib json
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+JSON_BACKEND: str = "orjson" if orjson is not None else "json"
+
+
+def json_loads(data: bytes | str) -> Any:
+    """Parse json from bytes or str with the fastest available backend"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj: Any, default: Callable[[Any], Any] | None = None) -> bytes:
+    """Serialize obj to json bytes with the fastest available backend"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=default)
+    return json.dumps(obj, default=default).encode()
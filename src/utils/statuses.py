@@ -7,3 +7,10 @@ NOT_FOUND_404: Final[int] = 404
 UNAUTHORIZED_401: Final[int] = 401
 VALIDATION_ERROR_422: Final[int] = 422
 BAD_REQUEST_400: Final[int] = 400
+METHOD_NOT_ALLOWED_405: Final[int] = 405
+TOO_MANY_REQUESTS_429: Final[int] = 429
+NOT_IMPLEMENTED_501: Final[int] = 501
+BAD_GATEWAY_502: Final[int] = 502
+SERVICE_UNAVAILABLE_503: Final[int] = 503
+GATEWAY_TIMEOUT_504: Final[int] = 504
+NOT_MODIFIED_304: Final[int] = 304
@@ -0,0 +1,8 @@
+import os
+
+# Config requires these variables, tests never reach real bot or backend
+os.environ.setdefault("BOT_TOKEN", "1:test")
+os.environ.setdefault("BACKEND_HOST", "http://127.0.0.1:1")
+os.environ.setdefault("BACKEND_USER_LOGIN", "test")
+os.environ.setdefault("BACKEND_USER_PASSWORD", "test")
+os.environ.setdefault("BACKEND_RETRY_BASE_DELAY", "0.01")
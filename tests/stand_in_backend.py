@@ -0,0 +1,207 @@
+import hashlib
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Mapping
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.services.requests.RequestHandler import RequestHandler
+from src.utils import config, statuses
+from src.utils.json_backend import json_dumps
+
+
+@dataclass
+class Answer:
+    status: int
+    body: Any = None
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+Route = Callable[[re.Match, Any], Answer]
+
+
+class StandInBackend:
+    """
+    In-memory backend for tests. It serves routes storage handlers use and batch envelope endpoint.
+    Write requests with 'Idempotency-Key' header are executed once, repeated request gets answer of the first one.
+    GET answers may have validators, conditional request with current ones is answered with 304
+    """
+
+    def __init__(self) -> None:
+        self.users: dict[str, dict] = {}
+        self.alarms: dict[str, dict] = {}
+        self.requests: list[str] = []  # 'METHOD /path?query' of every request that reached backend
+        self.idempotency_keys: list[str] = []  # Key of every write request sent with it
+        self.lost_answers = 0  # Next write answers are replaced with 503 after write is done, as if answer was lost
+        self.batches: list[list[dict]] = []  # Operations of every batch envelope
+        self.batch_answer: Answer | None = None  # Answer of batch endpoint instead of executing envelope
+        self.etag_enabled = False  # GET answers have 'ETag' of their body
+        self.last_modified: str | None = None  # 'Last-Modified' of GET answers
+        self.not_modified = 0  # Conditional requests answered with 304
+        self._idempotent_answers: dict[str, Answer] = {}
+        self._routes: list[tuple[str, re.Pattern, Route]] = [
+            ("POST", re.compile(r"/auth/jwt/login"), self.login),
+            ("GET", re.compile(r"/users/get_user/(?P<id>[^/]+)"), self.get_user),
+            ("POST", re.compile(r"/users/create_user"), self.create_user),
+            ("GET", re.compile(r"/alarms/get_alarm/(?P<id>[^/?]+)"), self.get_alarm),
+            ("GET", re.compile(r"/alarms/get_all_ready_alarms"), self.get_ready_alarms),
+            ("GET", re.compile(r"/alarms/get_all_alarm_by_parent_id/(?P<id>[^/?]+)(\?.*)?"), self.get_alarms_by_parent),
+            ("PATCH", re.compile(r"/alarms/update_alarm/(?P<id>[^/?]+)"), self.patch_alarm),
+            ("PATCH", re.compile(r"/alarms/update_alarm_status/(?P<id>[^/?]+)\?new_status=(?P<status>\w+)"),
+             self.update_alarm_status),
+            ("PATCH", re.compile(r"/alarms/postpone_repeatable_alarm/(?P<id>[^/?]+)"), self.postpone_alarm),
+            ("POST", re.compile(f"/{re.escape(config.BACKEND_BATCH_URL)}"), self.batch),
+        ]
+
+    async def start(self) -> TestServer:
+        app = web.Application()
+        app.router.add_route("*", "/{path:.*}", self.handle)
+        server = TestServer(app)
+        await server.start_server()
+        return server
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if request.content_type == "application/json":
+            body = await request.json()
+        else:
+            body = dict(await request.post())
+        answer = self.dispatch(request.method, request.path_qs, body, request.headers)
+        return web.Response(
+            body=json_dumps(answer.body) if answer.body is not None else None,
+            status=answer.status,
+            headers=answer.headers,
+            content_type="application/json"
+        )
+
+    def dispatch(self, method: str, url: str, body: Any, headers: Mapping[str, str]) -> Answer:
+        self.requests.append(f"{method} {url}")
+        if method == "GET":
+            return self.revalidate(self.route(method, url, body), headers)
+
+        idempotency_key = headers.get("Idempotency-Key")
+        if idempotency_key is not None:
+            self.idempotency_keys.append(idempotency_key)
+        if idempotency_key is not None and idempotency_key in self._idempotent_answers:
+            answer = self._idempotent_answers[idempotency_key]
+        else:
+            answer = self.route(method, url, body)
+            if idempotency_key is not None:
+                self._idempotent_answers[idempotency_key] = answer
+
+        if self.lost_answers:
+            self.lost_answers -= 1
+            return Answer(statuses.SERVICE_UNAVAILABLE_503, "answer is lost")
+        return answer
+
+    def revalidate(self, answer: Answer, headers: Mapping[str, str]) -> Answer:
+        """Add validators to successful answer, answer 304 if request has the same ones"""
+        if answer.status != statuses.SUCCESS_200:
+            return answer
+
+        validators = {}
+        if self.etag_enabled:
+            validators["ETag"] = f'"{hashlib.sha1(json_dumps(answer.body)).hexdigest()}"'
+        if self.last_modified is not None:
+            validators["Last-Modified"] = self.last_modified
+
+        if "If-None-Match" in headers:
+            is_modified = headers["If-None-Match"] != validators.get("ETag")
+        elif "If-Modified-Since" in headers:
+            is_modified = headers["If-Modified-Since"] != validators.get("Last-Modified")
+        else:
+            is_modified = True
+        if not is_modified:
+            self.not_modified += 1
+            return Answer(statuses.NOT_MODIFIED_304, headers=validators)
+        return Answer(answer.status, answer.body, {**answer.headers, **validators})
+
+    def route(self, method: str, url: str, body: Any) -> Answer:
+        for route_method, pattern, route in self._routes:
+            match = pattern.fullmatch(url)
+            if route_method == method and match is not None:
+                return route(match, body)
+        return Answer(statuses.NOT_FOUND_404, "route not found")
+
+    def login(self, _: re.Match, body: Any) -> Answer:
+        return Answer(statuses.SUCCESS_200, {"access_token": "token", "token_type": "bearer"})
+
+    def batch(self, _: re.Match, body: Any) -> Answer:
+        """Execute operations of envelope in order, every one has its own answer"""
+        self.batches.append(body["requests"])
+        if self.batch_answer is not None:
+            return self.batch_answer
+
+        answers = [
+            self.dispatch(
+                operation["method"], f"/{operation['url']}", operation["body"],
+                {"Idempotency-Key": operation["idempotency_key"]} if "idempotency_key" in operation else {}
+            )
+            for operation in body["requests"]
+        ]
+        return Answer(statuses.SUCCESS_200, {"responses": [
+            {"status": answer.status, "headers": answer.headers, "body": answer.body} for answer in answers
+        ]})
+
+    def get_user(self, match: re.Match, _: Any) -> Answer:
+        user = self.users.get(match["id"])
+        if user is None:
+            return Answer(statuses.NOT_FOUND_404, "user not found")
+        return Answer(statuses.SUCCESS_200, user)
+
+    def create_user(self, _: re.Match, body: Any) -> Answer:
+        if body["telegram_id"] in self.users:
+            return Answer(statuses.CONFLICT_409, "user already exist")
+        self.users[body["telegram_id"]] = body
+        return Answer(statuses.CREATED_201, body["telegram_id"])
+
+    def get_alarm(self, match: re.Match, _: Any) -> Answer:
+        alarm = self.alarms.get(match["id"])
+        if alarm is None:
+            return Answer(statuses.NOT_FOUND_404, "alarm not found")
+        return Answer(statuses.SUCCESS_200, alarm)
+
+    def get_ready_alarms(self, _: re.Match, __: Any) -> Answer:
+        alarms = [alarm for alarm in self.alarms.values() if alarm["status"] == "READY"]
+        if not alarms:
+            return Answer(statuses.NOT_FOUND_404, "alarms not found")
+        return Answer(statuses.SUCCESS_200, alarms)
+
+    def get_alarms_by_parent(self, match: re.Match, _: Any) -> Answer:
+        """Filter and projection query params are ignored, as old backend does"""
+        alarms = [alarm for alarm in self.alarms.values() if alarm["links"]["parent_id"] == match["id"]]
+        if not alarms:
+            return Answer(statuses.NOT_FOUND_404, "alarms not found")
+        return Answer(statuses.SUCCESS_200, alarms)
+
+    def patch_alarm(self, match: re.Match, body: Any) -> Answer:
+        alarm = self.alarms.get(match["id"])
+        if alarm is None:
+            return Answer(statuses.NOT_FOUND_404, "alarm not found")
+        for path, value in body.items():
+            *parents, name = path.split(".")
+            target = alarm
+            for parent in parents:
+                target = target[parent]
+            target[name] = value
+        return Answer(statuses.SUCCESS_200, match["id"])
+
+    def update_alarm_status(self, match: re.Match, _: Any) -> Answer:
+        alarm = self.alarms.get(match["id"])
+        if alarm is None:
+            return Answer(statuses.NOT_FOUND_404, "alarm not found")
+        alarm["status"] = match["status"]
+        return Answer(statuses.SUCCESS_200, match["id"])
+
+    def postpone_alarm(self, match: re.Match, _: Any) -> Answer:
+        alarm = self.alarms.get(match["id"])
+        if alarm is None:
+            return Answer(statuses.NOT_FOUND_404, "alarm not found")
+        alarm["status"] = "QUEUE"
+        alarm["times"]["next_notion_time"] = "2024-01-02T10:00:00"
+        return Answer(statuses.SUCCESS_200, {"next_notion_time": "2024-01-02 10:00:00"})
+
+
+def create_request_handler(server: TestServer) -> RequestHandler:
+    """Request handler of its own, so tests don't share connections and caches"""
+    return RequestHandler(host=str(server.make_url("/")), read_hosts="")
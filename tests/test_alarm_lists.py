@@ -0,0 +1,72 @@
+import unittest
+
+from src.models.alarm_model import ACTIVE_ALARM_STATUSES, AlarmStatus
+from src.services.storage.alarms_storage_handler import AlarmsStoragehandler
+from src.services.storage.cache import EntityCache
+from src.services.storage.cached_storage_handlers import CachedAlarmsStorageHandler
+from src.utils.exceptions.storage import StorageNotFound
+from tests.stand_in_backend import StandInBackend, create_request_handler
+from tests.test_check_active_alarms import make_alarm
+
+
+class TestActiveAlarmLists(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self) -> None:
+        self.backend = StandInBackend()
+        for _id, status in (("a1", "READY"), ("a2", "QUEUE"), ("a3", "FINISH")):
+            self.backend.alarms[_id] = {**make_alarm(_id, "1"), "status": status}
+        self.server = await self.backend.start()
+        self.request_handler = create_request_handler(self.server)
+        self.storage = AlarmsStoragehandler()
+        self.storage.request_handler = self.request_handler
+        self.cached_storage = CachedAlarmsStorageHandler(self.storage, EntityCache())
+
+    async def asyncTearDown(self) -> None:
+        await self.request_handler.close()
+        await self.server.close()
+
+    async def get_active_ids(self) -> list[str]:
+        alarms = await self.cached_storage.get_summaries_by_parent("note", ACTIVE_ALARM_STATUSES)
+        return [alarm.id for alarm in alarms]
+
+    async def test_finished_alarms_are_filtered_out(self) -> None:
+        alarms = await self.storage.get_summaries_by_parent("note", ACTIVE_ALARM_STATUSES)
+        self.assertEqual([alarm.id for alarm in alarms], ["a1", "a2"])
+
+        all_alarms = await self.storage.get_summaries_by_parent("note")
+        self.assertEqual([alarm.id for alarm in all_alarms], ["a1", "a2", "a3"])
+
+    async def test_no_active_alarms_is_not_found(self) -> None:
+        for alarm in self.backend.alarms.values():
+            alarm["status"] = "FINISH"
+
+        with self.assertRaises(StorageNotFound):
+            await self.storage.get_summaries_by_parent("note", ACTIVE_ALARM_STATUSES)
+
+    async def test_finished_alarm_leaves_cached_list(self) -> None:
+        self.assertEqual(await self.get_active_ids(), ["a1", "a2"])
+
+        await self.cached_storage.update_status("a1", AlarmStatus.FINISH.value)
+
+        self.assertEqual(await self.get_active_ids(), ["a2"])
+
+    async def test_reactivated_alarm_appears_in_cached_list(self) -> None:
+        self.assertEqual(await self.get_active_ids(), ["a1", "a2"])
+
+        await self.cached_storage.patch("a3", {"times.next_notion_time": "2024-01-03T10:00:00", "status": "QUEUE"})
+
+        self.assertEqual(await self.get_active_ids(), ["a1", "a2", "a3"])
+
+
+    async def test_moved_alarm_drops_cached_not_found_list(self) -> None:
+        with self.assertRaises(StorageNotFound):
+            await self.cached_storage.get_summaries_by_parent("note2", ACTIVE_ALARM_STATUSES)
+
+        await self.cached_storage.patch("a1", {"links": {"user_id": "1", "parent_id": "note2"}})
+
+        alarms = await self.cached_storage.get_summaries_by_parent("note2", ACTIVE_ALARM_STATUSES)
+        self.assertEqual([alarm.id for alarm in alarms], ["a1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
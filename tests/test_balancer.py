@@ -0,0 +1,75 @@
+import unittest
+from unittest import mock
+
+from aiohttp.test_utils import TestServer
+
+from src.services.requests.balancer import BalancedTransport, Upstream, consistency_key
+from src.services.requests.transports import create_transport
+from tests.stand_in_backend import StandInBackend
+
+
+class ReadAfterWriteTest(unittest.IsolatedAsyncioTestCase):
+    """Primary and replica are separate stand-in backends, so their request logs show where request went"""
+
+    async def asyncSetUp(self) -> None:
+        self.primary, self.replica = StandInBackend(), StandInBackend()
+        self.servers: list[TestServer] = [await self.primary.start(), await self.replica.start()]
+        self.transport = self.create_transport()
+
+    async def asyncTearDown(self) -> None:
+        await self.transport.close()
+        for server in self.servers:
+            await server.close()
+
+    def create_transport(self, **kwargs) -> BalancedTransport:
+        primary_host, replica_host = (str(server.make_url("/")) for server in self.servers)
+        return BalancedTransport(
+            primary=[Upstream(primary_host, create_transport(primary_host))],
+            replicas=[Upstream(replica_host, create_transport(replica_host))],
+            **kwargs
+        )
+
+    async def write(self, key: str) -> None:
+        with consistency_key(key):
+            await self.transport.request("POST", "users/create_user", {}, body={"telegram_id": key})
+
+    async def read(self, key: str) -> None:
+        with consistency_key(key):
+            await self.transport.request("GET", "users/get_user/1", {})
+
+    async def test_writer_reads_from_primary(self) -> None:
+        await self.write("user:1")
+        await self.read("user:1")
+        await self.read("user:2")
+
+        self.assertEqual(self.primary.requests, ["POST /users/create_user", "GET /users/get_user/1"])
+        self.assertEqual(self.replica.requests, ["GET /users/get_user/1"])
+
+    async def test_without_key_writes_are_keyed_by_token(self) -> None:
+        await self.transport.request("POST", "users/create_user", {"Authorization": "Bearer a"},
+                                     body={"telegram_id": "1"})
+        await self.transport.request("GET", "users/get_user/1", {"Authorization": "Bearer a"})
+        await self.transport.request("GET", "users/get_user/1", {"Authorization": "Bearer b"})
+
+        self.assertEqual(self.primary.requests, ["POST /users/create_user", "GET /users/get_user/1"])
+        self.assertEqual(self.replica.requests, ["GET /users/get_user/1"])
+
+    async def test_reads_go_to_replica_after_window(self) -> None:
+        with mock.patch("src.services.requests.balancer.time.monotonic", return_value=100.0):
+            await self.write("user:1")
+        with mock.patch("src.services.requests.balancer.time.monotonic", return_value=100.0 + 3):
+            await self.read("user:1")
+            await self.write("user:2")
+
+        self.assertEqual(self.replica.requests, ["GET /users/get_user/1"])
+        self.assertEqual(list(self.transport._last_writes), ["user:2"])
+
+    async def test_writers_are_bounded(self) -> None:
+        await self.transport.close()
+        self.transport = self.create_transport(max_writers=2)
+        for user_id in range(3):
+            await self.write(f"user:{user_id}")
+        await self.read("user:0")
+
+        self.assertEqual(list(self.transport._last_writes), ["user:1", "user:2"])
+        self.assertEqual(self.replica.requests, ["GET /users/get_user/1"])
@@ -0,0 +1,92 @@
+import unittest
+
+from src.models.user_model import UserModel
+from src.services.requests.batch import BATCH_NOT_SUPPORTED_STATUSES
+from src.services.storage.user_storage_handler import UserStorageHandler
+from src.utils import statuses
+from src.utils.exceptions.storage import StorageDuplicate, StorageNotFound, UnexpectedResponse
+from tests.stand_in_backend import Answer, StandInBackend, create_request_handler
+
+
+def make_user(telegram_id: str) -> UserModel:
+    return UserModel(
+        telegram_id=telegram_id, user_name=f"user {telegram_id}", lang_code="ru", timezone=3,
+        first_name=None, last_name=None
+    )
+
+
+class TestRequestBatch(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self) -> None:
+        self.backend = StandInBackend()
+        for telegram_id in ("1", "2"):
+            self.backend.users[telegram_id] = make_user(telegram_id).model_dump()
+        self.server = await self.backend.start()
+        self.request_handler = create_request_handler(self.server)
+        self.request_handler.batch_supported = True
+        self.storage = UserStorageHandler()
+        self.storage.request_handler = self.request_handler
+
+    async def asyncTearDown(self) -> None:
+        await self.request_handler.close()
+        await self.server.close()
+
+    async def test_batch_is_off_by_default(self) -> None:
+        request_handler = create_request_handler(self.server)
+        self.storage.request_handler = request_handler
+        try:
+            users = await request_handler.batch().run(self.storage.get("1"), self.storage.get("2"))
+        finally:
+            await request_handler.close()
+
+        self.assertEqual([user.telegram_id for user in users], ["1", "2"])
+        self.assertEqual(self.backend.batches, [])
+
+    async def test_requests_are_sent_in_one_envelope(self) -> None:
+        users = await self.request_handler.batch().run(self.storage.get("1"), self.storage.get("2"))
+
+        self.assertEqual([user.telegram_id for user in users], ["1", "2"])
+        self.assertEqual(len(self.backend.batches), 1)
+        self.assertEqual(
+            [(operation["method"], operation["url"]) for operation in self.backend.batches[0]],
+            [("GET", "users/get_user/1"), ("GET", "users/get_user/2")]
+        )
+
+    async def test_every_operation_has_own_result(self) -> None:
+        results = await self.request_handler.batch().run(
+            self.storage.get("1"), self.storage.get("3"), self.storage.create(make_user("2")),
+            return_exceptions=True
+        )
+
+        self.assertEqual(len(self.backend.batches), 1)
+        self.assertEqual(results[0], make_user("1"))
+        self.assertIsInstance(results[1], StorageNotFound)
+        self.assertIsInstance(results[2], StorageDuplicate)
+
+    async def test_malformed_envelope_fails_every_operation(self) -> None:
+        self.backend.batch_answer = Answer(statuses.SUCCESS_200, {"responses": [{"status": 200, "body": None}]})
+
+        results = await self.request_handler.batch().run(
+            self.storage.get("1"), self.storage.get("2"), return_exceptions=True
+        )
+
+        self.assertEqual([type(result) for result in results], [UnexpectedResponse, UnexpectedResponse])
+
+    async def test_fallback_when_backend_has_no_batch_endpoint(self) -> None:
+        for status in sorted(BATCH_NOT_SUPPORTED_STATUSES):
+            with self.subTest(status=status):
+                self.backend.batches.clear()
+                self.backend.batch_answer = Answer(status, "batch is not supported")
+                self.request_handler.batch_supported = True
+
+                users = await self.request_handler.batch().run(self.storage.get("1"), self.storage.get("2"))
+                self.assertEqual([user.telegram_id for user in users], ["1", "2"])
+                self.assertFalse(self.request_handler.batch_supported)
+
+                # Envelope isn't tried again
+                await self.request_handler.batch().run(self.storage.get("1"), self.storage.get("2"))
+                self.assertEqual(len(self.backend.batches), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+from aiogram.exceptions import TelegramForbiddenError
+from aiogram.methods import SendMessage
+
+from src.services.scheduler.jobs.check_active_alarms import job_check_active_alarms
+from src.services.storage.alarms_storage_handler import AlarmsStoragehandler
+from tests.stand_in_backend import StandInBackend, create_request_handler
+
+
+def make_alarm(_id: str, user_id: str, is_repeatable: bool = False) -> dict:
+    return {
+        "_id": _id, "name": f"alarm {_id}", "description": None, "is_repeatable": is_repeatable, "status": "READY",
+        "links": {"user_id": user_id, "parent_id": "note"},
+        "times": {"creation_time": "2024-01-01T10:00:00", "next_notion_time": "2024-01-01T10:00:00",
+                  "end_time": None, "repeat_interval": 60 if is_repeatable else None}
+    }
+
+
+class FakeBot:
+    """Bot which collects sent messages, users who blocked it can't get messages"""
+
+    def __init__(self, blocked: set[str]) -> None:
+        self.blocked = blocked
+        self.sent: list[str] = []
+
+    async def send_message(self, chat_id: str, text: str, **_) -> None:
+        if chat_id in self.blocked:
+            raise TelegramForbiddenError(SendMessage(chat_id=chat_id, text=text), "bot was blocked by the user")
+        self.sent.append(text)
+
+
+class TestCheckActiveAlarms(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self) -> None:
+        self.backend = StandInBackend()
+        self.server = await self.backend.start()
+        self.request_handler = create_request_handler(self.server)
+        self.storage = AlarmsStoragehandler()
+        self.storage.request_handler = self.request_handler
+
+    async def asyncTearDown(self) -> None:
+        await self.request_handler.close()
+        await self.server.close()
+
+    async def test_failed_alarm_does_not_stop_others(self) -> None:
+        for alarm in (make_alarm("a1", "1"), make_alarm("a2", "2"), make_alarm("a3", "1", is_repeatable=True)):
+            self.backend.alarms[alarm["_id"]] = alarm
+        bot = FakeBot(blocked={"2"})
+
+        await job_check_active_alarms(bot, alarms_storage=self.storage)
+
+        self.assertEqual(bot.sent, ["alarm a1:\nNone", "alarm a3:\nNone"])
+        self.assertEqual(
+            {_id: alarm["status"] for _id, alarm in self.backend.alarms.items()},
+            {"a1": "FINISH", "a2": "READY", "a3": "QUEUE"}
+        )
+
+    async def test_no_ready_alarms(self) -> None:
+        bot = FakeBot(blocked=set())
+
+        await job_check_active_alarms(bot, alarms_storage=self.storage)
+
+        self.assertEqual(bot.sent, [])
+        self.assertEqual(self.backend.requests[-1], "GET /alarms/get_all_ready_alarms")
+
+
+if __name__ == "__main__":
+    unittest.main()
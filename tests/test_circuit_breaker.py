@@ -0,0 +1,74 @@
+import unittest
+
+from src.services.requests.circuit_breaker import CircuitBreaker, CircuitState
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0, half_open_probes=2)
+
+    def open_circuit(self) -> None:
+        for _ in range(2):
+            self.breaker.record_failure(self.breaker.allow_request())
+
+    def test_opens_after_consecutive_failures(self) -> None:
+        admission = self.breaker.allow_request()
+        self.breaker.record_failure(admission)
+        self.breaker.record_success(self.breaker.allow_request())
+        self.breaker.record_failure(self.breaker.allow_request())
+        self.assertEqual(self.breaker._state, CircuitState.CLOSED)
+        self.breaker.record_failure(self.breaker.allow_request())
+        self.assertEqual(self.breaker._state, CircuitState.OPEN)
+
+    def test_closes_after_probes_succeed(self) -> None:
+        self.open_circuit()
+        probes = [self.breaker.allow_request(), self.breaker.allow_request()]
+        self.assertEqual(self.breaker.state, CircuitState.HALF_OPEN)
+        self.assertFalse(self.breaker.allow_request())
+        for probe in probes:
+            self.breaker.record_success(probe)
+        self.assertEqual(self.breaker.state, CircuitState.CLOSED)
+
+    def test_failed_probe_opens_circuit(self) -> None:
+        self.open_circuit()
+        self.breaker.record_failure(self.breaker.allow_request())
+        self.assertEqual(self.breaker._state, CircuitState.OPEN)
+
+    def test_request_admitted_while_closed_is_not_probe(self) -> None:
+        old = [self.breaker.allow_request(), self.breaker.allow_request()]
+        self.open_circuit()
+        probe = self.breaker.allow_request()
+        self.assertEqual(self.breaker.state, CircuitState.HALF_OPEN)
+
+        # Late successes of requests admitted before don't close circuit and don't free probe slots
+        for admission in old:
+            self.breaker.record_success(admission)
+        self.assertEqual(self.breaker.state, CircuitState.HALF_OPEN)
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+
+        self.breaker.record_success(probe)
+        self.assertEqual(self.breaker.state, CircuitState.HALF_OPEN)
+
+    def test_probe_of_previous_half_open_period_is_ignored(self) -> None:
+        self.open_circuit()
+        stale_probe = self.breaker.allow_request()
+        self.breaker.record_failure(self.breaker.allow_request())
+        probe = self.breaker.allow_request()
+        self.assertEqual(self.breaker.state, CircuitState.HALF_OPEN)
+
+        self.breaker.record_success(stale_probe)
+        self.breaker.record_success(probe)
+        self.assertEqual(self.breaker.state, CircuitState.HALF_OPEN)
+
+    def test_cancelled_probe_frees_slot(self) -> None:
+        self.open_circuit()
+        probes = [self.breaker.allow_request(), self.breaker.allow_request()]
+        self.assertFalse(self.breaker.allow_request())
+        self.breaker.record_cancel(probes[0])
+        self.assertTrue(self.breaker.allow_request())
+
+
+if __name__ == "__main__":
+    unittest.main()
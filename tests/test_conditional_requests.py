@@ -0,0 +1,86 @@
+import unittest
+
+from src.utils import statuses
+from src.utils.json_backend import json_loads
+from tests.stand_in_backend import StandInBackend, create_request_handler
+
+URL = "users/get_user/1"
+
+
+class TestConditionalRequests(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self) -> None:
+        self.backend = StandInBackend()
+        self.backend.users["1"] = {"telegram_id": "1", "user_name": "first"}
+        self.server = await self.backend.start()
+        self.request_handler = create_request_handler(self.server)
+        self.cache = self.request_handler.conditional_cache
+
+    async def asyncTearDown(self) -> None:
+        await self.request_handler.close()
+        await self.server.close()
+
+    async def get_user_name(self) -> str:
+        response = await self.request_handler.get(URL)
+        self.assertEqual(response.status, statuses.SUCCESS_200)
+        return json_loads(response.content)["user_name"]
+
+    async def test_not_modified_is_answered_from_cache(self) -> None:
+        self.backend.etag_enabled = True
+
+        self.assertEqual(await self.get_user_name(), "first")
+        self.assertEqual(await self.get_user_name(), "first")
+
+        self.assertEqual(self.backend.not_modified, 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    async def test_last_modified_revalidation(self) -> None:
+        self.backend.last_modified = "Mon, 01 Jan 2024 00:00:00 GMT"
+
+        self.assertEqual(await self.get_user_name(), "first")
+        self.assertEqual(await self.get_user_name(), "first")
+
+        self.assertEqual(self.backend.not_modified, 1)
+        self.assertEqual(self.cache.get(URL).last_modified, "Mon, 01 Jan 2024 00:00:00 GMT")
+
+    async def test_changed_entity_replaces_etag(self) -> None:
+        self.backend.etag_enabled = True
+        await self.get_user_name()
+        old_etag = self.cache.get(URL).etag
+
+        self.backend.users["1"]["user_name"] = "second"
+        self.assertEqual(await self.get_user_name(), "second")
+        self.assertNotEqual(self.cache.get(URL).etag, old_etag)
+
+        # The next request is revalidated with new validator
+        self.assertEqual(await self.get_user_name(), "second")
+        self.assertEqual(self.backend.not_modified, 1)
+
+    async def test_answer_without_validator_evicts_entry(self) -> None:
+        self.backend.etag_enabled = True
+        await self.get_user_name()
+        self.assertEqual(len(self.cache), 1)
+
+        self.backend.etag_enabled = False
+        self.backend.users["1"]["user_name"] = "second"
+        self.assertEqual(await self.get_user_name(), "second")
+        self.assertIsNone(self.cache.get(URL))
+        self.assertEqual(self.cache.size, 0)
+
+        # Request isn't conditional anymore, so backend can't answer it with 304 of old body
+        self.backend.etag_enabled = True
+        self.assertEqual(await self.get_user_name(), "second")
+        self.assertEqual(self.backend.not_modified, 0)
+
+    async def test_not_found_evicts_entry(self) -> None:
+        self.backend.etag_enabled = True
+        await self.get_user_name()
+
+        del self.backend.users["1"]
+        response = await self.request_handler.get(URL)
+        self.assertEqual(response.status, statuses.NOT_FOUND_404)
+        self.assertIsNone(self.cache.get(URL))
+
+
+if __name__ == "__main__":
+    unittest.main()
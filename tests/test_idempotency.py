@@ -0,0 +1,67 @@
+import unittest
+from types import SimpleNamespace
+
+from src.handlers.user_commands import start
+from src.models.user_model import UserModel
+from src.services.storage.user_storage_handler import UserStorageHandler
+from tests.stand_in_backend import StandInBackend, create_request_handler
+
+
+class FakeMessage:
+    """Message of /start, answers are collected instead of sending"""
+
+    def __init__(self, user_id: int) -> None:
+        self.from_user = SimpleNamespace(
+            id=user_id, username="user", language_code="ru", first_name="First", last_name=None
+        )
+        self.answers: list[str] = []
+
+    async def answer(self, text: str, **_) -> None:
+        self.answers.append(text)
+
+
+class TestIdempotentCreate(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self) -> None:
+        self.backend = StandInBackend()
+        self.server = await self.backend.start()
+        self.request_handler = create_request_handler(self.server)
+        self.storage = UserStorageHandler()
+        self.storage.request_handler = self.request_handler
+
+    async def asyncTearDown(self) -> None:
+        await self.request_handler.close()
+        await self.server.close()
+
+    async def test_retried_create_makes_one_user(self) -> None:
+        self.backend.lost_answers = 1
+        user = UserModel(telegram_id="1", user_name="user", lang_code="ru", timezone=3, first_name=None, last_name=None)
+
+        await self.storage.create(user, idempotency_key="1:create_user:nonce")
+
+        self.assertEqual(list(self.backend.users), ["1"])
+        self.assertEqual(self.backend.idempotency_keys, ["1:create_user:nonce"] * 2)
+
+    async def test_start_retries_create_with_one_key(self) -> None:
+        self.backend.lost_answers = 1
+        msg = FakeMessage(1)
+
+        await start(msg, sh=self.storage)
+
+        self.assertEqual(list(self.backend.users), ["1"])
+        self.assertEqual(len(self.backend.idempotency_keys), 2)
+        self.assertEqual(len(set(self.backend.idempotency_keys)), 1)
+        self.assertEqual(len(msg.answers), 1)
+
+    async def test_every_start_has_own_key(self) -> None:
+        await start(FakeMessage(1), sh=self.storage)
+        del self.backend.users["1"]
+        await start(FakeMessage(1), sh=self.storage)
+
+        # User removed on backend is created again, not answered with result of the first /start
+        self.assertEqual(list(self.backend.users), ["1"])
+        self.assertEqual(len(set(self.backend.idempotency_keys)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from src.models.alarm_model import AlarmModel, AlarmSummaryModel
+from src.services.storage.alarms_storage_handler import AlarmsStoragehandler
+from src.services.storage.cache import EntityCache
+from src.services.storage.cached_storage_handlers import CachedAlarmsStorageHandler
+from src.services.storage.snapshot_storage_handlers import SnapshotAlarmsStorageHandler
+from src.services.storage.tree_snapshot import TreeSnapshots
+from src.services.ui.prefetch import NavigationPrefetcher
+from src.utils.exceptions.storage import StorageNotFound
+from tests.stand_in_backend import StandInBackend, create_request_handler
+from tests.test_check_active_alarms import make_alarm
+
+
+class PrefetchWithSnapshotTest(unittest.IsolatedAsyncioTestCase):
+    """Storage handlers are stacked as in bot with both entity cache and tree snapshot enabled"""
+
+    async def asyncSetUp(self) -> None:
+        self.backend = StandInBackend()
+        self.backend.alarms["a1"] = make_alarm("a1", "1")
+        self.server = await self.backend.start()
+        self.request_handler = create_request_handler(self.server)
+        storage = AlarmsStoragehandler()
+        storage.request_handler = self.request_handler
+        self.snapshots = TreeSnapshots()
+        self.alarms_sh = SnapshotAlarmsStorageHandler(
+            CachedAlarmsStorageHandler(storage, EntityCache()), self.snapshots
+        )
+        self.prefetcher = NavigationPrefetcher(enabled=True, snapshots=self.snapshots)
+        self.alarms = [AlarmSummaryModel.model_validate(self.backend.alarms["a1"])]
+
+    async def asyncTearDown(self) -> None:
+        await self.request_handler.close()
+        await self.server.close()
+
+    def alarm_requests(self) -> list[str]:
+        """Login is made once by all request handlers, so it's left out"""
+        return [request for request in self.backend.requests if "/alarms/" in request]
+
+    async def prefetch_alarm_menus(self) -> None:
+        with mock.patch("src.services.ui.prefetch.get_alarms_storage_handler", return_value=self.alarms_sh):
+            self.prefetcher.prefetch_alarm_menus(1, self.alarms)
+        await asyncio.gather(*self.prefetcher._tasks.values())
+
+    async def test_prefetch_while_tree_is_not_loaded(self) -> None:
+        await self.prefetch_alarm_menus()
+        self.assertEqual(self.alarm_requests(), ["GET /alarms/get_alarm/a1"])
+
+        await self.alarms_sh.get("a1")
+        self.assertEqual(self.alarm_requests(), ["GET /alarms/get_alarm/a1"])
+
+    async def test_no_prefetch_when_tree_is_loaded(self) -> None:
+        not_found = mock.AsyncMock(side_effect=StorageNotFound("nothing"))
+        alarms = mock.AsyncMock(return_value=[AlarmModel.model_validate(self.backend.alarms["a1"])])
+        await self.snapshots.ensure_loaded(
+            "1", mock.Mock(get_all_by_user=not_found), mock.Mock(get_all_by_user=not_found),
+            mock.Mock(get_all_by_user=alarms)
+        )
+
+        await self.prefetch_alarm_menus()
+        await self.alarms_sh.get("a1")
+
+        self.assertEqual(self.prefetcher.started, 0)
+        self.assertEqual(self.alarm_requests(), [])
@@ -0,0 +1,84 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from src.models.themes_modles import ThemeModel
+from src.services.requests.deadline import deadline
+from src.services.storage.tree_snapshot import TreeSnapshots
+from src.utils.exceptions.storage import StorageNotFound
+
+
+class FakeStorage:
+    """Storage of one user whose themes are returned once load is released, user has no notes or alarms"""
+
+    def __init__(self, themes: list[ThemeModel]) -> None:
+        self.themes = themes
+        self.release = asyncio.Event()
+        self.loads = 0
+        self.error: Exception | None = None
+
+    async def get_themes(self, user_id: str) -> list[ThemeModel]:
+        self.loads += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.themes
+
+    @staticmethod
+    async def get_nothing(user_id: str) -> list:
+        raise StorageNotFound(f"nothing of user {user_id}")
+
+
+class LoadInBackgroundTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self) -> None:
+        self.snapshots = TreeSnapshots()
+        self.theme = ThemeModel.model_validate(
+            {"_id": "theme", "name": "theme", "description": "", "links": {"user_id": "1"}}
+        )
+        self.storage = FakeStorage([self.theme])
+        self.themes_sh, self.notes_sh, self.alarms_sh = (
+            mock.Mock(get_all_by_user=self.storage.get_themes),
+            mock.Mock(get_all_by_user=self.storage.get_nothing),
+            mock.Mock(get_all_by_user=self.storage.get_nothing),
+        )
+
+    def load_in_background(self) -> None:
+        self.snapshots.load_in_background("1", self.themes_sh, self.notes_sh, self.alarms_sh)
+
+    async def wait_loads(self) -> None:
+        await asyncio.gather(*self.snapshots._background_loads)
+
+    async def test_caller_does_not_wait_for_load(self) -> None:
+        self.load_in_background()
+        await asyncio.sleep(0)
+        self.load_in_background()
+
+        self.assertIsNone(self.snapshots.get_tree("1"))
+        self.assertEqual(self.snapshots.stats()["loading"], 1)
+        self.storage.release.set()
+        await self.wait_loads()
+        self.assertEqual(self.storage.loads, 1)
+        self.assertEqual(self.snapshots.get_tree("1").themes, {"theme": self.theme})
+
+    async def test_load_outlives_update_deadline(self) -> None:
+        with deadline(0.01):
+            self.load_in_background()
+        await asyncio.sleep(0.05)
+        self.storage.release.set()
+        await self.wait_loads()
+
+        self.assertIsNotNone(self.snapshots.get_tree("1"))
+
+    async def test_failed_load_is_started_again(self) -> None:
+        self.storage.error = ConnectionError("backend is down")
+        self.storage.release.set()
+        self.load_in_background()
+        await self.wait_loads()
+        self.assertIsNone(self.snapshots.get_tree("1"))
+
+        self.storage.error = None
+        self.load_in_background()
+        await self.wait_loads()
+        self.assertEqual(self.storage.loads, 2)
+        self.assertIsNotNone(self.snapshots.get_tree("1"))
@@ -0,0 +1,141 @@
+import asyncio
+import unittest
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.services.requests.transports import ASGITransport, WebSocketTransport
+from src.services.requests.websocket_gateway import WebSocketGateway, create_gateway_app
+from src.utils.json_backend import json_dumps, json_loads
+
+
+async def asgi_backend(scope: dict, receive, send) -> None:
+    """Answer with request path, '/slow/...' paths are answered later"""
+    await receive()
+    if scope["path"].startswith("/slow/"):
+        await asyncio.sleep(0.2)
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": json_dumps({"path": scope["path"]})})
+
+
+def ws_url(server: TestServer) -> str:
+    return str(server.make_url("/ws")).replace("http://", "ws://", 1)
+
+
+class TestWebSocketTransportWithGateway(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self) -> None:
+        self.connections: list[web.Request] = []
+        gateway = WebSocketGateway(ASGITransport(asgi_backend))
+
+        async def handle(request: web.Request) -> web.WebSocketResponse:
+            self.connections.append(request)
+            return await gateway.handle(request)
+
+        app = web.Application()
+        app.router.add_get("/ws", handle)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.transport = WebSocketTransport(ws_url(self.server))
+        await self.transport.open()
+
+    async def asyncTearDown(self) -> None:
+        await self.transport.close()
+        await self.server.close()
+
+    async def get(self, url: str) -> dict:
+        response = await self.transport.request("GET", url, {})
+        self.assertEqual(response.status, 200)
+        return json_loads(response.content)
+
+    async def test_responses_out_of_order(self) -> None:
+        slow = asyncio.create_task(self.get("slow/1"))
+        await asyncio.sleep(0.05)
+        fast = await self.get("fast/2")
+
+        self.assertEqual(fast, {"path": "/fast/2"})
+        self.assertFalse(slow.done())
+        self.assertEqual(await slow, {"path": "/slow/1"})
+        self.assertEqual(len(self.connections), 1)
+
+    async def test_many_concurrent_requests_share_connection(self) -> None:
+        results = await asyncio.gather(*(self.get(f"{'slow' if i % 3 else 'fast'}/{i}") for i in range(30)))
+
+        self.assertEqual(results, [{"path": f"/{'slow' if i % 3 else 'fast'}/{i}"} for i in range(30)])
+        self.assertEqual(len(self.connections), 1)
+
+    async def test_reconnect_after_connection_dropped(self) -> None:
+        await self.get("fast/1")
+        pending = asyncio.create_task(self.get("slow/2"))
+        await asyncio.sleep(0.05)
+
+        self.connections[0].transport.close()
+        with self.assertRaises(aiohttp.ServerDisconnectedError):
+            await pending
+
+        self.assertEqual(await self.get("fast/3"), {"path": "/fast/3"})
+        self.assertEqual(len(self.connections), 2)
+
+    async def test_long_body_in_several_frames(self) -> None:
+        url = "fast/" + "x" * 100_000
+        self.assertEqual(await self.get(url), {"path": "/" + url})
+
+
+class TestWebSocketTransportBadFrames(unittest.IsolatedAsyncioTestCase):
+    """Peer sends malformed and foreign frames before real response"""
+
+    async def asyncSetUp(self) -> None:
+        async def handle(request: web.Request) -> web.WebSocketResponse:
+            ws = web.WebSocketResponse()
+            await ws.prepare(request)
+            async for message in ws:
+                frame = json_loads(message.data)
+                for bad in ("not json", "[1, 2]", '"text"', '{"id": "1", "status": 500}', '{"status": 500}'):
+                    await ws.send_str(bad)
+                await ws.send_bytes(b"binary")
+                await ws.send_str(json_dumps({"id": frame["id"] + 1000, "status": 500, "body": "foreign"}).decode())
+                await ws.send_str(json_dumps({"id": frame["id"], "status": 200, "body": frame["url"]}).decode())
+            return ws
+
+        app = web.Application()
+        app.router.add_get("/ws", handle)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.transport = WebSocketTransport(ws_url(self.server))
+        await self.transport.open()
+
+    async def asyncTearDown(self) -> None:
+        await self.transport.close()
+        await self.server.close()
+
+    async def test_bad_frames_are_skipped(self) -> None:
+        for url in ("items/1", "items/2"):
+            response = await self.transport.request("GET", url, {})
+            self.assertEqual((response.status, response.content), (200, url.encode()))
+
+
+class TestGatewayApp(unittest.IsolatedAsyncioTestCase):
+
+    async def test_gateway_app_opens_and_closes_transport(self) -> None:
+        backend = ASGITransport(asgi_backend)
+        server = TestServer(create_gateway_app(backend))
+        await server.start_server()
+        transport = WebSocketTransport(ws_url(server))
+        try:
+            response = await transport.request("GET", "items/1", {})
+            self.assertEqual(json_loads(response.content), {"path": "/items/1"})
+        finally:
+            await transport.close()
+            await server.close()
+
+    async def test_warm_up_with_backend_down(self) -> None:
+        transport = WebSocketTransport("ws://127.0.0.1:1/ws")
+        try:
+            self.assertEqual(await transport.warm_up(1), 0)
+        finally:
+            await transport.close()
+
+
+if __name__ == "__main__":
+    unittest.main()